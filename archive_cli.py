@@ -0,0 +1,274 @@
+import os
+import sys
+import signal
+import argparse
+import datetime
+
+from archive_engine import (ArchiveEngine, CONFIG_FILE, JOURNAL_FILE, REPORTS_DB_FILE, PROFILE_DIR, HASH_ALGORITHMS,
+                            load_config)
+
+def parse_date(value):
+    try:
+        return datetime.datetime.strptime(value.strip(), "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"некорректная дата '{value}', ожидается ГГГГ-ММ-ДД")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Архиватор файлов без графического интерфейса: поиск файлов по дате и перемещение в архив. "
+                    "Параметры, не указанные в командной строке, берутся из файла настроек.")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"файл настроек (по умолчанию {CONFIG_FILE})")
+    parser.add_argument("--source", help="исходная папка (анализ и удаление)")
+    parser.add_argument("--archive", help="папка архива (копирование)")
+    
+    period = parser.add_argument_group("период (включая границы)")
+    period.add_argument("--from", dest="date_from", type=parse_date, help="дата от, ГГГГ-ММ-ДД")
+    period.add_argument("--to", dest="date_to", type=parse_date, help="дата до, ГГГГ-ММ-ДД")
+    period.add_argument("--days", type=int, help="последние N дней (как кнопки 'Посл. N дней')")
+    period.add_argument("--older-than-days", type=int,
+                        help="файлы старше N дней: период с 1970 года по сегодня минус N дней")
+    parser.add_argument("--time-type", choices=["modified", "accessed", "created"], help="тип даты файла")
+    
+    excl = parser.add_argument_group("исключения")
+    excl.add_argument("--exclude-files", help="маски файлов через запятую")
+    excl.add_argument("--exclude-dirs", help="маски папок через запятую")
+    excl.add_argument("--exclude-paths", help="полные или относительные пути к папкам через запятую")
+    excl.add_argument("--skip-hidden", action=argparse.BooleanOptionalAction, default=None,
+                      help="пропускать скрытые файлы и папки")
+    excl.add_argument("--min-size-kb", type=int, help="исключить файлы меньше N КБ (0 — не исключать)")
+    
+    perf = parser.add_argument_group("производительность")
+    perf.add_argument("--scan-threads", type=int, help="потоков обхода папок")
+    perf.add_argument("--scan-processes", type=int,
+                      help="процессов обхода папок (больше 1 — фильтрация на нескольких ядрах, для SSD/NVMe)")
+    perf.add_argument("--async-io", action=argparse.BooleanOptionalAction, default=None,
+                      help="поиск и перемещение через asyncio: сотни одновременных операций для сетевых дисков (SMB/NFS)")
+    perf.add_argument("--async-per-mount", type=int, help="одновременных операций на том в режиме --async-io")
+    perf.add_argument("--copy-workers", type=int, help="потоков копирования")
+    perf.add_argument("--use-index", action=argparse.BooleanOptionalAction, default=None,
+                      help="использовать индекс сканирования: папки с неизменной датой берутся из индекса; даты файлов "
+                           "в периоде (и всех файлов, если период доходит до прошлого поиска) перечитываются с диска, "
+                           "но перенос даты файла назад без изменения папки не замечается")
+    perf.add_argument("--stream-results", action=argparse.BooleanOptionalAction, default=None,
+                      help="хранить найденные файлы во временном файле на диске, а не в памяти")
+    perf.add_argument("--verify", choices=["size", "hash"], help="проверка копии перед удалением: по размеру или по контрольной сумме")
+    perf.add_argument("--journal", action=argparse.BooleanOptionalAction, default=None,
+                      help="вести журнал перемещения для продолжения после сбоя")
+    perf.add_argument("--hash-algorithm", choices=list(HASH_ALGORITHMS), help="алгоритм контрольной суммы для --verify hash")
+    perf.add_argument("--format", dest="archive_format", choices=["tree", "zip"],
+                      help="формат архива: копия структуры папок или zip-тома с индексом")
+    perf.add_argument("--volume-mb", type=int, help="максимальный размер zip-тома, МБ")
+    perf.add_argument("--profile", dest="profile_mode", choices=["off", "stages", "cprofile"],
+                      help=f"профилирование поиска и перемещения: таймеры этапов или cProfile (результаты в папке {PROFILE_DIR} "
+                           f"рядом с файлом настроек)")
+    perf.add_argument("--scan-and-move", action=argparse.BooleanOptionalAction, default=None,
+                      help="перемещать найденные файлы сразу во время поиска, не дожидаясь его окончания")
+    perf.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=None,
+                      help="не копировать файлы, содержимое которых уже есть в архиве (жесткие ссылки)")
+    
+    out = parser.add_argument_group("отчеты и режим работы")
+    out.add_argument("--search-only", action="store_true", help="только поиск, без перемещения")
+    out.add_argument("--resume", action="store_true",
+                     help=f"продолжить прерванное перемещение по журналу {JOURNAL_FILE} (без поиска; требует --yes)")
+    out.add_argument("--discard-journal", action="store_true",
+                     help=f"начать новое перемещение, отказавшись от продолжения незавершенного (журнал {JOURNAL_FILE} перезаписывается)")
+    out.add_argument("--extract", metavar="REL_PATH",
+                     help="извлечь файл из zip-томов папки --archive по пути относительно исходной папки")
+    out.add_argument("--extract-to", default=".", help="папка для --extract (по умолчанию текущая)")
+    out.add_argument("--search-report", help="сохранить отчет о поиске (.json, .ndjson или .csv; .txt рядом, если включено в настройках)")
+    out.add_argument("--report", help="файл отчета о перемещении (.json, .ndjson, .csv или .txt; по умолчанию archive_report_<время>.json)")
+    out.add_argument("--report-db", action=argparse.BooleanOptionalAction, default=None,
+                     help=f"дописывать результаты поиска и перемещения в базу отчетов {REPORTS_DB_FILE}")
+    out.add_argument("--yes", action="store_true",
+                     help="подтверждение перемещения: файлы будут УДАЛЕНЫ из исходной папки после копирования")
+    out.add_argument("--quiet", action="store_true", help="выводить только ошибки и итоги")
+    return parser
+
+def apply_overrides(config, args):
+    """Параметры командной строки поверх сохраненных настроек"""
+    overrides = {
+        "source_folder": args.source,
+        "archive_folder": args.archive,
+        "time_type": args.time_type,
+        "exclude_files": args.exclude_files,
+        "exclude_dirs": args.exclude_dirs,
+        "exclude_paths": args.exclude_paths,
+        "skip_hidden": args.skip_hidden,
+        "scan_threads": args.scan_threads,
+        "scan_processes": args.scan_processes,
+        "async_io": args.async_io,
+        "async_per_mount": args.async_per_mount,
+        "copy_workers": args.copy_workers,
+        "use_scan_index": args.use_index,
+        "stream_results": args.stream_results,
+        "verify_mode": args.verify,
+        "hash_algorithm": args.hash_algorithm,
+        "use_journal": args.journal,
+        "dedup": args.dedup,
+        "report_db": args.report_db,
+        "profile_mode": args.profile_mode,
+        "scan_and_move": args.scan_and_move,
+        "archive_format": args.archive_format,
+        "zip_volume_mb": args.volume_mb
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            config[key] = value
+    if args.min_size_kb is not None:
+        config["exclude_small"] = args.min_size_kb > 0
+        config["min_size_kb"] = max(args.min_size_kb, 0)
+    return config
+
+def resolve_period(args, parser):
+    today = datetime.datetime.today()
+    if args.older_than_days is not None:
+        start = datetime.datetime(1970, 1, 2)
+        end = today - datetime.timedelta(days=args.older_than_days)
+    elif args.days is not None:
+        start = today - datetime.timedelta(days=args.days)
+        end = today
+    elif args.date_from is not None and args.date_to is not None:
+        start = args.date_from
+        end = args.date_to
+    else:
+        parser.error("укажите период: --from и --to, --days или --older-than-days")
+    if start > end:
+        parser.error("дата 'от' должна быть <= даты 'до'")
+    return (datetime.datetime.combine(start.date(), datetime.time.min),
+            datetime.datetime.combine(end.date(), datetime.time.max))
+
+def make_printer(quiet):
+    def print_log(message, error=False, success=False):
+        if quiet and not (error or success):
+            return
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        prefix = "[ОШИБКА] " if error else ("[УСПЕХ] " if success else "")
+        print(f"[{timestamp}] {prefix}{message}", file=sys.stderr if error else sys.stdout, flush=True)
+    return print_log
+
+def write_search_report(engine, outcome, args, print_log):
+    """Итог поиска и отчеты о найденных файлах"""
+    print_log(f"Поиск за {outcome.duration:.1f} сек. Найдено: {len(outcome.results)}, Ошибок: {outcome.errors}, "
+              f"Пропущено: скрытые={outcome.skipped_hidden}, маски={outcome.skipped_pattern}, "
+              f"размер={outcome.skipped_size}, ПОЛНЫЕ ПУТИ={outcome.skipped_by_path}", success=True)
+    
+    if args.search_report:
+        engine.save_search_report_json(args.search_report, outcome.results, outcome.time_type, outcome.start_dt,
+                                       outcome.end_dt, outcome.skipped_by_path, outcome.metrics)
+        print_log(f"Отчет о поиске сохранен: {args.search_report}", success=True)
+        report_base, report_format = os.path.splitext(args.search_report)
+        if engine.config.get("save_txt_report", True) and report_format.lower() != '.txt':
+            txt_path = report_base + '.txt'
+            engine.save_search_report_txt(txt_path, outcome.results, outcome.time_type, outcome.start_dt,
+                                          outcome.end_dt, outcome.skipped_by_path)
+            print_log(f"Отчет о поиске сохранен в формате TXT: {txt_path}", success=True)
+    
+    if engine.config.get("report_db", False):
+        engine.save_search_report_json(REPORTS_DB_FILE, outcome.results, outcome.time_type, outcome.start_dt,
+                                       outcome.end_dt, outcome.skipped_by_path, outcome.metrics)
+        print_log(f"Результаты поиска добавлены в базу отчетов {REPORTS_DB_FILE}", success=True)
+
+def move_report_paths(engine, args):
+    """Путь отчета о перемещении и список отчетов, которые движок пишет по ходу перемещения
+    (машиночитаемый отчет и база отчетов; TXT-отчет пишется после перемещения)"""
+    report_path = args.report or f"archive_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    streamed = [] if report_path.endswith('.txt') else [report_path]
+    if engine.config.get("report_db", False):
+        streamed.append(REPORTS_DB_FILE)
+    return report_path, streamed
+
+def write_move_report(engine, moved, report_path, print_log):
+    """Итог перемещения, отчет и код возврата"""
+    print_log(f"Перемещение завершено: {moved.success} успешно, {moved.errors} ошибок",
+              success=(moved.errors == 0), error=(moved.errors > 0))
+    
+    if report_path.endswith('.txt'):
+        engine.save_move_report_txt(report_path, moved.results, moved.archive_path, moved.success, moved.errors, moved.duration)
+    print_log(f"Отчет сохранен: {report_path}", success=True)
+    if engine.config.get("report_db", False):
+        print_log(f"Результаты перемещения добавлены в базу отчетов {REPORTS_DB_FILE}", success=True)
+    
+    if engine.cancel_flag:
+        return 130
+    return 1 if moved.errors else 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    config = apply_overrides(load_config(args.config), args)
+    
+    if args.extract:
+        archive = config.get("archive_folder", "")
+        if not archive or not os.path.isdir(archive):
+            parser.error(f"папка архива не найдена: '{archive}'")
+        engine = ArchiveEngine(config, log_callback=make_printer(args.quiet))
+        try:
+            engine.extract_from_containers(os.path.abspath(archive), args.extract, args.extract_to)
+        except (OSError, KeyError) as e:
+            print(f"Ошибка извлечения: {e}", file=sys.stderr)
+            return 1
+        return 0
+    
+    if args.resume:
+        if not os.path.exists(JOURNAL_FILE):
+            parser.error(f"журнал прерванного перемещения не найден: {JOURNAL_FILE}")
+        if not args.yes:
+            parser.error("продолжение перемещения удаляет файлы из исходной папки; подтвердите флагом --yes")
+    else:
+        source = config.get("source_folder", "")
+        if not source or not os.path.isdir(source):
+            parser.error(f"исходная папка не найдена: '{source}'")
+        source = os.path.abspath(source)
+        archive = config.get("archive_folder", "")
+        if not args.search_only:
+            if not archive or not os.path.isdir(archive):
+                parser.error(f"папка архива не найдена: '{archive}' (или используйте --search-only)")
+            if not args.yes:
+                parser.error("перемещение удаляет файлы из исходной папки; подтвердите флагом --yes или используйте --search-only")
+            if config.get("use_journal", True) and os.path.exists(JOURNAL_FILE) and not args.discard_journal:
+                parser.error(f"найден журнал незавершенного перемещения {JOURNAL_FILE}: продолжите его флагом --resume "
+                             f"или начните новое перемещение с флагом --discard-journal")
+            archive = os.path.abspath(archive)
+        start_dt, end_dt = resolve_period(args, parser)
+    
+    print_log = make_printer(args.quiet)
+    engine = ArchiveEngine(config, log_callback=print_log,
+                           status_callback=None if args.quiet else (lambda text, error=False: print_log(text, error=error)))
+    engine.profile_dir = os.path.join(os.path.dirname(os.path.abspath(args.config)), PROFILE_DIR)
+    
+    # Первый Ctrl+C — штатная отмена (как кнопка 'Отмена'), второй — немедленное прерывание
+    def on_interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print_log("Запрошена отмена операции...", error=True)
+        engine.cancel()
+    signal.signal(signal.SIGINT, on_interrupt)
+    report_path, streamed_reports = move_report_paths(engine, args)
+    
+    if args.resume:
+        print_log(f"Продолжение прерванного перемещения по журналу {JOURNAL_FILE}", success=True)
+        return write_move_report(engine, engine.resume_move(streamed_reports), report_path, print_log)
+    
+    time_type = engine.get_time_type()
+    print_log(f"Поиск файлов по дате '{time_type}' в периоде: {start_dt} — {end_dt}, папка: {source}", success=True)
+    if config.get("scan_and_move", False) and not args.search_only:
+        print_log(f"Найденные файлы перемещаются в архив по ходу поиска: {archive}", success=True)
+        combined = engine.scan_and_move(source, start_dt, end_dt, time_type, archive, streamed_reports)
+        if combined.search is not None:
+            write_search_report(engine, combined.search, args, print_log)
+        code = write_move_report(engine, combined.move, report_path, print_log)
+        return code or (1 if combined.scan_error is not None else 0)
+    
+    outcome = engine.search_files(source, start_dt, end_dt, time_type)
+    if outcome is None:
+        return 130
+    write_search_report(engine, outcome, args, print_log)
+    
+    if args.search_only or not outcome.results:
+        return 0
+    
+    print_log(f"Начало перемещения {len(outcome.results)} файлов в архив: {archive}", success=True)
+    moved = engine.move_files(outcome.results, archive, (time_type, start_dt, end_dt), streamed_reports)
+    return write_move_report(engine, moved, report_path, print_log)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3162 @@
+import os
+import datetime
+import threading
+import sys
+import shutil
+import json
+import fnmatch
+import re
+import ctypes
+import itertools
+import array
+import collections
+import queue
+import errno
+import sqlite3
+import struct
+import tempfile
+import time
+import hashlib
+import zipfile
+import glob
+import csv
+import cProfile
+import pstats
+import functools
+import multiprocessing
+import concurrent.futures
+import asyncio
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CONFIG_FILE = "archive_helper_config.json"
+INDEX_FILE = "archive_helper_index.sqlite"
+LOG_FILE = "archive_helper.log"
+JOURNAL_FILE = "archive_helper_journal.jsonl"
+REPORTS_DB_FILE = "archive_helper_reports.sqlite"
+PROFILE_DIR = "archive_helper_profiles"
+
+# Атрибут stat для каждого типа даты (все временные метки берутся из одного stat-результата)
+TIME_ATTRS = {
+    "modified": "st_mtime",
+    "accessed": "st_atime",
+    "created": "st_ctime"
+}
+
+# Значения по умолчанию для archive_helper_config.json (общие для графического и консольного режима)
+DEFAULT_CONFIG = {
+    "source_folder": "",
+    "archive_folder": "",
+    "time_type": "modified",
+    "skip_hidden": True,
+    "exclude_files": "*.tmp, *.log, Thumbs.db, desktop.ini, ~*.*",
+    "exclude_dirs": "node_modules, .git, .svn, __pycache__, bin, obj, build, dist",
+    "exclude_paths": "",
+    "exclude_small": False,
+    "min_size_kb": 10,
+    "save_txt_report": True,
+    "scan_threads": 1,
+    "scan_processes": 1,
+    "async_io": False,
+    "async_per_mount": 64,
+    "copy_workers": 4,
+    "use_scan_index": False,
+    "stream_results": False,
+    "verify_mode": "size",
+    "hash_algorithm": "blake2b",
+    "use_journal": True,
+    "archive_format": "tree",
+    "zip_volume_mb": 4096,
+    "dedup": False,
+    "report_db": False,
+    "profile_mode": "off",
+    "scan_and_move": False
+}
+
+def load_config(path=CONFIG_FILE):
+    """Загрузка сохраненных настроек из JSON (значения по умолчанию, если файла нет)"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return dict(DEFAULT_CONFIG)
+    except Exception:
+        return {}
+
+def mount_key(path):
+    """Том пути (точка монтирования, диск или сетевой ресурс) — ключ ограничения одновременных операций"""
+    path = os.path.abspath(path)
+    if os.name == 'nt':
+        return os.path.splitdrive(path)[0].lower() or path
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+class LogSink:
+    """Журнал для рабочих потоков: дешевая запись, пакетная выдача в интерфейс, полный журнал в файл.
+    
+    write() только форматирует строку и кладет ее в кольцевой буфер и в очередь записи в файл.
+    Интерфейс забирает накопленные строки drain() по таймеру; если он не успевает,
+    самые старые строки вытесняются из буфера и учитываются как пропущенные.
+    Файл журнала пишет отдельный поток, в файл попадают все строки.
+    """
+    def __init__(self, capacity=10000, log_path=None):
+        self._buffer = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._file_queue = None
+        self._writer = None
+        if log_path:
+            try:
+                log_file = open(log_path, 'a', encoding='utf-8')
+            except OSError:
+                log_file = None
+            if log_file is not None:
+                self._file_queue = queue.SimpleQueue()
+                self._writer = threading.Thread(target=self._write_file, args=(log_file,), daemon=True)
+                self._writer.start()
+                self._file_queue.put(f"===== Сеанс {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')} =====\n")
+    
+    def write(self, message, error=False, success=False):
+        """Добавление строки журнала (из любого потока)"""
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        prefix = "[ОШИБКА] " if error else ("[УСПЕХ] " if success else "")
+        line = f"[{timestamp}] {prefix}{message}\n"
+        tag = "error" if error else ("success" if success else "normal")
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+            self._buffer.append((line, tag))
+        if self._file_queue is not None:
+            self._file_queue.put(line)
+    
+    def drain(self):
+        """Накопленные строки (строка, тег) и число строк, вытесненных из буфера с прошлого вызова"""
+        with self._lock:
+            items = list(self._buffer)
+            self._buffer.clear()
+            dropped = self._dropped
+            self._dropped = 0
+        return items, dropped
+    
+    def _write_file(self, log_file):
+        with log_file:
+            while True:
+                line = self._file_queue.get()
+                lines = [line]
+                while line is not None:
+                    try:
+                        line = self._file_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    lines.append(line)
+                log_file.write("".join(l for l in lines if l is not None))
+                log_file.flush()
+                if lines[-1] is None:
+                    return
+    
+    def close(self):
+        """Дописать журнал в файл и остановить поток записи"""
+        if self._writer is not None:
+            self._file_queue.put(None)
+            self._writer.join(5)
+            self._writer = None
+
+class MaskMatcher:
+    """Набор масок fnmatch, скомпилированный в одну проверку имени.
+    
+    Маски без спецсимволов попадают в множество имен, маски вида '*.ext' — в множество
+    расширений, остальные объединяются в одно регулярное выражение. Регистр учитывается
+    так же, как в fnmatch.fnmatch (os.path.normcase).
+    """
+    def __init__(self, patterns):
+        self._names = set()
+        self._extensions = set()
+        residual = []
+        for pattern in patterns:
+            norm = os.path.normcase(pattern)
+            if not any(c in norm for c in '*?['):
+                self._names.add(norm)
+            elif norm.startswith('*.') and not any(c in norm[2:] for c in '*?[.'):
+                self._extensions.add(norm[1:])
+            else:
+                residual.append(fnmatch.translate(norm))
+        self._regex = re.compile('|'.join(residual)).match if residual else None
+    
+    def match(self, name):
+        name = os.path.normcase(name)
+        if name in self._names:
+            return True
+        if self._extensions:
+            dot = name.rfind('.')
+            if dot >= 0 and name[dot:] in self._extensions:
+                return True
+        return self._regex is not None and self._regex(name) is not None
+
+class PathTrie:
+    """Дерево компонентов путей: проверка 'папка внутри исключенного пути' за O(глубины).
+    
+    Сравнение без учета регистра; префикс длинных путей \\\\?\\ и вид разделителей не важны.
+    """
+    _TERMINAL = ""
+    _SPLIT = re.compile(r'[\\/]+')
+    
+    def __init__(self):
+        self._root = {}
+        self.count = 0
+    
+    def _components(self, path):
+        if path.startswith('\\\\?\\UNC\\'):
+            path = '\\\\' + path[8:]
+        elif path.startswith('\\\\?\\'):
+            path = path[4:]
+        return [c for c in self._SPLIT.split(path.lower()) if c]
+    
+    def add(self, path):
+        node = self._root
+        for component in self._components(path):
+            node = node.setdefault(component, {})
+        node[self._TERMINAL] = True
+        self.count += 1
+    
+    def contains(self, path):
+        """True, если path совпадает с одним из путей или лежит внутри него"""
+        node = self._root
+        for component in self._components(path):
+            if self._TERMINAL in node:
+                return True
+            node = node.get(component)
+            if node is None:
+                return False
+        return self._TERMINAL in node
+
+class ScanRules:
+    """Подготовленные правила поиска (общие для всех потоков обхода)"""
+    def __init__(self, skip_hidden, file_matcher, dir_matcher, exclude_paths,
+                 min_size_bytes, time_attr, start_dt, end_dt, index=None, metrics=None):
+        self.skip_hidden = skip_hidden
+        self.file_matcher = file_matcher
+        self.dir_matcher = dir_matcher
+        self.exclude_paths = exclude_paths
+        self.min_size_bytes = min_size_bytes
+        self.time_attr = time_attr
+        self.start_dt = start_dt
+        self.end_dt = end_dt
+        # Границы периода в секундах эпохи: сравнение без создания datetime для каждого файла
+        self.start_ts = start_dt.timestamp()
+        self.end_ts = end_dt.timestamp()
+        self.index = index
+        self.metrics = metrics
+        self.error_log_counter = itertools.count()
+
+class ScanStats:
+    """Счетчики пропусков одного потока обхода; найденные файлы пишутся в общий приемник results"""
+    def __init__(self, results):
+        self.results = results
+        self.errors = 0
+        self.skipped_hidden = 0
+        self.skipped_pattern = 0
+        self.skipped_size = 0
+        self.skipped_by_path = 0
+        self.processed = 0
+        self.index_hits = 0
+        self.index_misses = 0
+        self.index_rechecked = 0
+    
+    def merge(self, other):
+        self.errors += other.errors
+        self.skipped_hidden += other.skipped_hidden
+        self.skipped_pattern += other.skipped_pattern
+        self.skipped_size += other.skipped_size
+        self.skipped_by_path += other.skipped_by_path
+        self.processed += other.processed
+        self.index_hits += other.index_hits
+        self.index_misses += other.index_misses
+        self.index_rechecked += other.index_rechecked
+
+class RunMetrics:
+    """Пропускная способность, ошибки и время по фазам одной операции (поиск или перемещение).
+    
+    Рабочие потоки добавляют счетчики пакетами (на папку при поиске, на файл при перемещении).
+    Время фаз суммируется по всем потокам, поэтому при нескольких потоках сумма может
+    превышать общее время операции. total — известное заранее число файлов (для ETA).
+    """
+    def __init__(self, operation, total=None):
+        self.operation = operation
+        self.total = total
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.errors = 0
+        self.phases = {}
+        self.profile = None  # разбивка по этапам, если операция профилировалась
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._finished = None
+        self._next_progress = self._started
+    
+    def add(self, files=0, dirs=0, byte_count=0, errors=0, **phase_seconds):
+        with self._lock:
+            self.files += files
+            self.dirs += dirs
+            self.bytes += byte_count
+            self.errors += errors
+            for phase, seconds in phase_seconds.items():
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+    
+    def finish(self):
+        self._finished = time.perf_counter()
+    
+    def progress_due(self, interval):
+        """Пора ли обновить прогресс (не чаще раза в interval секунд; вызывается из одного потока)"""
+        now = time.perf_counter()
+        if now < self._next_progress:
+            return False
+        self._next_progress = now + interval
+        return True
+    
+    def elapsed(self):
+        return (self._finished or time.perf_counter()) - self._started
+    
+    def eta(self):
+        """Оценка оставшегося времени в секундах (None, если общее число файлов неизвестно)"""
+        if not self.total or not self.files:
+            return None
+        return max(0.0, (self.total - self.files) * self.elapsed() / self.files)
+    
+    def snapshot(self):
+        """Метрики для JSON-отчетов (раздел "metrics" отчета о поиске, итоговый блок отчета о перемещении)"""
+        elapsed = self.elapsed()
+        rate = (lambda value: round(value / elapsed, 2)) if elapsed > 0 else (lambda value: None)
+        with self._lock:
+            data = {
+                "operation": self.operation,
+                "elapsed_seconds": round(elapsed, 3),
+                "files": self.files,
+                "dirs": self.dirs,
+                "bytes": self.bytes,
+                "errors": self.errors,
+                "files_per_second": rate(self.files),
+                "dirs_per_second": rate(self.dirs),
+                "bytes_per_second": rate(self.bytes),
+                "error_rate": round(self.errors / self.files, 6) if self.files else 0.0,
+                "phase_seconds": {phase: round(seconds, 3) for phase, seconds in self.phases.items()}
+            }
+        if self.total is not None:
+            data["total"] = self.total
+        if self.profile is not None:
+            data["profile"] = self.profile
+        return data
+    
+    def status_text(self, with_eta=True):
+        """Строка для статуса: скорость, ошибки и ETA"""
+        elapsed = max(self.elapsed(), 1e-6)
+        mb_per_sec = self.bytes / elapsed / (1024 * 1024)
+        if self.operation == "move":
+            done = f"{self.files}/{self.total}" if self.total is not None else str(self.files)
+            text = (f"Перемещение: {done} файлов · {self.files / elapsed:.0f} файл/с · "
+                    f"{mb_per_sec:.1f} МБ/с · ошибок {self.errors}")
+            eta = self.eta() if with_eta else None
+            if eta is not None:
+                text += f" · осталось ~{datetime.timedelta(seconds=int(eta))}"
+            return text
+        return (f"Поиск: файлов {self.files}, папок {self.dirs} · {self.files / elapsed:.0f} файл/с · "
+                f"{self.dirs / elapsed:.0f} папок/с · ошибок {self.errors}")
+    
+    def summary_text(self):
+        """Итоговая строка для журнала"""
+        phases = ", ".join(f"{phase} {seconds:.1f} с" for phase, seconds in self.phases.items())
+        return f"{self.status_text(with_eta=False)} · за {self.elapsed():.1f} с" + (f" (фазы: {phases})" if phases else "")
+
+class StageProfiler:
+    """Число вызовов и суммарное время по этапам для обернутых функций.
+    
+    У каждой обертки в каждом потоке свой счетчик (без блокировок на горячем пути),
+    при выдаче итогов они суммируются. Время этапов включает вложенные этапы.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = []
+    
+    def _register(self, stage):
+        record = [0, 0.0]
+        with self._lock:
+            self._records.append((stage, record))
+        return record
+    
+    def wrap(self, stage, func):
+        local = threading.local()
+        register = self._register
+        perf_counter = time.perf_counter
+        
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                try:
+                    record = local.record
+                except AttributeError:
+                    record = local.record = register(stage)
+                record[0] += 1
+                record[1] += perf_counter() - started
+        return timed
+    
+    def breakdown(self):
+        """{этап: {"calls", "seconds", "avg_us"}}, по убыванию времени"""
+        merged = {}
+        with self._lock:
+            for stage, (calls, seconds) in self._records:
+                total = merged.setdefault(stage, [0, 0.0])
+                total[0] += calls
+                total[1] += seconds
+        return {stage: {"calls": calls, "seconds": round(seconds, 4), "avg_us": round(seconds / calls * 1e6, 2)}
+                for stage, (calls, seconds) in sorted(merged.items(), key=lambda item: -item[1][1]) if calls}
+
+class EngineProfiler:
+    """Профилирование одной операции движка (profile_mode): 'stages' — счетчики и таймеры этапов,
+    'cprofile' — дополнительно cProfile во всех потоках операции.
+    
+    Этапы подключаются обертками атрибутов экземпляров (методы движка, обратные вызовы интерфейса,
+    маски, копировщик) и снимаются после операции. Итоги пишутся в engine.profile_dir;
+    имена файлов уникальны и для операций, завершившихся в одну секунду (номер процесса и счетчик).
+    """
+    # Методы движка -> этап
+    ENGINE_STAGES = {
+        "search": [("_process_directory", "directory"), ("_list_directory", "listing"),
+                   ("_is_hidden_entry", "hidden_check"), ("_is_hidden_windows", "hidden_attrs"),
+                   ("report_progress", "progress")],
+        "move": [("_move_one", "move_file"), ("_find_duplicate", "dedup_lookup"), ("_store_duplicate", "dedup_link"),
+                 ("_record_move_result", "collect_result"), ("report_progress", "progress")],
+        "scan_move": [("_process_directory", "directory"), ("_list_directory", "listing"),
+                      ("_is_hidden_entry", "hidden_check"), ("_is_hidden_windows", "hidden_attrs"),
+                      ("_move_one", "move_file"), ("_find_duplicate", "dedup_lookup"), ("_store_duplicate", "dedup_link"),
+                      ("_record_move_result", "collect_result"), ("report_progress", "progress")]
+    }
+    CALLBACKS = [("log_callback", "callback_log"), ("status_callback", "callback_status"),
+                 ("progress_callback", "callback_progress")]
+    _file_counter = itertools.count(1)  # суффикс имен файлов результатов
+    
+    def __init__(self, engine, kind, mode):
+        self.engine = engine
+        self.kind = kind
+        self.mode = mode
+        self.stages = StageProfiler()
+        self._saved_callbacks = {}
+        self._wrapped = []
+        self._profiles = []
+        self._profiles_lock = threading.Lock()
+        self._main_profile = None
+    
+    def wrap_object(self, obj, methods, prefix):
+        """Подключение этапов к методам объекта (маски, индекс, копировщик, журнал)"""
+        for name in methods:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self.stages.wrap(f"{prefix}.{name}", method))
+    
+    def thread_target(self, target):
+        """Функция рабочего потока; в режиме cprofile поток профилируется отдельно"""
+        if self.mode != "cprofile":
+            return target
+        
+        @functools.wraps(target)
+        def run(*args):
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return target(*args)
+            finally:
+                profile.disable()
+                with self._profiles_lock:
+                    self._profiles.append(profile)
+        return run
+    
+    def start(self):
+        engine = self.engine
+        for name, stage in self.ENGINE_STAGES[self.kind]:
+            setattr(engine, name, self.stages.wrap(stage, getattr(engine, name)))
+            self._wrapped.append(name)
+        for name, stage in self.CALLBACKS:
+            callback = getattr(engine, name)
+            if callback is not None:
+                self._saved_callbacks[name] = callback
+                setattr(engine, name, self.stages.wrap(stage, callback))
+        if self.mode == "cprofile":
+            self._main_profile = cProfile.Profile()
+            try:
+                self._main_profile.enable()
+            except ValueError:
+                # Уже работает другой профилировщик (например, внешний) — только этапы
+                self._main_profile = None
+    
+    def stop(self, metrics):
+        """Снятие оберток, запись артефактов, разбивка по этапам в metrics.profile"""
+        if self._main_profile is not None:
+            self._main_profile.disable()
+        engine = self.engine
+        for name in self._wrapped:
+            engine.__dict__.pop(name, None)
+        for name, callback in self._saved_callbacks.items():
+            setattr(engine, name, callback)
+        
+        profile = {"mode": self.mode, "stages": self.stages.breakdown()}
+        if metrics is not None:
+            profile["phase_seconds"] = {phase: round(seconds, 3) for phase, seconds in metrics.phases.items()}
+        try:
+            os.makedirs(engine.profile_dir, exist_ok=True)
+            base = os.path.join(engine.profile_dir, f"{self.kind}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_"
+                                                    f"{os.getpid()}_{next(self._file_counter)}")
+            profiles = ([self._main_profile] if self._main_profile is not None else []) + self._profiles
+            if profiles:
+                stats = pstats.Stats(profiles[0])
+                for extra in profiles[1:]:
+                    stats.add(extra)
+                stats.dump_stats(base + ".prof")
+                with open(base + "_top.txt", 'w', encoding='utf-8') as f:
+                    stats.stream = f
+                    stats.sort_stats("cumulative").print_stats(60)
+                profile["cprofile"] = os.path.abspath(base + ".prof")
+            profile["stages_file"] = os.path.abspath(base + "_stages.json")
+            with open(base + "_stages.json", 'w', encoding='utf-8') as f:
+                json.dump(profile, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            engine.log(f"Не удалось сохранить результаты профилирования: {str(e)}", error=True)
+        if metrics is not None:
+            metrics.profile = profile
+        
+        top = list(profile["stages"].items())[:8]
+        engine.log("Профилирование (этап: вызовов, время): " +
+                   "; ".join(f"{stage}: {data['calls']}, {data['seconds']:.3f} с" for stage, data in top))
+        if "stages_file" in profile:
+            engine.log(f"Результаты профилирования сохранены: {profile['stages_file']}")
+        return profile
+
+def profiled(kind):
+    """Профилирование операции движка по настройке profile_mode ('off', 'stages', 'cprofile')"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            mode = self.config.get("profile_mode", "off")
+            if mode not in ("stages", "cprofile") or self.profiler is not None:
+                return method(self, *args, **kwargs)
+            self.profiler = EngineProfiler(self, kind, mode)
+            self.profiler.start()
+            outcome = None
+            try:
+                outcome = method(self, *args, **kwargs)
+                return outcome
+            finally:
+                profiler, self.profiler = self.profiler, None
+                profiler.stop(outcome.metrics if outcome is not None else None)
+        return wrapper
+    return decorator
+
+class FoundFiles:
+    """Найденные файлы в памяти в компактном виде.
+    
+    Вместо кортежа (строка пути, datetime) на файл хранятся таблица папок (префиксов путей),
+    массив номеров папок, имена файлов одной строкой байтов с массивом смещений, массив
+    временных меток float64 и stat-данные для отчетов (размер, mtime, atime, ctime) —
+    около 52 байт на файл плюс длина имени.
+    Доступ — по индексу или итерацией: (путь, datetime), datetime создается только при чтении.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prefixes = []
+        self._prefix_ids = {}
+        self._dir_ids = array.array('I')
+        self._names = bytearray()
+        self._name_ends = array.array('Q')
+        self._timestamps = array.array('d')
+        self._sizes = array.array('Q')
+        self._times = array.array('d')  # mtime, atime, ctime подряд
+    
+    def add_batch(self, matches):
+        """Добавление совпадений одной папки: (префикс пути, имя файла, временная метка, размер, mtime, atime, ctime)"""
+        if not matches:
+            return
+        with self._lock:
+            for prefix, name, timestamp, size, mtime, atime, ctime in matches:
+                dir_id = self._prefix_ids.get(prefix)
+                if dir_id is None:
+                    dir_id = self._prefix_ids[prefix] = len(self._prefixes)
+                    self._prefixes.append(prefix)
+                self._dir_ids.append(dir_id)
+                self._names += name.encode('utf-8', 'surrogatepass')
+                self._name_ends.append(len(self._names))
+                self._timestamps.append(timestamp)
+                self._sizes.append(size)
+                self._times.extend((mtime, atime, ctime))
+    
+    def __len__(self):
+        return len(self._timestamps)
+    
+    def path(self, i):
+        start = self._name_ends[i - 1] if i else 0
+        name = self._names[start:self._name_ends[i]].decode('utf-8', 'surrogatepass')
+        return self._prefixes[self._dir_ids[i]] + name
+    
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("индекс вне списка найденных файлов")
+        return self.path(i), datetime.datetime.fromtimestamp(self._timestamps[i])
+    
+    def iter_raw(self):
+        """Пары (путь, временная метка в секундах) в порядке добавления"""
+        for i in range(len(self)):
+            yield self.path(i), self._timestamps[i]
+    
+    def iter_details(self):
+        """(путь, временная метка, размер, mtime, atime, ctime) в порядке добавления — для отчетов"""
+        times = self._times
+        for i in range(len(self)):
+            yield (self.path(i), self._timestamps[i], self._sizes[i]) + tuple(times[i * 3:i * 3 + 3])
+    
+    def __iter__(self):
+        fromtimestamp = datetime.datetime.fromtimestamp
+        for path, timestamp in self.iter_raw():
+            yield path, fromtimestamp(timestamp)
+    
+    def close(self):
+        self.__init__()
+
+class ResultSpool:
+    """Найденные файлы во временном файле на диске — память не растет с числом совпадений.
+    
+    Запись двоичная: запись папки (префикс пути) пишется один раз, дальше идут записи файлов
+    (временная метка, размер, mtime, atime, ctime и имя). Итерация читает файл блоками и выдает (путь, datetime),
+    как FoundFiles; несколько проходов (предпросмотр, отчет, перемещение) допустимы.
+    """
+    _DIR_RECORD = struct.Struct("<BI")     # 0, длина префикса
+    _FILE_RECORD = struct.Struct("<BdQdddI")  # 1, временная метка, размер, mtime, atime, ctime, длина имени
+    _READ_CHUNK = 1024 * 1024
+    
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile(prefix="archive_helper_results_", suffix=".bin", dir=directory)
+        self._lock = threading.Lock()
+        self._count = 0
+        self._last_prefix = None
+    
+    @staticmethod
+    def _encode(text):
+        return text.encode('utf-8', 'surrogatepass')
+    
+    def add_batch(self, matches):
+        """Добавление совпадений одной папки: (префикс пути, имя файла, временная метка, размер, mtime, atime, ctime)"""
+        if not matches:
+            return
+        parts = []
+        with self._lock:
+            last_prefix = self._last_prefix
+            for prefix, name, timestamp, size, mtime, atime, ctime in matches:
+                if prefix != last_prefix:
+                    data = self._encode(prefix)
+                    parts.append(self._DIR_RECORD.pack(0, len(data)))
+                    parts.append(data)
+                    last_prefix = prefix
+                data = self._encode(name)
+                parts.append(self._FILE_RECORD.pack(1, timestamp, size, mtime, atime, ctime, len(data)))
+                parts.append(data)
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(b"".join(parts))
+            self._last_prefix = last_prefix
+            self._count += len(matches)
+    
+    def __len__(self):
+        return self._count
+    
+    def _read_at(self, offset):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(self._READ_CHUNK)
+    
+    def iter_raw(self):
+        """Пары (путь, временная метка в секундах) в порядке добавления"""
+        for details in self.iter_details():
+            yield details[:2]
+    
+    def iter_details(self):
+        """(путь, временная метка, размер, mtime, atime, ctime) в порядке добавления — для отчетов"""
+        dir_size = self._DIR_RECORD.size
+        file_size = self._FILE_RECORD.size
+        prefix = ""
+        offset = 0
+        buf = b""
+        while True:
+            chunk = self._read_at(offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            buf += chunk
+            pos = 0
+            end = len(buf)
+            while pos < end:
+                if buf[pos] == 0:
+                    if pos + dir_size > end:
+                        break
+                    length = self._DIR_RECORD.unpack_from(buf, pos)[1]
+                    if pos + dir_size + length > end:
+                        break
+                    prefix = buf[pos + dir_size:pos + dir_size + length].decode('utf-8', 'surrogatepass')
+                    pos += dir_size + length
+                else:
+                    if pos + file_size > end:
+                        break
+                    _, timestamp, size, mtime, atime, ctime, length = self._FILE_RECORD.unpack_from(buf, pos)
+                    if pos + file_size + length > end:
+                        break
+                    name = buf[pos + file_size:pos + file_size + length].decode('utf-8', 'surrogatepass')
+                    pos += file_size + length
+                    yield prefix + name, timestamp, size, mtime, atime, ctime
+            buf = buf[pos:]
+    
+    def __iter__(self):
+        fromtimestamp = datetime.datetime.fromtimestamp
+        for path, timestamp in self.iter_raw():
+            yield path, fromtimestamp(timestamp)
+    
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._count = 0
+
+class ScanStopped(Exception):
+    """Перемещение при поиске с перемещением остановилось — обход дальше не нужен"""
+
+class MatchPipe:
+    """Ограниченный канал найденных файлов от поиска к перемещению (поиск и перемещение одновременно).
+    
+    Обход пишет совпадения в хранилище найденных файлов (для отчета о поиске) и пачками
+    по папкам в канал; перемещение забирает их по мере появления. Если в канале больше
+    capacity файлов, обход ждет, пока перемещение их заберет (обратное давление).
+    """
+    def __init__(self, results, capacity, cancelled):
+        self.results = results
+        self.capacity = capacity
+        self.found = 0
+        self.status = {"search": "", "move": ""}  # последние строки статуса обеих операций
+        self._cancelled = cancelled
+        self._batches = collections.deque()
+        self._queued = 0
+        self._finished = False
+        self._aborted = False
+        self._cond = threading.Condition()
+    
+    def add_batch(self, matches):
+        """Совпадения одной папки (из потоков обхода); ждет, если канал заполнен.
+        
+        После abort() вызывает ScanStopped: обход прекращается, а не дочитывает дерево впустую.
+        """
+        if self._aborted:
+            raise ScanStopped()
+        self.results.add_batch(matches)
+        if not matches:
+            return
+        with self._cond:
+            while self._queued >= self.capacity and not self._aborted and not self._cancelled():
+                self._cond.wait(0.1)
+            if self._aborted:
+                raise ScanStopped()
+            self._batches.append(matches)
+            self._queued += len(matches)
+            self.found += len(matches)
+            self._cond.notify_all()
+    
+    def __len__(self):
+        return len(self.results)
+    
+    def finish(self):
+        """Обход завершен: перемещение заберет остаток и закончит"""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+    
+    def abort(self):
+        """Перемещение остановлено: обход больше не ждет и останавливается на следующей папке"""
+        with self._cond:
+            self._aborted = True
+            self._batches.clear()
+            self._queued = 0
+            self._cond.notify_all()
+    
+    def __iter__(self):
+        """Пути найденных файлов в порядке поступления (до завершения обхода)"""
+        while True:
+            with self._cond:
+                while not self._batches and not self._finished and not self._aborted:
+                    self._cond.wait(0.1)
+                if not self._batches:
+                    return
+                batch = self._batches.popleft()
+                self._queued -= len(batch)
+                self._cond.notify_all()
+            for match in batch:
+                yield match[0] + match[1]
+    
+    def close(self):
+        """Поиск закончился без итога (отмена или ошибка): закрывается только хранилище найденных файлов.
+        
+        Уже переданные в канал файлы перемещение заберет (после отмены — не начнет).
+        """
+        self.results.close()
+
+class IndexedStat:
+    """stat-данные файла из индекса сканирования (размер, все временные метки, атрибуты Windows)"""
+    __slots__ = ("st_size", "st_mtime", "st_atime", "st_ctime", "_attrs")
+    
+    def __init__(self, size, mtime, atime, ctime, attrs):
+        self.st_size = size
+        self.st_mtime = mtime
+        self.st_atime = atime
+        self.st_ctime = ctime
+        self._attrs = attrs
+    
+    @property
+    def st_file_attributes(self):
+        if self._attrs is None:
+            raise AttributeError("st_file_attributes")
+        return self._attrs
+
+class IndexedEntry:
+    """Замена os.DirEntry для папки, содержимое которой взято из индекса"""
+    __slots__ = ("name", "path", "_is_dir", "_is_symlink", "_stat")
+    
+    def __init__(self, root_dir, row):
+        name, is_dir, is_symlink, size, mtime, atime, ctime, attrs = row
+        self.name = name
+        self.path = os.path.join(root_dir, name)
+        self._is_dir = bool(is_dir)
+        self._is_symlink = bool(is_symlink)
+        if size is not None or attrs is not None:
+            self._stat = IndexedStat(size, mtime, atime, ctime, attrs)
+        else:
+            self._stat = None
+    
+    def is_dir(self):
+        return self._is_dir
+    
+    def is_symlink(self):
+        return self._is_symlink
+    
+    def stat(self, follow_symlinks=True):
+        # Файлы, которые при прошлом сканировании отсеялись по маске, хранятся в индексе без stat
+        if self._stat is None or (follow_symlinks and self._stat.st_size is None):
+            self._stat = os.stat(self.path)
+        return self._stat
+
+class ScanIndex:
+    """Постоянный индекс сканирования в SQLite.
+    
+    Для каждой папки хранится mtime (в наносекундах), время листинга и полный листинг с размерами
+    и временными метками файлов. Если mtime папки не изменился, листинг берется из индекса без
+    обращения к диску.
+    
+    Правка файла на месте не меняет mtime папки, поэтому stat из индекса может устареть. Поиск
+    перечитывает stat файла, если дата из индекса попадает в период или если конец периода не
+    раньше времени листинга (правка после листинга могла привести файл в период). Не замечается
+    только перенос даты файла назад, в период, без изменения папки (например, восстановление
+    файла поверх существующего с сохранением дат) — для таких папок индекс нужно отключить.
+    """
+    COMMIT_EVERY = 500
+    # Запас на грубую точность дат файловой системы (FAT — 2 с) и расхождение часов сетевых дисков
+    CLOCK_MARGIN = 2.0
+    
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            "id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, mtime_ns INTEGER NOT NULL, scanned REAL)")
+        # Индексы прежних версий не хранили время листинга; такие папки перепроверяются целиком
+        if "scanned" not in {r[1] for r in self._conn.execute("PRAGMA table_info(dirs)")}:
+            self._conn.execute("ALTER TABLE dirs ADD COLUMN scanned REAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "dir_id INTEGER NOT NULL, name TEXT NOT NULL, is_dir INTEGER NOT NULL, is_symlink INTEGER NOT NULL, "
+            "size INTEGER, mtime REAL, atime REAL, ctime REAL, attrs INTEGER, "
+            "PRIMARY KEY (dir_id, name)) WITHOUT ROWID")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending = 0
+    
+    def lookup(self, dir_path, mtime_ns):
+        """(время листинга, строки листинга) из индекса или None, если папка новая или изменилась"""
+        with self._lock:
+            row = self._conn.execute("SELECT id, mtime_ns, scanned FROM dirs WHERE path = ?", (dir_path,)).fetchone()
+            if row is None or row[1] != mtime_ns:
+                return None
+            return row[2], self._conn.execute(
+                "SELECT name, is_dir, is_symlink, size, mtime, atime, ctime, attrs FROM entries WHERE dir_id = ?",
+                (row[0],)).fetchall()
+    
+    def store(self, dir_path, mtime_ns, rows, scanned):
+        """Сохранение свежего листинга папки (scanned — время начала листинга); исчезнувшие подпапки удаляются из индекса"""
+        with self._lock:
+            cur = self._conn.cursor()
+            row = cur.execute("SELECT id FROM dirs WHERE path = ?", (dir_path,)).fetchone()
+            if row is None:
+                cur.execute("INSERT INTO dirs (path, mtime_ns, scanned) VALUES (?, ?, ?)", (dir_path, mtime_ns, scanned))
+                dir_id = cur.lastrowid
+            else:
+                dir_id = row[0]
+                new_dirs = {r[0] for r in rows if r[1]}
+                for (name,) in cur.execute("SELECT name FROM entries WHERE dir_id = ? AND is_dir = 1", (dir_id,)).fetchall():
+                    if name not in new_dirs:
+                        self._forget_tree(cur, os.path.join(dir_path, name))
+                cur.execute("DELETE FROM entries WHERE dir_id = ?", (dir_id,))
+                cur.execute("UPDATE dirs SET mtime_ns = ?, scanned = ? WHERE id = ?", (mtime_ns, scanned, dir_id))
+            cur.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [(dir_id,) + r for r in rows])
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+    
+    def _forget_tree(self, cur, tree_path):
+        prefix = tree_path + os.sep
+        upper = tree_path + chr(ord(os.sep) + 1)
+        ids = [r[0] for r in cur.execute(
+            "SELECT id FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (tree_path, prefix, upper)).fetchall()]
+        for dir_id in ids:
+            cur.execute("DELETE FROM entries WHERE dir_id = ?", (dir_id,))
+            cur.execute("DELETE FROM dirs WHERE id = ?", (dir_id,))
+    
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+# Результат перемещения одного файла; method — способ, которым были перенесены данные,
+# digest — контрольная сумма содержимого (только в режиме проверки по хэшу),
+# size и mtime/atime/ctime — stat исходного файла перед перемещением (для отчетов)
+MoveResult = collections.namedtuple("MoveResult", ["source", "dest", "status", "message", "method", "digest", "size",
+                                                   "mtime", "atime", "ctime"],
+                                    defaults=(None, None, None, None, None))
+
+def stat_fields(st):
+    """Размер и временные метки stat в порядке полей MoveResult (size, mtime, atime, ctime)"""
+    return st.st_size, st.st_mtime, st.st_atime, st.st_ctime
+
+# Алгоритмы контрольных сумм для режима проверки verify_mode="hash"
+HASH_ALGORITHMS = ("blake2b", "sha256")
+
+class CopyUnsupported(Exception):
+    """Способ копирования недоступен для этой пары файловых систем (ни один байт не записан)"""
+
+class FileCopier:
+    """Копирование содержимого файла самым быстрым доступным способом.
+    
+    Порядок попыток: reflink/clone -> copy_file_range -> sendfile -> CopyFileW (Windows)
+    -> копирование через большой буфер. Способ, отказавший для пары устройств,
+    больше для нее не пробуется.
+    """
+    FICLONE = 0x40049409
+    BUFFER_SIZE = 8 * 1024 * 1024
+    FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY,
+                       errno.EBADF, errno.ENOTSUP, errno.EPERM}
+    
+    def __init__(self):
+        self._unsupported = set()
+        self._lock = threading.Lock()
+    
+    def copy(self, src, dst, src_stat):
+        """Копирует данные src -> dst и возвращает название использованного способа"""
+        if os.name == 'nt' and self._supported("copyfile", None):
+            try:
+                self._copy_windows(src, dst)
+                return "copyfile"
+            except CopyUnsupported:
+                self._mark_unsupported("copyfile", None)
+        
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            src_fd = fsrc.fileno()
+            dst_fd = fdst.fileno()
+            devices = (src_stat.st_dev, os.fstat(dst_fd).st_dev)
+            strategies = [
+                ("reflink", self._copy_reflink),
+                ("copy_file_range", self._copy_file_range),
+                ("sendfile", self._copy_sendfile),
+            ]
+            for method, func in strategies:
+                if not self._supported(method, devices):
+                    continue
+                try:
+                    func(src_fd, dst_fd, src_stat.st_size)
+                    return method
+                except CopyUnsupported:
+                    self._mark_unsupported(method, devices)
+            
+            self._copy_buffered(fsrc, fdst)
+            return "buffered"
+    
+    def copy_hashed(self, src, dst, src_stat, algorithm):
+        """Копирование с подсчетом контрольной суммы за одно чтение источника.
+        
+        Возвращает (способ, hex-дайджест). Клонирование блоков (reflink) данные не переносит,
+        поэтому сумма считается по копии; в остальных случаях — по байтам, проходящим через буфер.
+        Копирование внутри ядра (copy_file_range, sendfile, CopyFileW) здесь не используется:
+        байты при нем не попадают в память процесса.
+        """
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            devices = (src_stat.st_dev, os.fstat(fdst.fileno()).st_dev)
+            if self._supported("reflink", devices):
+                try:
+                    self._copy_reflink(fsrc.fileno(), fdst.fileno(), src_stat.st_size)
+                    fdst.close()
+                    return "reflink", self.hash_file(dst, algorithm)
+                except CopyUnsupported:
+                    self._mark_unsupported("reflink", devices)
+            
+            digest = hashlib.new(algorithm)
+            self._copy_buffered(fsrc, fdst, digest.update)
+            return "buffered+hash", digest.hexdigest()
+    
+    def hash_file(self, path, algorithm):
+        """Контрольная сумма файла (hex)"""
+        digest = hashlib.new(algorithm)
+        buf = bytearray(self.BUFFER_SIZE)
+        view = memoryview(buf)
+        with open(path, 'rb') as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                digest.update(view[:n])
+        return digest.hexdigest()
+    
+    def _supported(self, method, devices):
+        return (method, devices) not in self._unsupported
+    
+    def _mark_unsupported(self, method, devices):
+        with self._lock:
+            self._unsupported.add((method, devices))
+    
+    def _copy_reflink(self, src_fd, dst_fd, size):
+        """Клонирование блоков (Btrfs, XFS, ZFS и др.) без копирования данных"""
+        if fcntl is None or not sys.platform.startswith('linux'):
+            raise CopyUnsupported()
+        try:
+            fcntl.ioctl(dst_fd, self.FICLONE, src_fd)
+        except OSError as e:
+            if e.errno in self.FALLBACK_ERRNOS:
+                raise CopyUnsupported()
+            raise
+    
+    def _copy_file_range(self, src_fd, dst_fd, size):
+        """Копирование внутри ядра через os.copy_file_range"""
+        if not hasattr(os, "copy_file_range"):
+            raise CopyUnsupported()
+        self._kernel_copy_loop(lambda count: os.copy_file_range(src_fd, dst_fd, count), size)
+    
+    def _copy_sendfile(self, src_fd, dst_fd, size):
+        """Копирование внутри ядра через os.sendfile (Linux)"""
+        if not hasattr(os, "sendfile") or not sys.platform.startswith('linux'):
+            raise CopyUnsupported()
+        self._kernel_copy_loop(lambda count: os.sendfile(dst_fd, src_fd, None, count), size)
+    
+    def _kernel_copy_loop(self, copy_chunk, size):
+        copied = 0
+        while copied < size:
+            try:
+                sent = copy_chunk(min(size - copied, 1024 * 1024 * 1024))
+            except OSError as e:
+                if copied == 0 and e.errno in self.FALLBACK_ERRNOS:
+                    raise CopyUnsupported()
+                raise
+            if sent == 0:
+                if copied == 0:
+                    raise CopyUnsupported()
+                break
+            copied += sent
+    
+    def _copy_windows(self, src, dst):
+        """CopyFileW: на сетевых дисках SMB позволяет копировать на стороне сервера"""
+        try:
+            ok = ctypes.windll.kernel32.CopyFileW(src, dst, False)
+        except Exception:
+            raise CopyUnsupported()
+        if not ok:
+            raise ctypes.WinError()
+    
+    def _copy_buffered(self, fsrc, fdst, on_chunk=None):
+        """Копирование в пользовательском пространстве через большой буфер (on_chunk получает каждый блок)"""
+        buf = bytearray(self.BUFFER_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            if on_chunk is not None:
+                on_chunk(view[:n])
+            fdst.write(view[:n])
+
+class ContainerIndex:
+    """Индекс zip-томов одного перемещения (SQLite): путь файла в архиве -> том, размер, контрольная сумма.
+    
+    Строки добавляются только для закрытых и проверенных томов, поэтому по индексу
+    любой файл можно извлечь, не перебирая тома.
+    """
+    SUFFIX = "_index.sqlite"
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, volume TEXT NOT NULL, "
+            "size INTEGER, compressed_size INTEGER, digest TEXT)")
+        self._conn.commit()
+    
+    def add_volume(self, rows):
+        """rows — (путь в архиве, имя тома, размер, сжатый размер, контрольная сумма)"""
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    @classmethod
+    def lookup(cls, archive_base, arcname):
+        """Имя тома с файлом arcname (по всем индексам папки архива, новые первыми) или None"""
+        for index_path in sorted(glob.glob(os.path.join(glob.escape(archive_base), "*" + cls.SUFFIX)), reverse=True):
+            conn = sqlite3.connect(index_path)
+            try:
+                row = conn.execute("SELECT volume FROM files WHERE path = ?", (arcname,)).fetchone()
+            finally:
+                conn.close()
+            if row is not None:
+                return row[0]
+        return None
+
+class ZipVolumeWriter:
+    """Запись файлов в zip-тома ограниченного размера; свой экземпляр у каждого потока записи.
+    
+    Файлы сжимаются deflate (уже сжатые форматы сохраняются без сжатия); zlib отпускает GIL,
+    поэтому потоки с отдельными томами сжимают параллельно. Центральный каталог zip пишется
+    при закрытии тома, поэтому исходные файлы тома можно удалять только после finish_volume().
+    """
+    STORED_EXTENSIONS = {".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst", ".jpg", ".jpeg", ".png", ".gif",
+                         ".webp", ".mp3", ".mp4", ".mkv", ".avi", ".mov", ".docx", ".xlsx", ".pptx", ".pdf"}
+    ZIP64_LIMIT = (1 << 31) - 1
+    
+    def __init__(self, archive_base, prefix, worker_id, volume_bytes):
+        self.archive_base = archive_base
+        self.prefix = prefix
+        self.worker_id = worker_id
+        self.volume_bytes = volume_bytes
+        self.volume_path = None
+        self._zip = None
+        self._volume_no = 0
+        self._entries = []
+    
+    def _open_volume(self):
+        self._volume_no += 1
+        name = f"{self.prefix}_w{self.worker_id:02d}_{self._volume_no:03d}.zip"
+        self.volume_path = os.path.join(self.archive_base, name)
+        self._zip = zipfile.ZipFile(self.volume_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True, strict_timestamps=False)
+        self._entries = []
+    
+    def add(self, src_norm, arcname, src_stat, hash_algorithm=None):
+        """Запись файла в текущий том; возвращает (способ, контрольная сумма или None)"""
+        if self._zip is None:
+            self._open_volume()
+        zinfo = zipfile.ZipInfo.from_file(src_norm, arcname, strict_timestamps=False)
+        stored = os.path.splitext(arcname)[1].lower() in self.STORED_EXTENSIONS
+        zinfo.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+        digest = hashlib.new(hash_algorithm) if hash_algorithm else None
+        buf = bytearray(FileCopier.BUFFER_SIZE)
+        view = memoryview(buf)
+        with open(src_norm, 'rb') as fsrc, \
+                self._zip.open(zinfo, 'w', force_zip64=src_stat.st_size > self.ZIP64_LIMIT) as fdst:
+            while True:
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                if digest is not None:
+                    digest.update(view[:n])
+                fdst.write(view[:n])
+        digest = digest.hexdigest() if digest is not None else None
+        self._entries.append((arcname, src_stat.st_size, digest))
+        return ("zip-stored" if stored else "zip-deflate"), digest
+    
+    def full(self):
+        return self._zip is not None and self._zip.fp.tell() >= self.volume_bytes
+    
+    def finish_volume(self, hash_algorithm=None):
+        """Закрытие тома, fsync и проверка каждого файла (размер, с hash_algorithm — перечитывание и сравнение суммы).
+        
+        Возвращает {путь в архиве: (сжатый размер, None) или (None, текст ошибки)}.
+        """
+        if self._zip is None:
+            return {}
+        self._zip.close()
+        self._zip = None
+        with open(self.volume_path, 'r+b') as f:
+            os.fsync(f.fileno())
+        checked = {}
+        with zipfile.ZipFile(self.volume_path) as zf:
+            for arcname, size, digest in self._entries:
+                try:
+                    zinfo = zf.getinfo(arcname)
+                    if zinfo.file_size != size:
+                        raise Exception("Ошибка целостности: размеры не совпадают")
+                    if digest is not None:
+                        check = hashlib.new(hash_algorithm)
+                        with zf.open(zinfo) as f:
+                            for chunk in iter(lambda: f.read(FileCopier.BUFFER_SIZE), b""):
+                                check.update(chunk)
+                        if check.hexdigest() != digest:
+                            raise Exception("Ошибка целостности: контрольные суммы не совпадают")
+                    checked[arcname] = (zinfo.compress_size, None)
+                except Exception as e:
+                    checked[arcname] = (None, str(e)[:100])
+        return checked
+
+class DedupIndex:
+    """Постоянный индекс содержимого папки архива для дедупликации (SQLite в самой папке архива).
+    
+    Для файлов архива хранятся размер и mtime, а частичная и полная контрольные суммы
+    считаются лениво — только когда появляется кандидат того же размера — и сохраняются
+    между запусками. Дубликат не копируется: на место копии ставится жесткая ссылка на уже
+    хранящийся файл, а если файловая система ссылок не поддерживает — запись в таблицу links.
+    """
+    FILE_NAME = "archive_helper_dedup.sqlite"
+    ALGORITHM = "blake2b"
+    PARTIAL_BYTES = 64 * 1024
+    MIN_SIZE = 4096  # файлы меньше кластера ссылкой места не экономят
+    
+    def __init__(self, archive_base):
+        self.path = os.path.join(archive_base, self.FILE_NAME)
+        self.created = not os.path.exists(self.path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, partial TEXT, digest TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_size ON blobs (size)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS links (path TEXT PRIMARY KEY, target TEXT NOT NULL)")
+        self._conn.commit()
+        self.saved_files = 0
+        self.saved_bytes = 0
+    
+    def seed(self, archive_base):
+        """Первичное заполнение по содержимому архива: только размеры и mtime, без чтения файлов"""
+        count = 0
+        batch = []
+        stack = [archive_base]
+        while stack:
+            folder = stack.pop()
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            if folder == archive_base and (entry.name.startswith(self.FILE_NAME)
+                                                           or entry.name.endswith(ContainerIndex.SUFFIX)):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if st.st_size >= self.MIN_SIZE:
+                            batch.append((entry.path, st.st_size, st.st_mtime_ns))
+                        if len(batch) >= 1000:
+                            count += self._insert_seed(batch)
+            except OSError:
+                continue
+        return count + self._insert_seed(batch)
+    
+    def _insert_seed(self, batch):
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO blobs (path, size, mtime_ns) VALUES (?, ?, ?)", batch)
+            self._conn.commit()
+        count = len(batch)
+        batch.clear()
+        return count
+    
+    def candidates(self, size):
+        """Файлы архива того же размера: (путь, mtime_ns, частичная сумма, полная сумма)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, mtime_ns, partial, digest FROM blobs WHERE size = ?", (size,)).fetchall()
+    
+    def add(self, path, size, mtime_ns, partial=None, digest=None):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)", (path, size, mtime_ns, partial, digest))
+            self._conn.execute("DELETE FROM links WHERE path = ?", (path,))
+            self._conn.commit()
+    
+    def update(self, path, column, value):
+        """Сохранение лениво посчитанной суммы (column — 'partial' или 'digest')"""
+        with self._lock:
+            self._conn.execute(f"UPDATE blobs SET {column} = ? WHERE path = ?", (value, path))
+            self._conn.commit()
+    
+    def forget(self, path):
+        """Файл архива изменен или удален — его суммы больше недействительны"""
+        with self._lock:
+            self._conn.execute("DELETE FROM blobs WHERE path = ?", (path,))
+            self._conn.commit()
+    
+    def add_link(self, path, target, size):
+        """Запись манифеста: файл path хранится в архиве как target"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO links VALUES (?, ?)", (path, target))
+            self._conn.commit()
+            self.saved_files += 1
+            self.saved_bytes += size
+    
+    @classmethod
+    def lookup_link(cls, archive_base, path):
+        """Путь хранящегося файла для path из манифеста links папки архива или None (индекс не создается)"""
+        index_path = os.path.join(archive_base, cls.FILE_NAME)
+        if not os.path.exists(index_path):
+            return None
+        conn = sqlite3.connect(index_path)
+        try:
+            row = conn.execute("SELECT target FROM links WHERE path = ?", (path,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        finally:
+            conn.close()
+        return row[0] if row is not None else None
+    
+    def note_saved(self, size):
+        with self._lock:
+            self.saved_files += 1
+            self.saved_bytes += size
+    
+    @classmethod
+    def partial_hash(cls, path, size):
+        """Сумма размера, начала и конца файла — дешевый второй фильтр после размера"""
+        digest = hashlib.new(cls.ALGORITHM)
+        digest.update(size.to_bytes(8, 'little'))
+        with open(path, 'rb') as f:
+            digest.update(f.read(cls.PARTIAL_BYTES))
+            if size > 2 * cls.PARTIAL_BYTES:
+                f.seek(size - cls.PARTIAL_BYTES)
+                digest.update(f.read(cls.PARTIAL_BYTES))
+            elif size > cls.PARTIAL_BYTES:
+                digest.update(f.read())
+        return digest.hexdigest()
+    
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+class MoveJournal:
+    """Журнал перемещения (JSON Lines, только дозапись) для продолжения после сбоя.
+    
+    Первая строка — параметры задания, затем по строке на каждый файл (состояние pending;
+    при поиске с перемещением — по мере нахождения файлов), затем смены состояний: copied -> verified -> deleted либо error. Смены состояний копятся
+    в памяти и записываются с fsync пачками. Исходный файл удаляется только после fsync копии,
+    поэтому при сбое теряются лишь последние несброшенные записи — их восстанавливает
+    сверка с диском при продолжении (resume_move).
+    """
+    FLUSH_RECORDS = 256
+    FLUSH_SECONDS = 1.0
+    
+    def __init__(self, path, journal_file):
+        self.path = path
+        self._file = journal_file
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.perf_counter()
+    
+    @classmethod
+    def create(cls, path, source_root, archive_base, sources, archive_format="tree", period=None):
+        """Новый журнал: параметры задания и список файлов, записанные на диск до начала перемещения"""
+        journal_file = open(path, 'w', encoding='utf-8')
+        try:
+            journal_file.write(json.dumps({"job": {
+                "source_root": source_root,
+                "archive": archive_base,
+                "format": archive_format,
+                "period": period,
+                "started": datetime.datetime.now().isoformat()
+            }}, ensure_ascii=False) + "\n")
+            for idx, src in enumerate(sources, 1):
+                journal_file.write(json.dumps({"i": idx, "src": src}, ensure_ascii=False) + "\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        except BaseException:
+            journal_file.close()
+            raise
+        return cls(path, journal_file)
+    
+    def add_source(self, idx, src):
+        """Файл, добавленный в задание по ходу перемещения (поиск с одновременным перемещением)"""
+        line = json.dumps({"i": idx, "src": src}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._pending.append(line)
+    
+    @classmethod
+    def reopen(cls, path):
+        """Дозапись в существующий журнал (продолжение задания)"""
+        return cls(path, open(path, 'a', encoding='utf-8'))
+    
+    @staticmethod
+    def read(path):
+        """Разбор журнала: (параметры задания, {номер: последнее известное состояние файла})"""
+        job = None
+        entries = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # строка, недописанная при сбое
+                if "job" in record:
+                    job = record["job"]
+                elif "src" in record:
+                    entries[record["i"]] = {"src": record["src"], "s": "pending"}
+                elif record.get("i") in entries:
+                    entries[record["i"]].update(record)
+        return job, entries
+    
+    def record(self, idx, state, **info):
+        """Смена состояния файла (из любого потока); на диск попадает при следующем flush"""
+        record = {"i": idx, "s": state}
+        record.update(info)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._pending.append(line)
+    
+    def maybe_flush(self):
+        if len(self._pending) >= self.FLUSH_RECORDS or time.perf_counter() - self._last_flush >= self.FLUSH_SECONDS:
+            self.flush()
+    
+    def flush(self):
+        with self._lock:
+            lines = self._pending
+            self._pending = []
+        if lines:
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_flush = time.perf_counter()
+    
+    def close(self, finished):
+        """Закрытие журнала; завершенное задание (все файлы в конечном состоянии) журнал удаляет"""
+        self.flush()
+        self._file.close()
+        if finished:
+            os.remove(self.path)
+
+def encode_json_value(value, _encode_string=json.encoder.encode_basestring):
+    """JSON-представление значения записи отчета; строки кодируются напрямую, без создания кодировщика"""
+    if value.__class__ is str:
+        return _encode_string(value)
+    if value is None:
+        return 'null'
+    return json.dumps(value, ensure_ascii=False)
+
+def iso_time(timestamp):
+    """Временная метка в секундах эпохи -> ISO-строка для отчетов (None остается None)"""
+    return datetime.datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+class ReportWriter:
+    """Потоковая запись отчета: заголовок с метаданными, записи по одной, итоговый блок.
+    
+    Записи не накапливаются в памяти, файл пишется через большой буфер — стоимость
+    отчета линейна по числу файлов. Формат выбирается по расширению (open_report_writer).
+    """
+    BUFFER_SIZE = 1024 * 1024
+    
+    def __init__(self, path, fields, metadata, sections=None):
+        self.fields = fields
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8', newline='', buffering=self.BUFFER_SIZE)
+        try:
+            self.write_header(metadata, sections or {})
+        except BaseException:
+            self._file.close()
+            raise
+    
+    def write_header(self, metadata, sections):
+        raise NotImplementedError
+    
+    def write(self, values):
+        """Одна запись: значения в порядке fields"""
+        raise NotImplementedError
+    
+    def write_footer(self, summary):
+        raise NotImplementedError
+    
+    def close(self, summary=None):
+        """Итоговый блок (число записей и время завершения) и закрытие файла"""
+        try:
+            footer = {"records": self.count, "finished": datetime.datetime.now().isoformat()}
+            footer.update(summary or {})
+            self.write_footer(footer)
+        finally:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+class JsonReportWriter(ReportWriter):
+    """JSON-объект {"metadata", ..., "files": [...], "summary"} в том же виде, что у json.dump с indent=2"""
+    
+    def write_header(self, metadata, sections):
+        f = self._file
+        f.write('{\n  "metadata": ')
+        f.write(json.dumps(metadata, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+        for key, value in sections.items():
+            f.write(f',\n  {json.dumps(key)}: ')
+            f.write(json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+        f.write(',\n  "files": [')
+        self._keys = ['\n      ' + json.dumps(field) + ': ' for field in self.fields]
+        self._separator = '\n    {'
+    
+    def write(self, values):
+        encode = encode_json_value
+        self._file.write(self._separator + ','.join([key + encode(value) for key, value in zip(self._keys, values)])
+                         + '\n    }')
+        self._separator = ',\n    {'
+        self.count += 1
+    
+    def write_footer(self, summary):
+        self._file.write('\n  ],\n  "summary": ' if self.count else '],\n  "summary": ')
+        self._file.write(json.dumps(summary, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+        self._file.write('\n}')
+
+class NdjsonReportWriter(ReportWriter):
+    """JSON Lines: первая строка {"metadata": ...}, затем по строке на файл, последняя — {"summary": ...}"""
+    
+    def write_header(self, metadata, sections):
+        header = {"metadata": metadata}
+        header.update(sections)
+        self._file.write(json.dumps(header, ensure_ascii=False) + '\n')
+        self._keys = ['"' + self.fields[0] + '": '] + [', "' + field + '": ' for field in self.fields[1:]]
+    
+    def write(self, values):
+        encode = encode_json_value
+        self._file.write('{' + ''.join([key + encode(value) for key, value in zip(self._keys, values)]) + '}\n')
+        self.count += 1
+    
+    def write_footer(self, summary):
+        self._file.write(json.dumps({"summary": summary}, ensure_ascii=False) + '\n')
+
+class CsvReportWriter(ReportWriter):
+    """CSV с заголовком колонок; метаданные и итоги — строками-комментариями '# ключ: JSON' до и после таблицы"""
+    
+    def write_header(self, metadata, sections):
+        self._file.write(f"# metadata: {json.dumps(metadata, ensure_ascii=False)}\n")
+        for key, value in sections.items():
+            self._file.write(f"# {key}: {json.dumps(value, ensure_ascii=False)}\n")
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow(self.fields)
+    
+    def write(self, values):
+        self._writer.writerow(values)
+        self.count += 1
+    
+    def write_footer(self, summary):
+        self._file.write(f"# summary: {json.dumps(summary, ensure_ascii=False)}\n")
+
+class SqliteReportWriter(ReportWriter):
+    """База отчетов SQLite: каждый отчет дописывается как запуск (runs) со строками файлов (files).
+    
+    Путь файла раскладывается на папку, имя и расширение; индексы по (запуск, папка) и размеру
+    позволяют делать выборки по прошлым запускам без загрузки отчетов в память.
+    Строки вставляются пакетами executemany в одной транзакции на весь отчет.
+    """
+    BATCH_SIZE = 10000
+    # Поле записи отчета -> колонка таблицы files
+    COLUMNS = {"date": "file_date", "size": "size", "mtime": "mtime", "atime": "atime", "ctime": "ctime",
+               "status": "status", "error_message": "error_message", "archive_path": "archive_path",
+               "copy_method": "copy_method", "digest": "digest"}
+    # Колонки, добавленные после первой версии базы: в старые базы дописываются через ALTER TABLE
+    ADDED_COLUMNS = {"mtime": "TEXT", "atime": "TEXT", "ctime": "TEXT"}
+    
+    def __init__(self, path, fields, metadata, sections=None):
+        self.fields = fields
+        self.count = 0
+        self._batch = []
+        self._file = sqlite3.connect(path, isolation_level=None)
+        try:
+            self.write_header(metadata, sections or {})
+        except BaseException:
+            self._file.close()
+            raise
+    
+    def write_header(self, metadata, sections):
+        conn = self._file
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, generated TEXT, "
+            "source_folder TEXT, archive_folder TEXT, metadata TEXT, sections TEXT, file_count INTEGER, summary TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (run_id INTEGER NOT NULL REFERENCES runs (id), folder TEXT NOT NULL, "
+            "name TEXT NOT NULL, ext TEXT, size INTEGER, file_date TEXT, status TEXT, error_message TEXT, "
+            "archive_path TEXT, copy_method TEXT, digest TEXT, mtime TEXT, atime TEXT, ctime TEXT)")
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+        for column, column_type in self.ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE files ADD COLUMN {column} {column_type}")
+        # Индексов немного: каждый заметно замедляет вставку миллионов строк
+        conn.execute("CREATE INDEX IF NOT EXISTS files_run_folder ON files (run_id, folder)")
+        conn.execute("CREATE INDEX IF NOT EXISTS files_size ON files (size)")
+        conn.execute("BEGIN")
+        kind = "move" if "status" in self.fields else "search"
+        self.run_id = conn.execute(
+            "INSERT INTO runs (kind, generated, source_folder, archive_folder, metadata, sections) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, metadata.get("generated"), metadata.get("source_folder"), metadata.get("archive_folder"),
+             json.dumps(metadata, ensure_ascii=False), json.dumps(sections, ensure_ascii=False))).lastrowid
+        self._path_index = self.fields.index("source_path" if kind == "move" else "path")
+        mapped = [(self.COLUMNS[field], i) for i, field in enumerate(self.fields) if field in self.COLUMNS]
+        self._value_indexes = [i for _, i in mapped]
+        columns = ", ".join(column for column, _ in mapped)
+        self._insert = (f"INSERT INTO files (run_id, folder, name, ext, {columns}) "
+                        f"VALUES ({', '.join('?' * (4 + len(mapped)))})")
+    
+    def write(self, values):
+        folder, _, name = values[self._path_index].rpartition(os.sep)
+        dot = name.rfind('.')
+        self._batch.append((self.run_id, folder, name, name[dot:].lower() if dot > 0 else '')
+                           + tuple([values[i] for i in self._value_indexes]))
+        self.count += 1
+        if len(self._batch) >= self.BATCH_SIZE:
+            self._flush()
+    
+    def _flush(self):
+        self._file.executemany(self._insert, self._batch)
+        self._batch.clear()
+    
+    def write_footer(self, summary):
+        self._flush()
+        self._file.execute("UPDATE runs SET file_count = ?, summary = ? WHERE id = ?",
+                           (self.count, json.dumps(summary, ensure_ascii=False), self.run_id))
+        self._file.execute("COMMIT")
+
+# Форматы машиночитаемых отчетов по расширению файла
+REPORT_WRITERS = {
+    ".json": JsonReportWriter,
+    ".ndjson": NdjsonReportWriter,
+    ".jsonl": NdjsonReportWriter,
+    ".csv": CsvReportWriter,
+    ".sqlite": SqliteReportWriter,
+    ".db": SqliteReportWriter
+}
+
+def open_report_writer(path, fields, metadata, sections=None):
+    """Писатель отчета по расширению path (неизвестное расширение — JSON)"""
+    writer_class = REPORT_WRITERS.get(os.path.splitext(path)[1].lower(), JsonReportWriter)
+    return writer_class(path, fields, metadata, sections)
+
+class MoveReport:
+    """Машиночитаемый отчет о перемещении, который пишется по ходу перемещения.
+    
+    Каждый результат записывается сразу при получении (add), счетчики успешных файлов, ошибок
+    и способов копирования ведутся тут же — итоги и метрики попадают в итоговый блок при close.
+    """
+    FIELDS = ("source_path", "archive_path", "status", "error_message", "copy_method", "digest", "size",
+              "mtime", "atime", "ctime")
+    
+    def __init__(self, path, metadata):
+        self.path = path
+        self.writer = open_report_writer(path, self.FIELDS, metadata)
+        self.success_count = 0
+        self.error_count = 0
+        self.copy_methods = collections.Counter()
+    
+    def add(self, result):
+        src, dest, status, msg, method, digest, size, mtime, atime, ctime = result
+        if status == "УСПЕХ":
+            self.success_count += 1
+            self.copy_methods[method] += 1
+        else:
+            self.error_count += 1
+        self.writer.write((src, dest, status, msg or None, method or None, digest, size,
+                           iso_time(mtime), iso_time(atime), iso_time(ctime)))
+    
+    def close(self, metrics=None):
+        self.writer.close({
+            "success_count": self.success_count,
+            "error_count": self.error_count,
+            "copy_methods": dict(self.copy_methods.most_common()),
+            "metrics": metrics.snapshot() if metrics is not None else None
+        })
+    
+    def discard(self):
+        """Закрытие без итогового блока (после ошибки записи)"""
+        self.writer._file.close()
+
+# Итог поиска: поля совпадают с аргументами ArchiveMoverApp.on_search_complete
+SearchOutcome = collections.namedtuple("SearchOutcome", [
+    "results", "duration", "errors", "skipped_hidden", "skipped_pattern", "skipped_size", "skipped_by_path",
+    "time_type", "start_dt", "end_dt", "metrics"
+])
+
+# Итог перемещения: поля совпадают с аргументами ArchiveMoverApp.on_move_complete
+MoveOutcome = collections.namedtuple("MoveOutcome", ["results", "success", "errors", "duration", "archive_path", "metrics"])
+
+class ScanMoveOutcome(collections.namedtuple("ScanMoveOutcome", ["search", "move", "scan_error"], defaults=(None,))):
+    """Итог поиска с одновременным перемещением: SearchOutcome (None при отмене или ошибке поиска), MoveOutcome
+    и текст ошибки, прервавшей поиск (файлы, найденные до нее, перемещены и есть в MoveOutcome)"""
+    @property
+    def metrics(self):
+        return self.move.metrics
+
+class ArchiveEngine:
+    """Поиск и перемещение файлов без привязки к интерфейсу.
+    
+    Настройки — словарь в формате archive_helper_config.json. Сообщения журнала и статуса
+    передаются в log_callback(message, error=False, success=False) и status_callback(text, error=False),
+    прогресс — в progress_callback(done, total) (total=None, если общее число неизвестно);
+    все они вызываются из рабочих потоков. Отмена — установка cancel_flag.
+    """
+    PROGRESS_INTERVAL = 0.5  # секунд между обновлениями статуса с метриками
+    PIPELINE_CAPACITY = 20000  # найденных файлов в очереди на перемещение при поиске с перемещением
+    SCAN_UNIT_DIRS = 256       # папок в порции обхода одного процесса (scan_processes > 1)
+    SCAN_UNIT_SECONDS = 0.25   # после этого времени процесс возвращает необойденные папки родителю
+    ERROR_LOG_LIMIT = 5        # сколько ошибок чтения файлов попадает в журнал за поиск
+    
+    def __init__(self, config, log_callback=None, status_callback=None, progress_callback=None):
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(config)
+        self.log_callback = log_callback
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.cancel_flag = False
+        self.source_root = ""
+        self.profiler = None  # EngineProfiler на время профилируемой операции
+        # Папка результатов профилирования — рядом с файлом настроек (по умолчанию CONFIG_FILE)
+        self.profile_dir = os.path.join(os.path.dirname(os.path.abspath(CONFIG_FILE)), PROFILE_DIR)
+        self.pipeline = None  # MatchPipe на время поиска с одновременным перемещением
+    
+    def log(self, message, error=False, success=False):
+        if self.log_callback is not None:
+            self.log_callback(message, error=error, success=success)
+    
+    def update_status(self, text, error=False):
+        if self.status_callback is not None:
+            self.status_callback(text, error=error)
+    
+    def _thread_target(self, target):
+        """Функция для рабочего потока (с профилированием потока, если оно включено)"""
+        return target if self.profiler is None else self.profiler.thread_target(target)
+    
+    def report_progress(self, metrics):
+        """Статус со скоростью/ETA и значение для индикатора прогресса"""
+        if self.pipeline is not None:
+            # Поиск и перемещение идут одновременно — в статусе обе операции
+            self.pipeline.status[metrics.operation] = metrics.status_text()
+            self.update_status(" | ".join(text for text in self.pipeline.status.values() if text))
+        else:
+            self.update_status(metrics.status_text())
+        if self.progress_callback is not None:
+            self.progress_callback(metrics.files, metrics.total)
+    
+    def cancel(self):
+        self.cancel_flag = True
+    
+    def get_int_option(self, key, default, low, high):
+        """Целочисленная настройка с ограничением диапазона"""
+        value = str(self.config.get(key, default)).strip()
+        return max(low, min(high, int(value))) if value.isdigit() else default
+    
+    def get_min_size_kb(self):
+        value = str(self.config.get("min_size_kb", 10)).strip()
+        return int(value) if value.isdigit() else 10
+    
+    def get_time_type(self):
+        """Тип даты из настроек (в конфиге может храниться строка комбобокса 'modified|...')"""
+        time_type = self.config.get("time_type", "modified")
+        return time_type.split('|')[0] if '|' in time_type else time_type
+    
+    def get_archive_format(self):
+        """Формат архива: 'tree' — копия структуры папок, 'zip' — zip-тома ограниченного размера"""
+        return "zip" if self.config.get("archive_format", "tree") == "zip" else "tree"
+    
+    def get_hash_algorithm(self):
+        """Алгоритм контрольной суммы, если включена проверка по хэшу (иначе None)"""
+        if self.config.get("verify_mode", "size") != "hash":
+            return None
+        algorithm = self.config.get("hash_algorithm", "blake2b")
+        return algorithm if algorithm in HASH_ALGORITHMS else "blake2b"
+    
+    def search_params(self):
+        """Параметры исключений для JSON-отчетов"""
+        return {
+            "skip_hidden": bool(self.config.get("skip_hidden", True)),
+            "exclude_files": self.config.get("exclude_files", ""),
+            "exclude_dirs": self.config.get("exclude_dirs", ""),
+            "exclude_paths": self.config.get("exclude_paths", ""),
+            "exclude_small": bool(self.config.get("exclude_small", False)),
+            "min_size_kb": self.get_min_size_kb()
+        }
+    
+    def normalize_long_path(self, path):
+        """Добавляет префикс \\?\ для путей >260 символов"""
+        if os.name == 'nt' and len(path) > 259 and not path.startswith('\\\\?\\'):
+            return '\\\\?\\' + os.path.abspath(path)
+        return path
+    
+    def _is_hidden_windows(self, path):
+        """Проверка скрытого атрибута файла/папки (только Windows)"""
+        if os.name != 'nt':
+            return False
+        try:
+            attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
+            return attrs != -1 and (attrs & 2) != 0
+        except:
+            return False
+    
+    def _is_hidden_entry(self, entry):
+        """Проверка скрытого атрибута по данным DirEntry (на Windows атрибуты уже получены при листинге)"""
+        if os.name != 'nt':
+            return False
+        try:
+            attrs = entry.stat(follow_symlinks=False).st_file_attributes
+        except (OSError, AttributeError):
+            return self._is_hidden_windows(self.normalize_long_path(entry.path))
+        return (attrs & 2) != 0
+    
+    def _list_directory(self, root_dir, index=None, stats=None):
+        """Листинг одной папки через os.scandir: (подпапки, файлы) как объекты DirEntry с кэшем stat.
+        
+        Третий элемент — mtime папки, под которым свежий листинг нужно сохранить в индекс
+        (None, если индекс не используется или листинг взят из индекса), четвертый — время
+        листинга (для листинга из индекса — время, когда он был прочитан с диска; 0, если неизвестно).
+        Возвращает None, если папку прочитать нельзя (как os.walk без onerror).
+        """
+        dirs = []
+        files = []
+        norm_root = self.normalize_long_path(root_dir)
+        mtime_ns = None
+        listed_at = time.time()
+        try:
+            if index is not None:
+                mtime_ns = os.stat(norm_root).st_mtime_ns
+                cached = index.lookup(root_dir, mtime_ns)
+                if cached is not None:
+                    stats.index_hits += 1
+                    scanned, rows = cached
+                    for row in rows:
+                        (dirs if row[1] else files).append(IndexedEntry(norm_root, row))
+                    return dirs, files, None, scanned or 0
+                stats.index_misses += 1
+            
+            with os.scandir(norm_root) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    (dirs if is_dir else files).append(entry)
+        except OSError:
+            return None
+        return dirs, files, mtime_ns, listed_at
+    
+    def _index_rows(self, dirs, files, fresh_stats):
+        """Строки индекса для свежего листинга (stat только для уже проверенных файлов, без новых вызовов)"""
+        rows = []
+        for is_dir, group in ((1, dirs), (0, files)):
+            for entry in group:
+                try:
+                    is_symlink = int(entry.is_symlink())
+                    attrs = entry.stat(follow_symlinks=False).st_file_attributes if os.name == 'nt' else None
+                except (OSError, AttributeError):
+                    is_symlink = 0
+                    attrs = None
+                st = fresh_stats.get(entry.name)
+                if st is not None:
+                    rows.append((entry.name, is_dir, is_symlink, st.st_size, st.st_mtime, st.st_atime, st.st_ctime, attrs))
+                else:
+                    rows.append((entry.name, is_dir, is_symlink, None, None, None, None, attrs))
+        return rows
+    
+    def make_scan_rules(self, start_dt, end_dt, time_type, index=None, metrics=None):
+        """Правила поиска из настроек; маски компилируются один раз на весь поиск"""
+        # Подготовка правил исключений
+        skip_hidden = bool(self.config.get("skip_hidden", True))
+        exclude_file_patterns = [p.strip() for p in self.config.get("exclude_files", "").split(',') if p.strip()]
+        exclude_dir_patterns = [p.strip() for p in self.config.get("exclude_dirs", "").split(',') if p.strip()]
+        base_system_dirs = ['$RECYCLE.BIN', 'System Volume Information', 'Recovery']
+        all_exclude_dir_patterns = base_system_dirs + exclude_dir_patterns
+        
+        # Подготовка исключенных путей
+        exclude_path_list = [p.strip() for p in self.config.get("exclude_paths", "").split(',') if p.strip()]
+        exclude_paths_trie = PathTrie()
+        for path_str in exclude_path_list:
+            try:
+                if not os.path.isabs(path_str):
+                    abs_path = os.path.abspath(os.path.join(self.source_root, path_str))
+                else:
+                    abs_path = os.path.abspath(path_str)
+                exclude_paths_trie.add(abs_path)
+            except Exception as e:
+                self.log(f"Ошибка обработки пути исключения '{path_str}': {str(e)}", error=True)
+        
+        exclude_by_size = bool(self.config.get("exclude_small", False))
+        min_size_kb = self.get_min_size_kb()
+        min_size_bytes = min_size_kb * 1024 if exclude_by_size and min_size_kb > 0 else 0
+        
+        time_attr = TIME_ATTRS.get(time_type, "st_mtime")
+        
+        return ScanRules(skip_hidden, MaskMatcher(exclude_file_patterns), MaskMatcher(all_exclude_dir_patterns),
+                         exclude_paths_trie if exclude_paths_trie.count else None, min_size_bytes, time_attr, start_dt, end_dt,
+                         index, metrics)
+    
+    @profiled("search")
+    def search_files(self, folder, start_dt, end_dt, time_type, results=None):
+        """Поиск файлов в периоде; возвращает SearchOutcome или None при отмене.
+        
+        results — приемник найденных файлов (по умолчанию make_result_sink()).
+        """
+        start_time = datetime.datetime.now()
+        self.source_root = folder
+        
+        scan_processes = self.get_int_option("scan_processes", 1, 1, 64)
+        index = None
+        if self.config.get("use_scan_index", False):
+            if scan_processes > 1:
+                self.log("Индекс сканирования не используется при обходе в нескольких процессах")
+            elif time_type == "accessed":
+                self.log("Индекс сканирования не используется для даты доступа: она меняется при каждом чтении файла")
+            else:
+                try:
+                    index = ScanIndex(INDEX_FILE)
+                except sqlite3.Error as e:
+                    self.log(f"Не удалось открыть индекс сканирования: {str(e)}", error=True)
+        
+        metrics = RunMetrics("search")
+        rules = self.make_scan_rules(start_dt, end_dt, time_type, index, metrics)
+        if self.profiler is not None:
+            self.profiler.wrap_object(rules.file_matcher, ["match"], "file_masks")
+            self.profiler.wrap_object(rules.dir_matcher, ["match"], "dir_masks")
+            self.profiler.wrap_object(rules.exclude_paths, ["contains"], "exclude_paths")
+            self.profiler.wrap_object(index, ["lookup", "store"], "scan_index")
+        scan_threads = self.get_int_option("scan_threads", 1, 1, 64)
+        if results is None:
+            results = self.make_result_sink()
+        completed = False
+        
+        try:
+            if scan_processes > 1:
+                self.log(f"Обход папок в нескольких процессах: процессов {scan_processes}")
+                stats = self._scan_processes(folder, rules, scan_processes, results, time_type)
+            elif self.config.get("async_io", False):
+                stats = self._scan_async(folder, rules, results)
+            elif scan_threads > 1:
+                self.log(f"Параллельный обход папок: потоков {scan_threads}")
+                stats = self._scan_parallel(folder, rules, scan_threads, results)
+            else:
+                stats = self._scan_sequential(folder, rules, results)
+            
+            if self.cancel_flag:
+                self.log("Поиск отменен пользователем")
+                return None
+            
+            if index is not None:
+                self.log(f"Индекс сканирования: папок из индекса {stats.index_hits}, перечитано с диска {stats.index_misses}, "
+                         f"перепроверено файлов {stats.index_rechecked}")
+            metrics.finish()
+            self.log(f"Метрики поиска: {metrics.summary_text()}")
+            
+            duration = (datetime.datetime.now() - start_time).total_seconds()
+            completed = True
+            return SearchOutcome(
+                results, duration, stats.errors, stats.skipped_hidden, stats.skipped_pattern, stats.skipped_size,
+                stats.skipped_by_path, time_type, start_dt, end_dt, metrics
+            )
+        finally:
+            if not completed:
+                results.close()
+            if index is not None:
+                try:
+                    index.close()
+                except sqlite3.Error:
+                    pass
+    
+    def make_result_sink(self):
+        """Хранилище найденных файлов: в памяти или во временном файле (настройка stream_results)"""
+        if self.config.get("stream_results", False):
+            return ResultSpool()
+        return FoundFiles()
+    
+    def _scan_sequential(self, folder, rules, results):
+        """Последовательный обход дерева в глубину (порядок как у os.walk)"""
+        stats = ScanStats(results)
+        stack = [folder]
+        reported = 0
+        while stack and not self.cancel_flag:
+            subdirs = self._process_directory(stack.pop(), rules, stats)
+            stack.extend(reversed(subdirs))
+            if stats.processed // 200 > reported // 200:
+                reported = stats.processed
+                self.log(f"Обработано файлов: {reported}...")
+            if rules.metrics.progress_due(self.PROGRESS_INTERVAL):
+                self.report_progress(rules.metrics)
+        return stats
+    
+    def _scan_parallel(self, folder, rules, thread_count, results):
+        """Параллельный обход дерева пулом потоков с перехватом работы (work stealing).
+        
+        У каждого потока своя очередь папок: свои папки берутся с конца (в глубину),
+        при пустой очереди поток забирает самую старую папку у соседа.
+        """
+        queues = [collections.deque() for _ in range(thread_count)]
+        queues[0].append(folder)
+        worker_stats = [ScanStats(results) for _ in range(thread_count)]
+        cond = threading.Condition()
+        pending = [1]  # папки в очередях и в обработке
+        failures = []
+        
+        def steal(own_index):
+            for offset in range(1, thread_count):
+                try:
+                    return queues[(own_index + offset) % thread_count].popleft()
+                except IndexError:
+                    continue
+            return None
+        
+        def worker(index):
+            own = queues[index]
+            stats = worker_stats[index]
+            while not self.cancel_flag and not failures:
+                try:
+                    root_dir = own.pop()
+                except IndexError:
+                    root_dir = steal(index)
+                if root_dir is None:
+                    with cond:
+                        if pending[0] == 0:
+                            return
+                        cond.wait(0.05)
+                    continue
+                
+                subdirs = []
+                try:
+                    subdirs = self._process_directory(root_dir, rules, stats)
+                except Exception as e:
+                    failures.append(e)
+                finally:
+                    with cond:
+                        # Счетчик увеличивается до публикации подпапок, чтобы не было ложного завершения
+                        pending[0] += len(subdirs) - 1
+                        if subdirs or pending[0] == 0:
+                            cond.notify_all()
+                own.extend(reversed(subdirs))
+        
+        threads = [threading.Thread(target=self._thread_target(worker), args=(i,), daemon=True) for i in range(thread_count)]
+        for t in threads:
+            t.start()
+        
+        reported = 0
+        while any(t.is_alive() for t in threads):
+            threads[0].join(0.5)
+            processed = sum(s.processed for s in worker_stats)
+            if processed // 200 > reported // 200:
+                reported = processed
+                self.log(f"Обработано файлов: {reported}...")
+            self.report_progress(rules.metrics)
+        
+        if failures:
+            raise failures[0]
+        
+        stats = ScanStats(results)
+        for s in worker_stats:
+            stats.merge(s)
+        return stats
+    
+    def get_async_limit(self):
+        """Одновременных операций на том в режиме asyncio (async_io)"""
+        return self.get_int_option("async_per_mount", 64, 1, 1024)
+    
+    def _scan_async(self, folder, rules, results):
+        """Обход дерева в цикле asyncio: листинг и stat папок идут в пуле потоков, одновременно
+        обрабатывается до async_per_mount папок тома исходной папки (скрывает задержку сетевых дисков)"""
+        limit = self.get_async_limit()
+        self.log(f"Обход папок через asyncio: до {limit} папок одновременно на том {mount_key(folder)}")
+        return asyncio.run(self._scan_async_main(folder, rules, results, limit))
+    
+    async def _scan_async_main(self, folder, rules, results, limit):
+        loop = asyncio.get_running_loop()
+        stats = ScanStats(results)
+        pending = collections.deque([folder])
+        running = set()
+        reported = 0
+        
+        def visit(root_dir):
+            # Счетчики у каждой папки свои: папки обрабатываются в разных потоках пула
+            dir_stats = ScanStats(results)
+            return self._process_directory(root_dir, rules, dir_stats), dir_stats
+        
+        with concurrent.futures.ThreadPoolExecutor(limit, thread_name_prefix="archive_scan") as executor:
+            while (pending or running) and not self.cancel_flag:
+                while pending and len(running) < limit:
+                    running.add(loop.run_in_executor(executor, visit, pending.pop()))
+                done, running = await asyncio.wait(running, timeout=self.PROGRESS_INTERVAL,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    subdirs, dir_stats = future.result()
+                    stats.merge(dir_stats)
+                    pending.extend(reversed(subdirs))
+                if stats.processed // 200 > reported // 200:
+                    reported = stats.processed
+                    self.log(f"Обработано файлов: {reported}...")
+                if rules.metrics.progress_due(self.PROGRESS_INTERVAL):
+                    self.report_progress(rules.metrics)
+            if running:
+                await asyncio.wait(running)
+        return stats
+    
+    def _scan_processes(self, folder, rules, process_count, results, time_type):
+        """Обход дерева пулом процессов порциями папок (фильтрация не упирается в GIL).
+        
+        Процесс получает порцию папок и обходит ее в глубину, пока не исчерпает лимит папок
+        или времени; совпадения и необойденные папки возвращаются родителю, который раздает
+        папки свободным процессам. Пока папок мало, порции мельче — дерево быстрее делится.
+        """
+        stats = ScanStats(results)
+        pending = collections.deque([folder])
+        running = set()
+        reported = 0
+        pool = concurrent.futures.ProcessPoolExecutor(
+            process_count, mp_context=multiprocessing.get_context("spawn"), initializer=scan_process_init,
+            initargs=(self.config, self.source_root, rules.start_dt, rules.end_dt, time_type))
+        try:
+            while (pending or running) and not self.cancel_flag:
+                while pending and len(running) < process_count * 2:
+                    size = max(1, min(self.SCAN_UNIT_DIRS, len(pending) // process_count))
+                    unit = [pending.popleft() for _ in range(min(size, len(pending)))]
+                    max_dirs = self.SCAN_UNIT_DIRS if len(pending) >= process_count else self.SCAN_UNIT_DIRS // 16
+                    running.add(pool.submit(scan_process_unit, unit, max_dirs, self.SCAN_UNIT_SECONDS))
+                done, running = concurrent.futures.wait(running, timeout=self.PROGRESS_INTERVAL,
+                                                        return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    matches, unit_stats, counters, phases, rest, messages = future.result()
+                    results.add_batch(matches)
+                    stats.merge(unit_stats)
+                    files, dirs, byte_count, errors = counters
+                    rules.metrics.add(files=files, dirs=dirs, byte_count=byte_count, errors=errors, **phases)
+                    pending.extend(rest)
+                    # Каждый процесс ограничивает свои сообщения сам — общий лимит на поиск соблюдается здесь
+                    for message in messages:
+                        if next(rules.error_log_counter) < self.ERROR_LOG_LIMIT:
+                            self.log(message, error=True)
+                if stats.processed // 200 > reported // 200:
+                    reported = stats.processed
+                    self.log(f"Обработано файлов: {reported}...")
+                self.report_progress(rules.metrics)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return stats
+    
+    def _process_directory(self, root_dir, rules, stats):
+        """Обработка одной папки: фильтрация файлов и отбор подпапок для дальнейшего обхода"""
+        # Проверка по полному пути - ПОЛНОСТЬЮ пропускаем ветку
+        if rules.exclude_paths is not None and rules.exclude_paths.contains(root_dir):
+            stats.skipped_by_path += 1
+            return []
+        
+        started = time.perf_counter()
+        listing = self._list_directory(root_dir, rules.index, stats)
+        listed = time.perf_counter()
+        if listing is None:
+            rules.metrics.add(dirs=1, errors=1, listing=listed - started)
+            return []
+        all_dirs, files, store_mtime, listed_at = listing
+        fresh_stats = {} if store_mtime is not None else None
+        from_index = rules.index is not None and store_mtime is None
+        
+        # Фильтрация папок по шаблонам имен
+        dir_match = rules.dir_matcher.match
+        dirs = [d for d in all_dirs if not dir_match(d.name)]
+        
+        # Фильтрация скрытых папок
+        if rules.skip_hidden:
+            non_hidden_dirs = []
+            for d in dirs:
+                if not self._is_hidden_entry(d):
+                    non_hidden_dirs.append(d)
+                else:
+                    stats.skipped_hidden += 1
+            dirs = non_hidden_dirs
+        
+        file_match = rules.file_matcher.match
+        time_attr = rules.time_attr
+        start_ts = rules.start_ts
+        end_ts = rules.end_ts
+        # Правка файла на месте не меняет дату папки: если конец периода не раньше листинга из индекса,
+        # правка после листинга могла привести в период любой файл, иначе — устареть могут только совпадения
+        recheck_all = from_index and end_ts >= listed_at - ScanIndex.CLOCK_MARGIN
+        matches = []
+        matched_bytes = 0
+        stat_seconds = 0.0
+        errors_before = stats.errors
+        perf_counter = time.perf_counter
+        for entry in files:
+            if self.cancel_flag:
+                return []
+            
+            file = entry.name
+            file_path = self.normalize_long_path(os.path.join(root_dir, file))
+            
+            # Пропуск по маске файла
+            if file_match(file):
+                stats.skipped_pattern += 1
+                continue
+            
+            # Пропуск скрытых файлов
+            if rules.skip_hidden and self._is_hidden_entry(entry):
+                stats.skipped_hidden += 1
+                continue
+            
+            try:
+                # Единственный stat на файл: размер и все временные метки
+                stat_started = perf_counter()
+                st = entry.stat()
+                if from_index and (recheck_all or start_ts <= getattr(st, time_attr) <= end_ts):
+                    st = os.stat(file_path)
+                    stats.index_rechecked += 1
+                stat_seconds += perf_counter() - stat_started
+                if fresh_stats is not None:
+                    fresh_stats[file] = st
+                
+                # Пропуск по размеру
+                if st.st_size < rules.min_size_bytes:
+                    stats.skipped_size += 1
+                    continue
+                
+                timestamp = getattr(st, time_attr)
+                if start_ts <= timestamp <= end_ts:
+                    clean_path = file_path.replace('\\\\?\\', '') if file_path.startswith('\\\\?\\') else file_path
+                    matches.append((clean_path[:len(clean_path) - len(file)], file, timestamp,
+                                    st.st_size, st.st_mtime, st.st_atime, st.st_ctime))
+                    matched_bytes += st.st_size
+                
+                stats.processed += 1
+                
+            except (PermissionError, FileNotFoundError, OSError) as e:
+                stats.errors += 1
+                if next(rules.error_log_counter) < self.ERROR_LOG_LIMIT:
+                    clean_path = (file_path.replace('\\\\?\\', '')[:80] + "...") if len(file_path) > 80 else file_path
+                    self.log(f"Ошибка обработки {clean_path}: {str(e)[:60]}", error=True)
+                continue
+        
+        stats.results.add_batch(matches)
+        rules.metrics.add(files=len(files), dirs=1, byte_count=matched_bytes, errors=stats.errors - errors_before,
+                          listing=listed - started, stat=stat_seconds,
+                          filter=perf_counter() - listed - stat_seconds)
+        
+        if fresh_stats is not None:
+            rules.index.store(root_dir, store_mtime, self._index_rows(all_dirs, files, fresh_stats), listed_at)
+        
+        # Символические ссылки на папки не обходим (как os.walk с followlinks=False)
+        subdirs = []
+        for d in dirs:
+            try:
+                if d.is_symlink():
+                    continue
+            except OSError:
+                continue
+            subdirs.append(os.path.join(root_dir, d.name))
+        return subdirs
+    
+    @profiled("move")
+    def move_files(self, found_files, archive_base, period=None, report_paths=()):
+        """Перемещение найденных файлов в архив; возвращает MoveOutcome.
+        
+        При включенном журнале (use_journal) список файлов сначала записывается в JOURNAL_FILE,
+        и прерванное перемещение можно продолжить через resume_move. period — (тип даты, начало,
+        конец) поиска: дата каждого файла перед перемещением проверяется заново, и файлы,
+        изменившиеся после поиска (в том числе найденные по устаревшему индексу), остаются на месте.
+        report_paths — машиночитаемые отчеты (MoveReport), которые пишутся по ходу перемещения.
+        """
+        if period is not None:
+            period = self.make_period(*period)
+        reports = self.open_move_reports(report_paths, archive_base, len(found_files))
+        def sources():
+            # Даты файлов перемещению не нужны — datetime не создается
+            items = found_files.iter_raw() if hasattr(found_files, "iter_raw") else found_files
+            for src_path, _ in items:
+                yield src_path.replace('\\\\?\\', '') if src_path.startswith('\\\\?\\') else src_path
+        
+        journal = None
+        if self.config.get("use_journal", True):
+            try:
+                journal = MoveJournal.create(JOURNAL_FILE, self.source_root, archive_base, sources(),
+                                             self.get_archive_format(), period)
+            except OSError as e:
+                self.log(f"Не удалось создать журнал перемещения, продолжение после сбоя будет невозможно: {str(e)}", error=True)
+        
+        return self._run_move(enumerate(sources(), 1), len(found_files), archive_base, journal, period=period,
+                              reports=reports)
+    
+    @profiled("scan_move")
+    def scan_and_move(self, folder, start_dt, end_dt, time_type, archive_base, report_paths=()):
+        """Поиск с одновременным перемещением: найденные файлы сразу передаются в перемещение
+        через ограниченный канал MatchPipe; возвращает ScanMoveOutcome.
+        
+        Обход идет в фоновом потоке, перемещение — в текущем. Копирование начинается с первой
+        папки с совпадениями, общее время близко к большей из двух операций, а не к их сумме.
+        В журнал файлы дописываются по мере нахождения: после сбоя продолжение завершает только их,
+        остальное находит повторный поиск. report_paths — как в move_files.
+        """
+        self.source_root = folder
+        period = self.make_period(time_type, start_dt, end_dt)
+        reports = self.open_move_reports(report_paths, archive_base, None)
+        results = self.make_result_sink()
+        pipe = MatchPipe(results, self.PIPELINE_CAPACITY, lambda: self.cancel_flag)
+        searched = {}
+        
+        def scan():
+            try:
+                searched["outcome"] = self.search_files(folder, start_dt, end_dt, time_type, pipe)
+            except ScanStopped:
+                pass  # перемещение завершилось раньше обхода (отмена или ошибка) — итога поиска нет
+            except Exception as e:
+                searched["error"] = e
+            finally:
+                pipe.finish()
+        
+        journal = None
+        if self.config.get("use_journal", True):
+            try:
+                journal = MoveJournal.create(JOURNAL_FILE, folder, archive_base, [], self.get_archive_format(), period)
+            except OSError as e:
+                self.log(f"Не удалось создать журнал перемещения, продолжение после сбоя будет невозможно: {str(e)}", error=True)
+        
+        def jobs():
+            # Пути в канале уже без префикса длинных путей, как в хранилище найденных файлов
+            for idx, clean_src in enumerate(pipe, 1):
+                if journal is not None:
+                    journal.add_source(idx, clean_src)
+                yield idx, clean_src
+        
+        self.log(f"Поиск и перемещение одновременно: в очереди на перемещение до {self.PIPELINE_CAPACITY} файлов")
+        self.pipeline = pipe
+        scanner = threading.Thread(target=self._thread_target(scan), daemon=True)
+        scanner.start()
+        try:
+            moved = self._run_move(jobs(), None, archive_base, journal, period=period, reports=reports)
+        finally:
+            # Перемещение остановилось раньше поиска (отмена или ошибка) — обход не должен ждать очередь
+            pipe.abort()
+            scanner.join()
+            self.pipeline = None
+        
+        scan_error = None
+        if "error" in searched:
+            # Перемещение уже завершено — его итог возвращается вместе с ошибкой поиска
+            results.close()
+            scan_error = str(searched["error"])
+            self.log(f"Поиск прерван ошибкой: {scan_error}. Файлы, найденные до ошибки, перемещены, "
+                     f"остальные найдет повторный поиск", error=True)
+        outcome = searched.get("outcome")
+        if outcome is not None:
+            outcome = outcome._replace(results=results)
+        return ScanMoveOutcome(outcome, moved, scan_error)
+    
+    @profiled("move")
+    def resume_move(self, report_paths=()):
+        """Продолжение прерванного перемещения по журналу JOURNAL_FILE без повторного поиска.
+        
+        Файлы в конечном состоянии (deleted, error) берутся из журнала. Незавершенные файлы
+        сверяются с диском: если исходный файл на месте, он перемещается заново (недописанная
+        копия перезаписывается); если исходного файла нет, а копия в архиве есть и совпадает
+        по размеру (в zip-режиме — файл записан в индекс закрытого тома, при дедупликации —
+        в манифест ссылок), файл считается перемещенным. report_paths — как в move_files.
+        """
+        job, entries = MoveJournal.read(JOURNAL_FILE)
+        if job is None:
+            raise ValueError(f"журнал {JOURNAL_FILE} поврежден: нет параметров задания")
+        self.source_root = job["source_root"]
+        archive_base = job["archive"]
+        self.config["archive_format"] = job.get("format", "tree")
+        period = job.get("period")
+        journal = MoveJournal.reopen(JOURNAL_FILE)
+        
+        finished = []
+        jobs = []
+        reconciled = 0
+        for idx in sorted(entries):
+            entry = entries[idx]
+            src = entry["src"]
+            if entry["s"] == "deleted":
+                finished.append(MoveResult(src, entry.get("dst", ""), "УСПЕХ", "", entry.get("method", ""), entry.get("digest"),
+                                           entry.get("size")))
+            elif entry["s"] == "error":
+                finished.append(MoveResult(src, "", "ОШИБКА", entry.get("m", ""), entry.get("method", "")))
+            elif os.path.exists(self.normalize_long_path(src)):
+                jobs.append((idx, src))
+            elif entry["s"] == "verified":
+                # Копия уже проверена (и сброшена на диск), исходный файл успели удалить
+                result = MoveResult(src, entry.get("dst", ""), "УСПЕХ", "", entry.get("method", ""), entry.get("digest"),
+                                    entry.get("size"))
+                journal.record(idx, "deleted", dst=result.dest, method=result.method, digest=result.digest)
+                reconciled += 1
+                finished.append(result)
+            else:
+                # В zip-режиме непроверенная запись могла остаться в недописанном томе — ей не доверяем
+                dest_path = self._archive_path(src, archive_base)
+                size = entry.get("size")
+                arcname = os.path.relpath(src, self.source_root).replace(os.sep, '/')
+                volume = ContainerIndex.lookup(archive_base, arcname) if self.get_archive_format() == "zip" else None
+                link_target = None
+                if self.get_archive_format() == "tree" and not os.path.isfile(dest_path):
+                    # Дубликат мог быть записан только в манифест ссылок — на месте копии файла нет
+                    link_target = DedupIndex.lookup_link(archive_base, dest_path.replace('\\\\?\\', ''))
+                if volume is not None and os.path.isfile(os.path.join(archive_base, volume)):
+                    # Индекс тома пишется только после проверки закрытого тома — файл в архиве
+                    result = MoveResult(src, f"{os.path.join(archive_base, volume)}::{arcname}", "УСПЕХ", "",
+                                        entry.get("method", ""), entry.get("digest"), size)
+                    journal.record(idx, "deleted", dst=result.dest, method=result.method, digest=result.digest)
+                    reconciled += 1
+                elif (self.get_archive_format() == "tree" and os.path.isfile(dest_path)
+                        and (size is None or os.path.getsize(dest_path) == size)):
+                    result = MoveResult(src, dest_path.replace('\\\\?\\', ''), "УСПЕХ", "", entry.get("method", ""), entry.get("digest"),
+                                        size)
+                    journal.record(idx, "deleted", dst=result.dest, method=result.method, digest=result.digest)
+                    reconciled += 1
+                elif link_target is not None and os.path.isfile(self.normalize_long_path(link_target)):
+                    result = MoveResult(src, link_target, "УСПЕХ", "", "dedup-manifest", entry.get("digest"), size)
+                    journal.record(idx, "deleted", dst=result.dest, method=result.method, digest=result.digest)
+                    reconciled += 1
+                else:
+                    result = MoveResult(src, "", "ОШИБКА", "Исходный файл отсутствует, копии в архиве нет", "")
+                    journal.record(idx, "error", m=result.message)
+                finished.append(result)
+        
+        self.log(f"Продолжение перемещения по журналу: завершено ранее {len(finished) - reconciled}, "
+                 f"сверено с диском {reconciled}, осталось {len(jobs)}")
+        reports = self.open_move_reports(report_paths, archive_base, len(finished) + len(jobs))
+        return self._run_move(jobs, len(jobs), archive_base, journal, finished, period, reports)
+    
+    def extract_from_containers(self, archive_base, rel_path, target_dir):
+        """Извлечение одного файла из zip-томов по индексу; возвращает путь к извлеченному файлу"""
+        arcname = rel_path.replace(os.sep, '/').strip('/')
+        volume = ContainerIndex.lookup(archive_base, arcname)
+        if volume is None:
+            raise FileNotFoundError(f"файл '{rel_path}' не найден в индексах zip-томов папки {archive_base}")
+        with zipfile.ZipFile(os.path.join(archive_base, volume)) as zf:
+            extracted = zf.extract(arcname, target_dir)
+        self.log(f"Файл извлечен из тома {volume}: {extracted}", success=True)
+        return extracted
+    
+    def _ensure_directory(self, folder, created_dirs):
+        """Создание папки вместе с недостающими родителями (сверху вниз).
+        
+        created_dirs — кэш папок, которые уже есть: подъем к родителям останавливается
+        на первой известной папке, поэтому для уже созданной ветки системных вызовов нет.
+        """
+        missing = []
+        while folder not in created_dirs:
+            missing.append(folder)
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                break
+            folder = parent
+        for folder in reversed(missing):
+            try:
+                os.mkdir(folder)
+            except FileExistsError:
+                if not os.path.isdir(folder):
+                    raise
+            created_dirs.add(folder)
+    
+    def _archive_path(self, clean_src, archive_base):
+        """Путь файла в архиве (структура папок относительно source_root)"""
+        rel_path = os.path.relpath(clean_src, self.source_root)
+        return self.normalize_long_path(os.path.join(archive_base, rel_path))
+    
+    def _run_move(self, jobs, total, archive_base, journal=None, prior_results=(), period=None, reports=()):
+        """Конвейер перемещения: этап создания папок -> пул потоков копирования -> упорядоченный сбор результатов.
+        
+        jobs — пары (номер в журнале, путь к файлу); total — их число или None, если список
+        пополняется по ходу перемещения (поиск с перемещением). period — результат make_period
+        для повторной проверки даты файлов. reports — открытые MoveReport: результат пишется в них
+        сразу при сборе, отчеты закрываются (с итогами) и при отмене или ошибке. Возвращает MoveOutcome;
+        после отмены в результатах только обработанные файлы, а журнал сохраняется для продолжения.
+        """
+        results = list(prior_results)
+        success_count = sum(1 for r in results if r.status == "УСПЕХ")
+        error_count = len(results) - success_count
+        reports = list(reports)
+        
+        def write_reports(result):
+            # Ошибка записи отчета не должна прерывать сбор результатов — перемещение идет дальше
+            for report in list(reports):
+                try:
+                    report.add(result)
+                except (OSError, sqlite3.Error) as e:
+                    reports.remove(report)
+                    report.discard()
+                    self.log(f"Ошибка записи отчета {report.path}, запись прекращена: {str(e)}", error=True)
+        
+        for result in results:
+            write_reports(result)
+        start_time = datetime.datetime.now()
+        worker_count = self.get_int_option("copy_workers", 4, 1, 32)
+        metrics = RunMetrics("move", total)
+        to_zip = self.get_archive_format() == "zip"
+        async_io = bool(self.config.get("async_io", False))
+        if async_io and to_zip:
+            self.log("Zip-тома пишутся потоками сжатия: asyncio для них не используется")
+            async_io = False
+        async_limit = self.get_async_limit()
+        stage_count = 1 if async_io else worker_count  # потоков, которые разбирают очередь копирования
+        
+        copy_queue = queue.Queue(maxsize=async_limit * 4 if async_io else worker_count * 64)
+        done_queue = queue.Queue()
+        copier = FileCopier()
+        try:
+            same_device = not to_zip and os.stat(self.source_root).st_dev == os.stat(archive_base).st_dev
+        except OSError:
+            same_device = False
+        if same_device:
+            self.log("Исходная папка и архив на одном томе: файлы будут перемещаться переименованием")
+        container_index = None
+        if to_zip:
+            container_prefix = f"archive_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            volume_bytes = self.get_int_option("zip_volume_mb", 4096, 1, 1024 * 1024) * 1024 * 1024
+            container_index = ContainerIndex(os.path.join(archive_base, container_prefix + ContainerIndex.SUFFIX))
+            self.log(f"Файлы записываются в zip-тома {container_prefix}_*.zip (до {volume_bytes // (1024 * 1024)} МБ, "
+                     f"потоков сжатия: {worker_count})")
+        dedup = None
+        if self.config.get("dedup", False):
+            if to_zip:
+                self.log("Дедупликация работает только для формата 'структура папок' и в zip-томах не применяется")
+            else:
+                dedup = DedupIndex(archive_base)
+                if dedup.created:
+                    self.log("Индекс дедупликации создается: учет файлов, уже лежащих в архиве...")
+                    self.log(f"В индекс дедупликации добавлено файлов архива: {dedup.seed(archive_base)}")
+        hash_algorithm = self.get_hash_algorithm()
+        if hash_algorithm:
+            self.log(f"Проверка целостности по контрольной сумме {hash_algorithm}: считается при копировании, "
+                     f"копия перечитывается перед удалением исходного файла")
+        
+        scheduled = [0]  # файлов передано в перемещение (для total=None)
+        
+        def directory_stage():
+            """Расчет путей в архиве и создание папок назначения (каждая папка — один раз за перемещение)"""
+            created_dirs = {self.normalize_long_path(archive_base)}
+            try:
+                for seq, (journal_idx, clean_src) in enumerate(jobs, 1):
+                    if self.cancel_flag:
+                        break
+                    scheduled[0] = seq
+                    try:
+                        if to_zip:
+                            # В zip-томе — тот же относительный путь, с разделителем '/'
+                            dest_path = os.path.relpath(clean_src, self.source_root).replace(os.sep, '/')
+                        else:
+                            dest_path = self._archive_path(clean_src, archive_base)
+                            dest_dir = os.path.dirname(dest_path)
+                            if dest_dir not in created_dirs:
+                                mkdir_started = time.perf_counter()
+                                self._ensure_directory(dest_dir, created_dirs)
+                                metrics.add(mkdir=time.perf_counter() - mkdir_started)
+                    except Exception as e:
+                        done_queue.put((seq, journal_idx, MoveResult(clean_src, "", "ОШИБКА", str(e)[:100], "")))
+                        continue
+                    copy_queue.put((seq, journal_idx, clean_src, dest_path))
+            finally:
+                for _ in range(stage_count):
+                    copy_queue.put(None)
+        
+        def copy_worker():
+            """Копирование, проверка и удаление исходного файла"""
+            while True:
+                item = copy_queue.get()
+                if item is None:
+                    done_queue.put(None)
+                    return
+                seq, journal_idx, clean_src, dest_path = item
+                if self.cancel_flag:
+                    continue
+                journal_state = None
+                if journal is not None:
+                    journal_state = lambda state, idx=journal_idx, **info: journal.record(idx, state, **info)
+                result = self._move_one(clean_src, dest_path, copier, same_device, metrics, hash_algorithm, journal_state,
+                                        dedup, period)
+                done_queue.put((seq, journal_idx, result))
+        
+        def async_copy_stage():
+            """Перемещение через asyncio: файлы переносятся в пуле потоков, одновременно —
+            не больше async_per_mount операций на том исходной папки и на том архива"""
+            try:
+                asyncio.run(copy_async())
+            finally:
+                done_queue.put(None)
+        
+        async def copy_async():
+            loop = asyncio.get_running_loop()
+            mounts = sorted({mount_key(self.source_root), mount_key(archive_base)})
+            limits = [asyncio.Semaphore(async_limit) for _ in mounts]
+            self.log(f"Перемещение через asyncio: до {async_limit} операций одновременно на том ({', '.join(mounts)})")
+            tasks = set()
+            
+            async def move(seq, journal_idx, clean_src, dest_path):
+                journal_state = None
+                if journal is not None:
+                    journal_state = lambda state, idx=journal_idx, **info: journal.record(idx, state, **info)
+                try:
+                    result = await loop.run_in_executor(executor, self._move_one, clean_src, dest_path, copier, same_device,
+                                                        metrics, hash_algorithm, journal_state, dedup, period)
+                except Exception as e:
+                    result = MoveResult(clean_src, "", "ОШИБКА", str(e)[:100], "")
+                finally:
+                    for limit in limits:
+                        limit.release()
+                done_queue.put((seq, journal_idx, result))
+            
+            with concurrent.futures.ThreadPoolExecutor(async_limit * len(limits), thread_name_prefix="archive_copy") as executor:
+                while True:
+                    item = await loop.run_in_executor(None, copy_queue.get)
+                    if item is None:
+                        break
+                    if self.cancel_flag:
+                        continue
+                    # Семафоры томов берутся всегда в одном порядке — взаимной блокировки нет
+                    for limit in limits:
+                        await limit.acquire()
+                    task = loop.create_task(move(*item))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                if tasks:
+                    await asyncio.wait(tasks)
+        
+        def zip_worker(worker_id):
+            """Запись в свои zip-тома; исходные файлы удаляются после закрытия и проверки тома"""
+            writer = ZipVolumeWriter(archive_base, container_prefix, worker_id, volume_bytes)
+            in_volume = []
+            
+            def finish_volume():
+                started = time.perf_counter()
+                try:
+                    checked = writer.finish_volume(hash_algorithm)
+                except Exception as e:
+                    checked = {item[3]: (None, str(e)[:100]) for item in in_volume}
+                verified = time.perf_counter()
+                volume_name = os.path.basename(writer.volume_path)
+                rows = []
+                for seq, journal_idx, clean_src, arcname, fields, method, digest in in_volume:
+                    compress_size, error = checked.get(arcname, (None, "Файл не найден в томе"))
+                    if error is None:
+                        rows.append((arcname, volume_name, fields[0], compress_size, digest))
+                    else:
+                        done_queue.put((seq, journal_idx, MoveResult(clean_src, "", "ОШИБКА", error, method, digest)))
+                # Индекс тома сохраняется до удаления исходных файлов
+                container_index.add_volume(rows)
+                indexed = {row[0] for row in rows}
+                in_volume[:] = [item for item in in_volume if item[3] in indexed]
+                if journal is not None:
+                    # Состояние verified должно быть на диске раньше, чем исчезнут исходные файлы
+                    for seq, journal_idx, clean_src, arcname, fields, method, digest in in_volume:
+                        journal.record(journal_idx, "verified", dst=f"{writer.volume_path}::{arcname}", method=method,
+                                       digest=digest)
+                    journal.flush()
+                for seq, journal_idx, clean_src, arcname, fields, method, digest in in_volume:
+                    dest = f"{writer.volume_path}::{arcname}"
+                    try:
+                        os.remove(self.normalize_long_path(clean_src))
+                        if journal is not None:
+                            journal.record(journal_idx, "deleted", dst=dest, method=method, digest=digest)
+                        result = MoveResult(clean_src, dest, "УСПЕХ", "", method, digest, *fields)
+                    except Exception as e:
+                        result = MoveResult(clean_src, "", "ОШИБКА", str(e)[:100], method, digest)
+                    done_queue.put((seq, journal_idx, result))
+                metrics.add(verify=verified - started, delete=time.perf_counter() - verified)
+                in_volume.clear()
+            
+            while True:
+                item = copy_queue.get()
+                if item is None:
+                    if in_volume:
+                        finish_volume()
+                    done_queue.put(None)
+                    return
+                seq, journal_idx, clean_src, arcname = item
+                if self.cancel_flag:
+                    continue
+                method = "zip"
+                try:
+                    src_norm = self.normalize_long_path(clean_src)
+                    src_stat = os.stat(src_norm)
+                    self._check_period(src_stat, period)
+                    started = time.perf_counter()
+                    method, digest = writer.add(src_norm, arcname, src_stat, hash_algorithm)
+                    metrics.add(byte_count=src_stat.st_size, copy=time.perf_counter() - started)
+                    if journal is not None:
+                        journal.record(journal_idx, "copied", size=src_stat.st_size)
+                    in_volume.append((seq, journal_idx, clean_src, arcname, stat_fields(src_stat), method, digest))
+                except Exception as e:
+                    done_queue.put((seq, journal_idx, MoveResult(clean_src, "", "ОШИБКА", str(e)[:100], method)))
+                if writer.full():
+                    finish_volume()
+        
+        threads = [threading.Thread(target=self._thread_target(directory_stage), daemon=True)]
+        if to_zip:
+            threads += [threading.Thread(target=self._thread_target(zip_worker), args=(i + 1,), daemon=True)
+                        for i in range(worker_count)]
+        elif async_io:
+            threads.append(threading.Thread(target=self._thread_target(async_copy_stage), daemon=True))
+        else:
+            threads += [threading.Thread(target=self._thread_target(copy_worker), daemon=True) for _ in range(worker_count)]
+        if self.profiler is not None:
+            self.profiler.wrap_object(copier, ["copy", "copy_hashed", "hash_file"], "copier")
+            self.profiler.wrap_object(journal, ["record"], "journal")
+            self.profiler.wrap_object(dedup, ["candidates", "add"], "dedup_index")
+        for t in threads:
+            t.start()
+        
+        def record(seq, journal_idx, result):
+            if journal is not None:
+                if result.status != "УСПЕХ":
+                    journal.record(journal_idx, "error", m=result.message, method=result.method)
+                journal.maybe_flush()
+            write_reports(result)
+            return self._record_move_result(seq, total, result, results, success_count, error_count, metrics)
+        
+        # Результаты выдаются строго в порядке списка файлов
+        waiting = {}
+        next_seq = 1
+        finished_workers = 0
+        try:
+            while finished_workers < stage_count:
+                item = done_queue.get()
+                if item is None:
+                    finished_workers += 1
+                    continue
+                waiting[item[0]] = item[1:]
+                while next_seq in waiting:
+                    success_count, error_count = record(next_seq, *waiting.pop(next_seq))
+                    next_seq += 1
+            
+            # После отмены часть файлов пропущена — оставшиеся результаты выдаются по возрастанию номера
+            for seq in sorted(waiting):
+                success_count, error_count = record(seq, *waiting[seq])
+        finally:
+            if container_index is not None:
+                container_index.close()
+            if dedup is not None:
+                dedup.close()
+                if dedup.saved_files:
+                    self.log(f"Дубликатов не скопировано: {dedup.saved_files}, "
+                             f"сэкономлено {dedup.saved_bytes / (1024 * 1024):.1f} МБ", success=True)
+            if journal is not None:
+                completed = (not self.cancel_flag and
+                             len(results) - len(prior_results) == (total if total is not None else scheduled[0]))
+                try:
+                    journal.close(finished=completed)
+                except OSError as e:
+                    self.log(f"Ошибка записи журнала перемещения: {str(e)}", error=True)
+                if not completed:
+                    self.log(f"Журнал перемещения сохранен: {JOURNAL_FILE} — перемещение можно продолжить")
+            metrics.finish()
+            for report in reports:
+                try:
+                    report.close(metrics)
+                except (OSError, sqlite3.Error) as e:
+                    self.log(f"Ошибка записи отчета о перемещении: {str(e)}", error=True)
+        
+        self.log(f"Метрики перемещения: {metrics.summary_text()}")
+        duration = (datetime.datetime.now() - start_time).total_seconds()
+        return MoveOutcome(results, success_count, error_count, duration, archive_base, metrics)
+    
+    @staticmethod
+    def make_period(time_type, start_dt, end_dt):
+        """Период поиска для проверки перед перемещением: [атрибут stat, начало, конец в секундах эпохи]"""
+        return [TIME_ATTRS.get(time_type, "st_mtime"), start_dt.timestamp(), end_dt.timestamp()]
+    
+    @staticmethod
+    def _check_period(src_stat, period):
+        """Ошибка, если дата файла вышла из периода поиска (файл изменен после поиска)"""
+        if period is not None and not period[1] <= getattr(src_stat, period[0]) <= period[2]:
+            raise Exception("Дата файла вне периода поиска: файл изменен после поиска и не перемещается")
+    
+    def _find_duplicate(self, src_norm, size, dedup, copier):
+        """Поиск в архиве файла с тем же содержимым: размер -> частичная сумма -> полная сумма.
+        
+        Возвращает (путь в архиве или None, частичная сумма, полная сумма); суммы исходного
+        файла считаются только при наличии кандидатов и пригодятся для записи в индекс.
+        """
+        src_partial = src_digest = None
+        for path, mtime_ns, partial, digest in dedup.candidates(size):
+            path_norm = self.normalize_long_path(path)
+            try:
+                st = os.stat(path_norm)
+            except OSError:
+                dedup.forget(path)
+                continue
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                dedup.forget(path)
+                continue
+            if src_partial is None:
+                src_partial = DedupIndex.partial_hash(src_norm, size)
+            if partial is None:
+                partial = DedupIndex.partial_hash(path_norm, size)
+                dedup.update(path, "partial", partial)
+            if partial != src_partial:
+                continue
+            if src_digest is None:
+                src_digest = copier.hash_file(src_norm, DedupIndex.ALGORITHM)
+            if digest is None:
+                digest = copier.hash_file(path_norm, DedupIndex.ALGORITHM)
+                dedup.update(path, "digest", digest)
+            if digest == src_digest:
+                return path, src_partial, src_digest
+        return None, src_partial, src_digest
+    
+    def _store_duplicate(self, target, dest_path, size, dedup):
+        """Жесткая ссылка dest_path на target (или запись манифеста); возвращает (способ, путь для отчета)"""
+        clean_dest = dest_path.replace('\\\\?\\', '')
+        if os.path.normcase(target) == os.path.normcase(clean_dest):
+            # Тот же файл уже лежит в архиве по этому пути
+            dedup.note_saved(size)
+            return "dedup-same", clean_dest
+        temp_path = dest_path + ".dedup_tmp"
+        try:
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            os.link(self.normalize_long_path(target), temp_path)
+            os.replace(temp_path, dest_path)
+        except OSError:
+            dedup.add_link(clean_dest, target, size)
+            return "dedup-manifest", target
+        dedup.note_saved(size)
+        return "dedup-hardlink", clean_dest
+    
+    def _move_one(self, clean_src, dest_path, copier, same_device, metrics, hash_algorithm=None, journal_state=None,
+                  dedup=None, period=None):
+        """Перемещение одного файла: переименование в пределах тома либо копирование, проверка, удаление исходника.
+        
+        С hash_algorithm копия проверяется контрольной суммой, посчитанной при копировании:
+        перечитывается только копия (для reflink — не перечитывается, блоки общие с источником).
+        Переименование данные не переносит, поэтому сумма для него не считается.
+        journal_state(state, **info) получает смены состояний для журнала; с журналом копия
+        сбрасывается на диск (fsync) до удаления исходного файла. С dedup (DedupIndex) файл,
+        содержимое которого уже есть в архиве, не копируется, а связывается с хранящимся.
+        С period (make_period) файл, дата которого вышла из периода поиска, не перемещается.
+        """
+        method = ""
+        perf_counter = time.perf_counter
+        try:
+            src_norm = self.normalize_long_path(clean_src)
+            src_stat = os.stat(src_norm)
+            self._check_period(src_stat, period)
+            
+            partial = dedup_digest = None
+            if dedup is not None and src_stat.st_size >= DedupIndex.MIN_SIZE:
+                started = perf_counter()
+                target, partial, dedup_digest = self._find_duplicate(src_norm, src_stat.st_size, dedup, copier)
+                if target is not None:
+                    method, stored_path = self._store_duplicate(target, dest_path, src_stat.st_size, dedup)
+                    if method == "dedup-hardlink":
+                        target_stat = os.stat(self.normalize_long_path(target))
+                        dedup.add(stored_path, src_stat.st_size, target_stat.st_mtime_ns, partial, dedup_digest)
+                    digest = None
+                    if hash_algorithm:
+                        digest = dedup_digest if hash_algorithm == DedupIndex.ALGORITHM else copier.hash_file(src_norm, hash_algorithm)
+                    verified = perf_counter()
+                    if journal_state is not None:
+                        journal_state("verified", dst=stored_path, method=method, digest=digest)
+                    os.remove(src_norm)
+                    if journal_state is not None:
+                        journal_state("deleted", dst=stored_path, method=method, digest=digest)
+                    metrics.add(verify=verified - started, delete=perf_counter() - verified)
+                    return MoveResult(clean_src, stored_path, "УСПЕХ", "", method, digest, *stat_fields(src_stat))
+            
+            # Тот же том: атомарное переименование вместо копирования
+            if same_device:
+                started = perf_counter()
+                try:
+                    os.replace(src_norm, dest_path)
+                    method = "rename"
+                except OSError:
+                    method = ""
+                if method:
+                    copied = perf_counter()
+                    if os.path.getsize(dest_path) != src_stat.st_size:
+                        raise Exception("Ошибка целостности: размеры не совпадают")
+                    metrics.add(byte_count=src_stat.st_size, copy=copied - started, verify=perf_counter() - copied)
+                    if dedup is not None and src_stat.st_size >= DedupIndex.MIN_SIZE:
+                        dedup.add(dest_path.replace('\\\\?\\', ''), src_stat.st_size, src_stat.st_mtime_ns,
+                                  partial, dedup_digest)
+                    if journal_state is not None:
+                        journal_state("deleted", dst=dest_path.replace('\\\\?\\', ''), method=method)
+                    return MoveResult(clean_src, dest_path.replace('\\\\?\\', ''), "УСПЕХ", "", method, None,
+                                      *stat_fields(src_stat))
+            
+            # Путь в архиве может быть жесткой ссылкой дедупликации (в том числе с прошлого запуска):
+            # запись в него изменила бы все связанные копии, поэтому ссылка снимается и копия пишется в новый файл
+            try:
+                if os.lstat(dest_path).st_nlink > 1:
+                    os.unlink(dest_path)
+            except FileNotFoundError:
+                pass
+            
+            started = perf_counter()
+            digest = None
+            if hash_algorithm:
+                method, digest = copier.copy_hashed(src_norm, dest_path, src_stat, hash_algorithm)
+            else:
+                method = copier.copy(src_norm, dest_path, src_stat)
+            shutil.copystat(src_norm, dest_path)
+            copied = perf_counter()
+            if journal_state is not None:
+                journal_state("copied", size=src_stat.st_size)
+            
+            if os.path.getsize(src_norm) != os.path.getsize(dest_path):
+                raise Exception("Ошибка целостности: размеры не совпадают")
+            if digest is not None and method != "reflink":
+                if copier.hash_file(dest_path, hash_algorithm) != digest:
+                    raise Exception("Ошибка целостности: контрольные суммы не совпадают")
+            if journal_state is not None:
+                # Копия должна пережить сбой питания раньше, чем исчезнет исходный файл
+                with open(dest_path, 'r+b') as f:
+                    os.fsync(f.fileno())
+                journal_state("verified", dst=dest_path.replace('\\\\?\\', ''), method=method, digest=digest)
+            verified = perf_counter()
+            
+            os.remove(src_norm)
+            if journal_state is not None:
+                journal_state("deleted", dst=dest_path.replace('\\\\?\\', ''), method=method, digest=digest)
+            if dedup is not None and src_stat.st_size >= DedupIndex.MIN_SIZE:
+                if dedup_digest is None and hash_algorithm == DedupIndex.ALGORITHM:
+                    dedup_digest = digest
+                dedup.add(dest_path.replace('\\\\?\\', ''), src_stat.st_size, os.stat(dest_path).st_mtime_ns,
+                          partial, dedup_digest)
+            metrics.add(byte_count=src_stat.st_size, copy=copied - started, verify=verified - copied,
+                        delete=perf_counter() - verified)
+            return MoveResult(clean_src, dest_path.replace('\\\\?\\', ''), "УСПЕХ", "", method, digest,
+                              *stat_fields(src_stat))
+        except Exception as e:
+            return MoveResult(clean_src, "", "ОШИБКА", str(e)[:100], method)
+    
+    def _record_move_result(self, idx, total, result, results, success_count, error_count, metrics):
+        """Учет результата перемещения одного файла (вызывается в порядке списка)"""
+        results.append(result)
+        clean_src, status, error_msg = result.source, result.status, result.message
+        if status == "УСПЕХ":
+            success_count += 1
+            metrics.add(files=1)
+            self.log(f"[{idx}/{total or '?'}] Перемещен: {os.path.basename(clean_src)}")
+        else:
+            error_count += 1
+            metrics.add(files=1, errors=1)
+            self.log(f"Ошибка перемещения {os.path.basename(clean_src)}: {error_msg}", error=True)
+        
+        if metrics.progress_due(self.PROGRESS_INTERVAL):
+            self.report_progress(metrics)
+        return success_count, error_count
+    
+    def save_search_report_txt(self, path, results, time_type, start_dt, end_dt, skipped_by_path):
+        """Сохранение отчета о поиске в формате TXT"""
+        with open(path, 'w', encoding='utf-8', buffering=ReportWriter.BUFFER_SIZE) as f:
+            f.write("="*80 + "\n")
+            f.write("ОТЧЕТ О НАЙДЕННЫХ ФАЙЛАХ (Поиск)\n")
+            f.write("="*80 + "\n")
+            f.write(f"Дата формирования: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n")
+            f.write(f"Исходная папка: {self.source_root}\n")
+            f.write(f"Тип даты: {time_type}\n")
+            f.write(f"Период поиска: с {start_dt.strftime('%d.%m.%Y %H:%M')} по {end_dt.strftime('%d.%m.%Y %H:%M')}\n")
+            f.write(f"Найдено файлов: {len(results)}\n")
+            f.write("\nПАРАМЕТРЫ ИСКЛЮЧЕНИЙ:\n")
+            f.write(f"  Пропускать скрытые: {'Да' if self.config.get('skip_hidden', True) else 'Нет'}\n")
+            f.write(f"  Маски файлов: {self.config.get('exclude_files', '')}\n")
+            f.write(f"  Маски папок: {self.config.get('exclude_dirs', '')}\n")
+            f.write(f"  Исключенные ПОЛНЫЕ ПУТИ к папкам:\n")
+            if self.config.get('exclude_paths', '').strip():
+                for path in self.config.get('exclude_paths', '').split(','):
+                    f.write(f"    • {path.strip()}\n")
+            else:
+                f.write("    (нет)\n")
+            f.write(f"  Исключать файлы меньше: {self.get_min_size_kb() if self.config.get('exclude_small', False) else 'НЕТ'} КБ\n")
+            f.write(f"  Системные папки ($RECYCLE.BIN и др.) всегда исключаются\n")
+            f.write(f"\nСТАТИСТИКА ПРОПУСКОВ:\n")
+            f.write(f"  По полным путям: {skipped_by_path} папок (полностью)\n")
+            f.write("="*80 + "\n\n")
+            f.write("ВАЖНО: Это отчет ТОЛЬКО о найденных файлах. Файлы НЕ были перемещены!\n")
+            f.write("Для перемещения вернитесь в программу и нажмите 'Переместить в архив'\n\n")
+            f.write("-"*80 + "\n")
+            
+            separator = "-"*80
+            for src, dt in results:
+                f.write(f"Путь: {src}\nДата: {dt.strftime('%d.%m.%Y %H:%M:%S')}\n{separator}\n")
+    
+    def save_search_report_json(self, path, results, time_type, start_dt, end_dt, skipped_by_path, metrics=None):
+        """Сохранение машиночитаемого отчета о поиске: JSON, NDJSON (.ndjson/.jsonl), CSV или SQLite (.sqlite/.db).
+        
+        Записи пишутся по одной по мере чтения результатов, отчет не собирается в памяти.
+        Кроме даты поиска (date) в записи — размер и все три временные метки файла на момент поиска.
+        """
+        metadata = {
+            "generated": datetime.datetime.now().isoformat(),
+            "source_folder": self.source_root,
+            "time_type": time_type,
+            "period_start": start_dt.isoformat(),
+            "period_end": end_dt.isoformat(),
+            "total_found": len(results),
+            "search_params": self.search_params(),
+            "statistics": {
+                "skipped_by_path": skipped_by_path
+            }
+        }
+        sections = {"metrics": metrics.snapshot()} if metrics is not None else None
+        if hasattr(results, "iter_details"):
+            details = results.iter_details()
+        else:
+            details = ((src, dt.timestamp(), None, None, None, None) for src, dt in results)
+        fields = ("path", "date", "size", "mtime", "atime", "ctime")
+        with open_report_writer(path, fields, metadata, sections) as writer:
+            write = writer.write
+            for src, timestamp, size, mtime, atime, ctime in details:
+                write((src, iso_time(timestamp), size, iso_time(mtime), iso_time(atime), iso_time(ctime)))
+    
+    def save_move_report_txt(self, path, results, archive_path, success, errors, duration):
+        """Сохранение отчета о перемещении в формате TXT"""
+        with open(path, 'w', encoding='utf-8', buffering=ReportWriter.BUFFER_SIZE) as f:
+            f.write("="*80 + "\n")
+            f.write("ОТЧЕТ О ПЕРЕМЕЩЕНИИ ФАЙЛОВ В АРХИВ\n")
+            f.write("="*80 + "\n")
+            f.write(f"Дата: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n")
+            f.write(f"Исходная папка: {self.source_root}\n")
+            f.write(f"Папка архива: {archive_path}\n")
+            f.write(f"Время операции: {duration:.1f} секунд\n")
+            f.write(f"Успешно перемещено: {success}\n")
+            f.write(f"Ошибок: {errors}\n")
+            f.write("Способы копирования: " + (", ".join(f"{m}={c}" for m, c in self.count_copy_methods(results).items()) or "—") + "\n")
+            f.write(f"Проверка целостности: {'контрольная сумма ' + self.get_hash_algorithm() if self.get_hash_algorithm() else 'по размеру'}\n")
+            f.write("\nПАРАМЕТРЫ ИСКЛЮЧЕНИЙ ПРИ ПОИСКЕ:\n")
+            f.write(f"  Пропускать скрытые: {'Да' if self.config.get('skip_hidden', True) else 'Нет'}\n")
+            f.write(f"  Маски файлов: {self.config.get('exclude_files', '')}\n")
+            f.write(f"  Маски папок: {self.config.get('exclude_dirs', '')}\n")
+            f.write(f"  Исключенные ПОЛНЫЕ ПУТИ к папкам:\n")
+            if self.config.get('exclude_paths', '').strip():
+                for path in self.config.get('exclude_paths', '').split(','):
+                    f.write(f"    • {path.strip()}\n")
+            else:
+                f.write("    (нет)\n")
+            f.write(f"  Исключать файлы меньше: {self.get_min_size_kb() if self.config.get('exclude_small', False) else 'НЕТ'} КБ\n")
+            f.write("="*80 + "\n\n")
+            f.write("ДЕТАЛИ ПО КАЖДОМУ ФАЙЛУ:\n")
+            f.write("-"*80 + "\n")
+            separator = "-"*80
+            hash_algorithm = self.get_hash_algorithm()
+            for src, dest, status, msg, method, digest, *_ in results:
+                lines = [f"Статус: {status}", f"Исходный путь: {src}"]
+                if status == "УСПЕХ":
+                    lines.append(f"Путь в архиве: {dest}")
+                    lines.append(f"Способ копирования: {method}")
+                    if digest:
+                        lines.append(f"Контрольная сумма ({hash_algorithm}): {digest}")
+                if msg:
+                    lines.append(f"Ошибка: {msg}")
+                lines.append(separator)
+                f.write("\n".join(lines) + "\n")
+    
+    def count_copy_methods(self, results):
+        """Сколько файлов перенесено каждым способом (rename, reflink, copy_file_range, ...)"""
+        counts = collections.Counter(r.method for r in results if r.status == "УСПЕХ")
+        return dict(counts.most_common())
+    
+    def open_move_report(self, path, archive_path, total_files=None):
+        """Машиночитаемый отчет о перемещении (MoveReport): JSON, NDJSON (.ndjson/.jsonl), CSV или SQLite (.sqlite/.db).
+        
+        total_files — сколько файлов запланировано (None, если список пополняется по ходу поиска);
+        число записанных файлов, успешных, ошибок и способы копирования — в итоговом блоке.
+        """
+        metadata = {
+            "generated": datetime.datetime.now().isoformat(),
+            "source_folder": self.source_root,
+            "archive_folder": archive_path,
+            "total_files": total_files,
+            "verify_mode": "hash" if self.get_hash_algorithm() else "size",
+            "hash_algorithm": self.get_hash_algorithm(),
+            "search_params": self.search_params()
+        }
+        return MoveReport(path, metadata)
+    
+    def open_move_reports(self, paths, archive_path, total_files=None):
+        """Отчеты для записи по ходу перемещения; если один не открылся, уже открытые закрываются"""
+        reports = []
+        try:
+            for path in paths:
+                reports.append(self.open_move_report(path, archive_path, total_files))
+        except BaseException:
+            for report in reports:
+                report.close()
+            raise
+        return reports
+    
+    def save_move_report_json(self, path, results, archive_path, metrics=None):
+        """Сохранение машиночитаемого отчета о перемещении по готовому списку результатов (один проход).
+        
+        Для отчета, путь к которому известен заранее, лучше передать его в move_files (report_paths):
+        тогда записи пишутся по ходу перемещения. Этот способ нужен, когда файл отчета выбирают
+        после перемещения (диалог сохранения в интерфейсе).
+        """
+        report = self.open_move_report(path, archive_path, len(results))
+        try:
+            for result in results:
+                report.add(result)
+        finally:
+            report.close(metrics)
+
+class MatchList(list):
+    """Совпадения порции обхода в процессе-обходчике (приемник для ScanStats)"""
+    add_batch = list.extend
+
+_scan_worker = None  # (движок, правила) процесса-обходчика
+
+def scan_process_init(config, source_root, start_dt, end_dt, time_type):
+    """Инициализация процесса-обходчика: правила строятся из настроек заново (маски не передаются между процессами)"""
+    global _scan_worker
+    engine = ArchiveEngine(config)
+    engine.source_root = source_root
+    _scan_worker = (engine, engine.make_scan_rules(start_dt, end_dt, time_type))
+
+def scan_process_unit(dirs, max_dirs, max_seconds):
+    """Обход порции папок в процессе-обходчике.
+    
+    Возвращает (совпадения, счетчики ScanStats, (файлы, папки, байты, ошибки), время фаз,
+    необойденные папки, сообщения об ошибках).
+    """
+    engine, rules = _scan_worker
+    messages = []
+    engine.log_callback = lambda message, error=False, success=False: messages.append(message)
+    rules.metrics = RunMetrics("search")
+    stats = ScanStats(MatchList())
+    stack = list(reversed(dirs))
+    deadline = time.perf_counter() + max_seconds
+    done = 0
+    while stack and done < max_dirs and time.perf_counter() < deadline:
+        stack.extend(reversed(engine._process_directory(stack.pop(), rules, stats)))
+        done += 1
+    matches, stats.results = stats.results, None
+    metrics = rules.metrics
+    return (matches, stats, (metrics.files, metrics.dirs, metrics.bytes, metrics.errors), metrics.phases,
+            stack, messages)
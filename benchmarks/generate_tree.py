@@ -0,0 +1,115 @@
+import os
+import sys
+import random
+import argparse
+import datetime
+
+# Параметры дерева по умолчанию; одинаковые параметры и seed дают одинаковое дерево
+DEFAULT_PARAMS = {
+    "depth": 4,
+    "fanout": 4,
+    "files_per_dir": 20,
+    "size_median_kb": 16,
+    "size_sigma": 1.5,
+    "max_size_kb": 64 * 1024,
+    "days_spread": 3 * 365,
+    "hidden_ratio": 0.05,
+    "excluded_ratio": 0.1,
+    "duplicate_ratio": 0.1,
+    "seed": 1
+}
+
+# Папки, которые пропускаются правилами исключений по умолчанию (и раздувают реальные шары)
+EXCLUDED_DIRS = ["node_modules", ".git", "__pycache__", "build"]
+EXTENSIONS = [".docx", ".xlsx", ".pdf", ".txt", ".jpg", ".png", ".zip", ".csv", ".log", ".tmp", ".bin"]
+BLOCK_SIZE = 1024 * 1024
+FILE_ATTRIBUTE_HIDDEN = 0x2
+
+def file_size(rng, params):
+    """Размер файла: логнормальное распределение (много мелких, немного крупных)"""
+    size = int(rng.lognormvariate(0, params["size_sigma"]) * params["size_median_kb"] * 1024)
+    return min(size, params["max_size_kb"] * 1024)
+
+def write_file(path, size, block, offset):
+    """Содержимое — срез общего случайного блока со сдвигом: быстро и без совпадений между файлами"""
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            start = (offset + written) % (len(block) // 2)
+            chunk = min(size - written, len(block) - start)
+            f.write(block[start:start + chunk])
+            written += chunk
+
+def mark_hidden(path):
+    """Скрытый атрибут на Windows (движок определяет скрытые файлы только по нему).
+    
+    На других ОС скрытые файлы отличаются лишь точкой в имени, и движок их не пропускает.
+    """
+    if os.name == 'nt':
+        import ctypes
+        if not ctypes.windll.kernel32.SetFileAttributesW(path, FILE_ATTRIBUTE_HIDDEN):
+            raise ctypes.WinError()
+
+def generate_tree(root, reference=None, **overrides):
+    """Генерация синтетического дерева в root; возвращает статистику (файлы, папки, байты)"""
+    params = dict(DEFAULT_PARAMS)
+    params.update(overrides)
+    rng = random.Random(params["seed"])
+    block = rng.randbytes(BLOCK_SIZE)
+    now = (reference or datetime.datetime.now()).timestamp()
+    spread = params["days_spread"] * 86400
+    stats = {"files": 0, "dirs": 0, "bytes": 0, "hidden": 0, "excluded_files": 0, "duplicates": 0}
+    previous = []  # уже записанные (размер, сдвиг) — источник дубликатов
+    
+    def fill(folder, level, excluded):
+        os.makedirs(folder, exist_ok=True)
+        stats["dirs"] += 1
+        for i in range(params["files_per_dir"]):
+            hidden = rng.random() < params["hidden_ratio"]
+            name = f"{'.' if hidden else ''}file_{level}_{i}{rng.choice(EXTENSIONS)}"
+            if previous and rng.random() < params["duplicate_ratio"]:
+                size, offset = rng.choice(previous)
+                stats["duplicates"] += 1
+            else:
+                size, offset = file_size(rng, params), rng.randrange(BLOCK_SIZE // 2)
+                previous.append((size, offset))
+            path = os.path.join(folder, name)
+            write_file(path, size, block, offset)
+            mtime = now - rng.uniform(0, spread)
+            os.utime(path, (mtime, mtime))
+            if hidden:
+                mark_hidden(path)
+            stats["files"] += 1
+            stats["bytes"] += size
+            stats["hidden"] += hidden
+            stats["excluded_files"] += excluded
+        if level >= params["depth"]:
+            return
+        for d in range(params["fanout"]):
+            fill(os.path.join(folder, f"dir_{level}_{d}"), level + 1, excluded)
+        if rng.random() < params["excluded_ratio"]:
+            fill(os.path.join(folder, rng.choice(EXCLUDED_DIRS)), level + 1, True)
+    
+    fill(root, 0, False)
+    return stats
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Генератор синтетического дерева файлов для замеров производительности")
+    parser.add_argument("root", help="папка, в которой создается дерево")
+    for key, value in DEFAULT_PARAMS.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=type(value), default=value,
+                            help=f"по умолчанию {value}")
+    return parser
+
+def main(argv=None):
+    args = vars(build_parser().parse_args(argv))
+    root = args.pop("root")
+    stats = generate_tree(root, **args)
+    print(f"Создано: файлов {stats['files']}, папок {stats['dirs']}, {stats['bytes'] / (1024 * 1024):.1f} МБ "
+          f"(скрытых {stats['hidden']}, в исключаемых папках {stats['excluded_files']}, дубликатов {stats['duplicates']})")
+    if os.name != 'nt':
+        print("Скрытые файлы отмечены только точкой в имени: пропуск скрытых на этой ОС не замеряется")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_engine import ArchiveEngine, DEFAULT_CONFIG  # noqa: E402
+from generate_tree import generate_tree, DEFAULT_PARAMS  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Даты файлов дерева отсчитываются от фиксированного дня, чтобы узкий период находил одно и то же
+REFERENCE_DATE = datetime.datetime(2024, 1, 1)
+
+# Наборы параметров дерева: small — быстрый прогон, medium/large — ближе к рабочим шарам
+PRESETS = {
+    "small": {"depth": 3, "fanout": 4, "files_per_dir": 20},
+    "medium": {"depth": 4, "fanout": 5, "files_per_dir": 40},
+    "large": {"depth": 5, "fanout": 6, "files_per_dir": 40}
+}
+
+# Замеры: имя -> (что делается, изменения настроек движка)
+BENCHMARKS = {
+    "scan": ("поиск за весь период без исключений", {"skip_hidden": False, "exclude_files": "", "exclude_dirs": ""}),
+    "scan_parallel": ("то же, параллельный обход", {"skip_hidden": False, "exclude_files": "", "exclude_dirs": "",
+                                                    "scan_threads": 8}),
+    "scan_processes": ("то же, обход в нескольких процессах", {"skip_hidden": False, "exclude_files": "",
+                                                              "exclude_dirs": "", "scan_processes": max(2, os.cpu_count() or 1)}),
+    "scan_async": ("то же, обход через asyncio", {"skip_hidden": False, "exclude_files": "", "exclude_dirs": "",
+                                                  "async_io": True}),
+    "filter": ("поиск с исключениями и узким периодом", {"exclude_small": True, "min_size_kb": 4}),
+    "move_tree": ("перемещение со структурой папок", {"archive_format": "tree"}),
+    "move_hash": ("перемещение с проверкой контрольной суммой", {"archive_format": "tree", "verify_mode": "hash"}),
+    "move_async": ("перемещение со структурой папок через asyncio", {"archive_format": "tree", "async_io": True}),
+    "move_zip": ("перемещение в zip-тома", {"archive_format": "zip"}),
+    "scan_move": ("поиск и перемещение одновременно (со структурой папок)", {"archive_format": "tree"}),
+    "report": ("отчеты о поиске: JSON, NDJSON, CSV, SQLite, TXT", {})
+}
+
+# Замеры перемещения со структурой папок: на одном томе с деревом они измеряют переименование, а не копирование
+RENAME_SENSITIVE = {"move_tree", "move_hash", "move_async", "scan_move"}
+
+def peak_rss_bytes():
+    """Пиковый объем памяти процесса"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+    return None
+
+def run_one(name, workdir, tree_params, archive_dir, connection):
+    """Один замер в отдельном процессе, чтобы пиковая память относилась только к нему"""
+    try:
+        os.chdir(workdir)
+        source = os.path.join(workdir, "source")
+        config = dict(DEFAULT_CONFIG)
+        config.update(use_scan_index=False, stream_results=False, use_journal=True)
+        config.update(BENCHMARKS[name][1])
+        engine = ArchiveEngine(config)
+        start_dt = datetime.datetime(1970, 1, 2)
+        end_dt = datetime.datetime.now() + datetime.timedelta(days=1)
+        if name == "filter":
+            end_dt = REFERENCE_DATE
+            start_dt = end_dt - datetime.timedelta(days=tree_params.get("days_spread", DEFAULT_PARAMS["days_spread"]) // 3)
+        
+        if name.startswith("move") or name == "report":
+            # Поиск — подготовка, в замер не входит
+            outcome = engine.search_files(source, start_dt, end_dt, "modified")
+            total_bytes = sum(os.path.getsize(path) for path, _ in outcome.results)
+            started = time.perf_counter()
+            if name == "report":
+                reports = os.path.join(workdir, "reports")
+                os.makedirs(reports, exist_ok=True)
+                for ext in (".json", ".ndjson", ".csv", ".sqlite"):
+                    engine.save_search_report_json(os.path.join(reports, "search" + ext), outcome.results, "modified",
+                                                   start_dt, end_dt, 0, outcome.metrics)
+                engine.save_search_report_txt(os.path.join(reports, "search.txt"), outcome.results, "modified",
+                                              start_dt, end_dt, 0)
+                files, errors = len(outcome.results) * 5, 0
+                total_bytes = sum(os.path.getsize(os.path.join(reports, n)) for n in os.listdir(reports))
+            else:
+                moved = engine.move_files(outcome.results, archive_dir)
+                files, errors = len(moved.results), moved.errors
+        elif name == "scan_move":
+            # В замер входят обе операции — сравнивать с суммой scan и move_tree
+            started = time.perf_counter()
+            moved = engine.scan_and_move(source, start_dt, end_dt, "modified", archive_dir).move
+            files, errors = len(moved.results), moved.errors
+            total_bytes = moved.metrics.bytes
+        else:
+            started = time.perf_counter()
+            outcome = engine.search_files(source, start_dt, end_dt, "modified")
+            files, errors = outcome.metrics.files, outcome.errors
+            total_bytes = outcome.metrics.bytes
+        seconds = time.perf_counter() - started
+        connection.send({
+            "name": name,
+            "description": BENCHMARKS[name][0],
+            "seconds": round(seconds, 4),
+            "files": files,
+            "bytes": total_bytes,
+            "errors": errors,
+            "files_per_s": round(files / seconds, 1) if seconds else None,
+            "bytes_per_s": round(total_bytes / seconds, 1) if seconds else None,
+            "peak_rss_bytes": peak_rss_bytes()
+        })
+    except Exception as e:
+        connection.send({"name": name, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+def prepare(workdir, tree_params, archive_dir):
+    """Свежее дерево и пустой архив перед каждым замером (генерация детерминирована)"""
+    for path in (os.path.join(workdir, "source"), os.path.join(workdir, "reports"), archive_dir):
+        shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(archive_dir)
+    return generate_tree(os.path.join(workdir, "source"), reference=REFERENCE_DATE, **tree_params)
+
+def compare(results, baseline_path, threshold):
+    """Сравнение с прошлым файлом результатов; возвращает список замедлившихся замеров"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {b["name"]: b for b in json.load(f)["benchmarks"] if "seconds" in b}
+    regressions = []
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None or "seconds" not in result or not old["seconds"]:
+            continue
+        change = (result["seconds"] - old["seconds"]) / old["seconds"] * 100
+        mark = ""
+        if change > threshold:
+            mark = "  <-- ЗАМЕДЛЕНИЕ"
+            regressions.append(result["name"])
+        print(f"  {result['name']:<14} {old['seconds']:>9.3f} с -> {result['seconds']:>9.3f} с ({change:+.1f}%){mark}")
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замеры производительности поиска, перемещения и отчетов "
+                                                 "на синтетическом дереве файлов")
+    parser.add_argument("--preset", choices=list(PRESETS), default="small", help="размер дерева (по умолчанию small)")
+    parser.add_argument("--seed", type=int, default=1, help="seed генератора дерева")
+    parser.add_argument("--only", help="замеры через запятую: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--workdir", help="рабочая папка (по умолчанию временная, удаляется после прогона)")
+    parser.add_argument("--archive-dir", help="папка архива для замеров перемещения на другом томе, чем рабочая папка "
+                                              "(по умолчанию внутри рабочей папки)")
+    parser.add_argument("--same-device", action="store_true",
+                        help="разрешить архив на одном томе с рабочей папкой: замеры перемещения со структурой "
+                             "папок измеряют тогда переименование, а не копирование")
+    parser.add_argument("--output", default="benchmark_results.json", help="файл результатов (JSON)")
+    parser.add_argument("--compare", help="файл результатов прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="допустимое замедление относительно --compare, %% (по умолчанию 10)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"Неизвестные замеры: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    tree_params = dict(PRESETS[args.preset], seed=args.seed)
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="archive_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    archive_dir = os.path.join(os.path.abspath(args.archive_dir) if args.archive_dir else workdir, "archive")
+    os.makedirs(os.path.dirname(archive_dir), exist_ok=True)
+    same_device = os.stat(workdir).st_dev == os.stat(os.path.dirname(archive_dir)).st_dev
+    renamed = RENAME_SENSITIVE.intersection(names) if same_device else set()
+    if renamed and not args.same_device:
+        print(f"Архив на одном томе с рабочей папкой: замеры {', '.join(sorted(renamed))} измерили бы переименование, "
+              f"а не копирование. Укажите --archive-dir на другом томе или --same-device", file=sys.stderr)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return 2
+    if renamed:
+        print(f"ВНИМАНИЕ: архив на одном томе с рабочей папкой — замеры {', '.join(sorted(renamed))} "
+              f"измеряют переименование, а не копирование")
+    context = multiprocessing.get_context("spawn")
+    results = []
+    tree_stats = None
+    try:
+        for name in names:
+            tree_stats = prepare(workdir, tree_params, archive_dir)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=run_one, args=(name, workdir, tree_params, archive_dir, sender))
+            process.start()
+            sender.close()
+            result = receiver.recv() if receiver.poll(None) else {"name": name, "error": "нет результата"}
+            process.join()
+            results.append(result)
+            if "error" in result:
+                print(f"{name:<14} ОШИБКА: {result['error']}")
+            else:
+                rss = result["peak_rss_bytes"]
+                rss_text = f"пик памяти {rss / (1024 * 1024):.0f} МБ" if rss else ""
+                print(f"{name:<14} {result['seconds']:>9.3f} с  {result['files_per_s']:>10.0f} файл/с  "
+                      f"{result['bytes_per_s'] / (1024 * 1024):>8.1f} МБ/с  {rss_text}"
+                      f"{'  (переименование)' if name in renamed else ''}")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if args.archive_dir:
+            shutil.rmtree(archive_dir, ignore_errors=True)
+    
+    report = {
+        "generated": datetime.datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "preset": args.preset,
+        "archive_same_device": same_device,
+        "tree": {"params": tree_params, "stats": tree_stats},
+        "benchmarks": results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены: {args.output}")
+    
+    if args.compare:
+        print(f"Сравнение с {args.compare}:")
+        if compare(results, args.compare, args.threshold):
+            return 1
+    return 1 if any("error" in r for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,18 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
 import datetime
 import threading
+import multiprocessing
 import sys
-import shutil
 import json
-import fnmatch
 import ctypes
+import itertools
 from pathlib import Path
 
-CONFIG_FILE = "archive_helper_config.json"
+from archive_engine import (ArchiveEngine, LogSink, MoveJournal, CONFIG_FILE, INDEX_FILE, LOG_FILE, JOURNAL_FILE,
+                            REPORTS_DB_FILE, PROFILE_DIR, HASH_ALGORITHMS, REPORT_WRITERS, load_config)
+
+LOG_FLUSH_MS = 100        # период вывода накопленных строк журнала в окно
+LOG_MAX_LINES = 5000      # сколько последних строк хранит окно журнала (полный журнал — в LOG_FILE)
 
 class ArchiveMoverApp:
     def __init__(self, root):
@@ -19,6 +23,11 @@ class ArchiveMoverApp:
         self.root.geometry("900x720")
         self.root.minsize(850, 620)
         
+        # Журнал: рабочие потоки пишут в буфер, окно обновляется по таймеру
+        self.log_sink = LogSink(capacity=LOG_MAX_LINES, log_path=LOG_FILE)
+        self.pending_status = None
+        self.pending_progress = None
+        
         # Загрузка сохраненных настроек
         self.load_config()
         
@@ -35,10 +44,28 @@ class ArchiveMoverApp:
         self.exclude_small_var = tk.BooleanVar(value=self.config.get("exclude_small", False))
         self.min_size_var = tk.StringVar(value=str(self.config.get("min_size_kb", 10)))
         self.save_txt_report_var = tk.BooleanVar(value=self.config.get("save_txt_report", True))  # НОВОЕ: опция сохранения в формате .txt
+        self.scan_threads_var = tk.StringVar(value=str(self.config.get("scan_threads", 1)))
+        self.scan_processes_var = tk.StringVar(value=str(self.config.get("scan_processes", 1)))
+        self.async_io_var = tk.BooleanVar(value=self.config.get("async_io", False))
+        self.async_per_mount_var = tk.StringVar(value=str(self.config.get("async_per_mount", 64)))
+        self.copy_workers_var = tk.StringVar(value=str(self.config.get("copy_workers", 4)))
+        self.use_scan_index_var = tk.BooleanVar(value=self.config.get("use_scan_index", False))
+        self.stream_results_var = tk.BooleanVar(value=self.config.get("stream_results", False))
+        self.verify_hash_var = tk.BooleanVar(value=self.config.get("verify_mode", "size") == "hash")
+        self.hash_algorithm_var = tk.StringVar(value=self.config.get("hash_algorithm", "blake2b"))
+        self.use_journal_var = tk.BooleanVar(value=self.config.get("use_journal", True))
+        self.archive_format_var = tk.StringVar(value=self.config.get("archive_format", "tree"))
+        self.zip_volume_mb_var = tk.StringVar(value=str(self.config.get("zip_volume_mb", 4096)))
+        self.dedup_var = tk.BooleanVar(value=self.config.get("dedup", False))
+        self.report_db_var = tk.BooleanVar(value=self.config.get("report_db", False))
+        self.profile_mode_var = tk.StringVar(value=self.config.get("profile_mode", "off"))
+        self.scan_and_move_var = tk.BooleanVar(value=self.config.get("scan_and_move", False))
         self.is_running = False
         self.cancel_flag = False
         self.found_files = []
+        self.found_period = None  # (тип даты, начало, конец) поиска для проверки файлов перед перемещением
         self.source_root = ""
+        self.engine = None
         
         # Установка периода "последний год" по умолчанию
         today = datetime.datetime.today()
@@ -48,68 +75,67 @@ class ArchiveMoverApp:
         
         self.create_widgets()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(LOG_FLUSH_MS, self.flush_log)
     
     def load_config(self):
         """Загрузка сохраненных настроек из JSON"""
-        try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-            else:
-                self.config = {
-                    "time_type": "modified",
-                    "skip_hidden": True,
-                    "exclude_files": "*.tmp, *.log, Thumbs.db, desktop.ini, ~*.*",
-                    "exclude_dirs": "node_modules, .git, .svn, __pycache__, bin, obj, build, dist",
-                    "exclude_paths": "",
-                    "exclude_small": False,
-                    "min_size_kb": 10,
-                    "save_txt_report": True  # НОВОЕ: по умолчанию включено
-                }
-        except Exception:
-            self.config = {}
+        self.config = load_config(CONFIG_FILE)
+    
+    def collect_config(self):
+        """Текущие настройки интерфейса в формате archive_helper_config.json"""
+        return {
+            "source_folder": self.source_folder.get(),
+            "archive_folder": self.archive_folder.get(),
+            "time_type": self.time_type_var.get(),
+            "skip_hidden": self.skip_hidden_var.get(),
+            "exclude_files": self.exclude_files_var.get(),
+            "exclude_dirs": self.exclude_dirs_var.get(),
+            "exclude_paths": self.exclude_paths_var.get(),
+            "exclude_small": self.exclude_small_var.get(),
+            "min_size_kb": int(self.min_size_var.get()) if self.min_size_var.get().isdigit() else 10,
+            "save_txt_report": self.save_txt_report_var.get(),  # НОВОЕ: сохранение опции
+            "scan_threads": self.get_scan_threads(),
+            "scan_processes": self.get_scan_processes(),
+            "async_io": self.async_io_var.get(),
+            "async_per_mount": self.get_async_per_mount(),
+            "copy_workers": self.get_copy_workers(),
+            "use_scan_index": self.use_scan_index_var.get(),
+            "stream_results": self.stream_results_var.get(),
+            "verify_mode": "hash" if self.verify_hash_var.get() else "size",
+            "hash_algorithm": self.hash_algorithm_var.get(),
+            "use_journal": self.use_journal_var.get(),
+            "archive_format": self.archive_format_var.get(),
+            "zip_volume_mb": int(self.zip_volume_mb_var.get()) if self.zip_volume_mb_var.get().isdigit() else 4096,
+            "dedup": self.dedup_var.get(),
+            "report_db": self.report_db_var.get(),
+            "profile_mode": self.profile_mode_var.get(),
+            "scan_and_move": self.scan_and_move_var.get()
+        }
     
     def save_config(self):
         """Сохранение текущих настроек в JSON"""
         try:
-            config = {
-                "source_folder": self.source_folder.get(),
-                "archive_folder": self.archive_folder.get(),
-                "time_type": self.time_type_var.get(),
-                "skip_hidden": self.skip_hidden_var.get(),
-                "exclude_files": self.exclude_files_var.get(),
-                "exclude_dirs": self.exclude_dirs_var.get(),
-                "exclude_paths": self.exclude_paths_var.get(),
-                "exclude_small": self.exclude_small_var.get(),
-                "min_size_kb": int(self.min_size_var.get()) if self.min_size_var.get().isdigit() else 10,
-                "save_txt_report": self.save_txt_report_var.get()  # НОВОЕ: сохранение опции
-            }
+            config = self.collect_config()
             with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
         except Exception as e:
             self.log(f"Не удалось сохранить настройки: {str(e)}", error=True)
     
+    def make_engine(self):
+        """Движок поиска/перемещения с текущими настройками; журнал и статус из его потоков выводит таймер flush_log"""
+        return ArchiveEngine(
+            self.collect_config(),
+            log_callback=self.log,
+            status_callback=self.post_status,
+            progress_callback=self.post_progress
+        )
+    
     def on_closing(self):
         """Сохранение настроек при закрытии окна"""
         self.save_config()
+        self.log_sink.close()
         self.root.destroy()
     
-    def normalize_long_path(self, path):
-        """Добавляет префикс \\?\ для путей >260 символов"""
-        if os.name == 'nt' and len(path) > 259 and not path.startswith('\\\\?\\'):
-            return '\\\\?\\' + os.path.abspath(path)
-        return path
-    
-    def _is_hidden_windows(self, path):
-        """Проверка скрытого атрибута файла/папки (только Windows)"""
-        if os.name != 'nt':
-            return False
-        try:
-            attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
-            return attrs != -1 and (attrs & 2) != 0
-        except:
-            return False
-    
     def create_widgets(self):
         # Верхний фрейм с вкладками
         notebook = ttk.Notebook(self.root)
@@ -268,6 +294,13 @@ class ArchiveMoverApp:
             width=3,
             command=self.show_txt_report_help
         ).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Checkbutton(
+            report_frame,
+            text="Дописывать результаты в базу отчетов SQLite",
+            variable=self.report_db_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT, padx=(20,0))
+        ttk.Button(report_frame, text="?", width=3, command=self.show_report_db_help).pack(side=tk.LEFT, padx=(5,0))
         ttk.Label(
             settings_inner,
             text="ℹ️ Отчеты в формате JSON всегда сохраняются. Отчеты в формате .txt можно отключить для экономии места.",
@@ -276,6 +309,143 @@ class ArchiveMoverApp:
             justify="left"
         ).grid(row=1, column=0, columnspan=2, sticky="w", pady=(0, 10))
         
+        # Производительность обхода папок
+        perf_frame = ttk.LabelFrame(settings_inner, text="Производительность", padding="10")
+        perf_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=5)
+        ttk.Label(perf_frame, text="Потоков обхода папок (1 = последовательно):").grid(row=0, column=0, sticky="w", pady=5)
+        ttk.Spinbox(
+            perf_frame,
+            from_=1,
+            to=64,
+            textvariable=self.scan_threads_var,
+            width=6,
+            command=self.save_config
+        ).grid(row=0, column=1, sticky="w", padx=5)
+        ttk.Button(perf_frame, text="?", width=3, command=self.show_scan_threads_help).grid(row=0, column=2, sticky="w", padx=(5,0))
+        ttk.Label(perf_frame, text="Потоков копирования при перемещении:").grid(row=1, column=0, sticky="w", pady=5)
+        ttk.Spinbox(
+            perf_frame,
+            from_=1,
+            to=32,
+            textvariable=self.copy_workers_var,
+            width=6,
+            command=self.save_config
+        ).grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Button(perf_frame, text="?", width=3, command=self.show_copy_workers_help).grid(row=1, column=2, sticky="w", padx=(5,0))
+        index_frame = ttk.Frame(perf_frame)
+        index_frame.grid(row=2, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            index_frame,
+            text="Использовать индекс сканирования (быстрый повторный поиск)",
+            variable=self.use_scan_index_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        ttk.Button(index_frame, text="?", width=3, command=self.show_scan_index_help).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Button(index_frame, text="🗑 Сбросить индекс", command=self.reset_scan_index).pack(side=tk.LEFT, padx=(10,0))
+        stream_frame = ttk.Frame(perf_frame)
+        stream_frame.grid(row=3, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            stream_frame,
+            text="Хранить результаты поиска на диске (для миллионов файлов)",
+            variable=self.stream_results_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        ttk.Button(stream_frame, text="?", width=3, command=self.show_stream_results_help).pack(side=tk.LEFT, padx=(5,0))
+        verify_frame = ttk.Frame(perf_frame)
+        verify_frame.grid(row=4, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            verify_frame,
+            text="Проверять копии контрольной суммой перед удалением:",
+            variable=self.verify_hash_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        hash_combo = ttk.Combobox(verify_frame, textvariable=self.hash_algorithm_var, values=list(HASH_ALGORITHMS),
+                                  state="readonly", width=10)
+        hash_combo.pack(side=tk.LEFT, padx=(5,0))
+        hash_combo.bind("<<ComboboxSelected>>", lambda e: self.save_config())
+        ttk.Button(verify_frame, text="?", width=3, command=self.show_verify_help).pack(side=tk.LEFT, padx=(5,0))
+        journal_frame = ttk.Frame(perf_frame)
+        journal_frame.grid(row=5, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            journal_frame,
+            text="Вести журнал перемещения (продолжение после сбоя или закрытия программы)",
+            variable=self.use_journal_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        ttk.Button(journal_frame, text="?", width=3, command=self.show_journal_help).pack(side=tk.LEFT, padx=(5,0))
+        format_frame = ttk.Frame(perf_frame)
+        format_frame.grid(row=6, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Label(format_frame, text="Формат архива:").pack(side=tk.LEFT)
+        ttk.Radiobutton(format_frame, text="Структура папок", variable=self.archive_format_var, value="tree",
+                        command=self.save_config).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Radiobutton(format_frame, text="Zip-тома", variable=self.archive_format_var, value="zip",
+                        command=self.save_config).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Label(format_frame, text="Размер тома, МБ:").pack(side=tk.LEFT, padx=(15,0))
+        ttk.Spinbox(
+            format_frame,
+            from_=1,
+            to=1024 * 1024,
+            textvariable=self.zip_volume_mb_var,
+            width=8,
+            command=self.save_config
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(format_frame, text="?", width=3, command=self.show_archive_format_help).pack(side=tk.LEFT, padx=(5,0))
+        dedup_frame = ttk.Frame(perf_frame)
+        dedup_frame.grid(row=7, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            dedup_frame,
+            text="Не хранить дубликаты в архиве (одинаковые файлы — жесткими ссылками)",
+            variable=self.dedup_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        ttk.Button(dedup_frame, text="?", width=3, command=self.show_dedup_help).pack(side=tk.LEFT, padx=(5,0))
+        profile_frame = ttk.Frame(perf_frame)
+        profile_frame.grid(row=8, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Label(profile_frame, text="Профилирование поиска и перемещения:").pack(side=tk.LEFT)
+        profile_combo = ttk.Combobox(profile_frame, textvariable=self.profile_mode_var, values=["off", "stages", "cprofile"],
+                                     state="readonly", width=10)
+        profile_combo.pack(side=tk.LEFT, padx=(5,0))
+        profile_combo.bind("<<ComboboxSelected>>", lambda e: self.save_config())
+        ttk.Button(profile_frame, text="?", width=3, command=self.show_profile_help).pack(side=tk.LEFT, padx=(5,0))
+        pipeline_frame = ttk.Frame(perf_frame)
+        pipeline_frame.grid(row=9, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            pipeline_frame,
+            text="Поиск и перемещение одновременно (файлы переносятся в архив по ходу поиска)",
+            variable=self.scan_and_move_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        ttk.Button(pipeline_frame, text="?", width=3, command=self.show_scan_and_move_help).pack(side=tk.LEFT, padx=(5,0))
+        processes_frame = ttk.Frame(perf_frame)
+        processes_frame.grid(row=10, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Label(processes_frame, text="Процессов обхода папок (1 = выключено, обход потоками):").pack(side=tk.LEFT)
+        ttk.Spinbox(
+            processes_frame,
+            from_=1,
+            to=64,
+            textvariable=self.scan_processes_var,
+            width=6,
+            command=self.save_config
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(processes_frame, text="?", width=3, command=self.show_scan_processes_help).pack(side=tk.LEFT, padx=(5,0))
+        async_frame = ttk.Frame(perf_frame)
+        async_frame.grid(row=11, column=0, columnspan=3, sticky="w", pady=5)
+        ttk.Checkbutton(
+            async_frame,
+            text="Режим сетевых дисков (asyncio), операций на том:",
+            variable=self.async_io_var,
+            command=self.save_config
+        ).pack(side=tk.LEFT)
+        ttk.Spinbox(
+            async_frame,
+            from_=1,
+            to=1024,
+            textvariable=self.async_per_mount_var,
+            width=6,
+            command=self.save_config
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(async_frame, text="?", width=3, command=self.show_async_io_help).pack(side=tk.LEFT, padx=(5,0))
+        
         # Предупреждение
         warning_frame = ttk.LabelFrame(self.root, text="КРИТИЧЕСКИ ВАЖНО", padding="10")
         warning_frame.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
@@ -294,6 +464,8 @@ class ArchiveMoverApp:
         self.search_btn.pack(side=tk.LEFT, padx=5)
         self.move_btn = ttk.Button(btn_frame, text="➡️ Переместить выбранные файлы в архив", command=self.start_move, width=35, state="disabled")
         self.move_btn.pack(side=tk.LEFT, padx=5)
+        self.resume_btn = ttk.Button(btn_frame, text="⏯ Продолжить прерванное", command=self.start_resume, width=24, state="disabled")
+        self.resume_btn.pack(side=tk.LEFT, padx=5)
         self.cancel_btn = ttk.Button(btn_frame, text="⏹ Отмена", command=self.cancel_operation, state="disabled", width=12)
         self.cancel_btn.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="❓ Справка", command=self.show_help, width=12).pack(side=tk.RIGHT, padx=5)
@@ -303,10 +475,14 @@ class ArchiveMoverApp:
         status_frame.grid(row=3, column=0, sticky="ew")
         self.status_label = ttk.Label(status_frame, text="Готово к работе", foreground="green")
         self.status_label.pack(anchor="w")
+        self.progress_bar = ttk.Progressbar(status_frame, mode="determinate")
+        self.progress_bar.pack(fill="x", pady=(3,0))
         
         log_frame = ttk.LabelFrame(self.root, text="Журнал операций", padding="10")
         log_frame.grid(row=4, column=0, padx=10, pady=5, sticky="nsew")
         self.log_text = scrolledtext.ScrolledText(log_frame, height=12, wrap=tk.WORD, state="disabled", font=("Consolas", 9))
+        self.log_text.tag_config("error", foreground="red")
+        self.log_text.tag_config("success", foreground="green")
         self.log_text.pack(fill="both", expand=True)
         
         # Настройка растягивания
@@ -320,6 +496,9 @@ class ArchiveMoverApp:
         self.root.bind('<F5>', lambda e: self.start_search())
         
         self.validate_inputs()
+        if os.path.exists(JOURNAL_FILE):
+            self.log(f"Найден журнал прерванного перемещения ({JOURNAL_FILE}). "
+                     "Нажмите 'Продолжить прерванное', чтобы завершить его без повторного поиска", error=True)
     
     def show_txt_report_help(self):
         """Справка по опции сохранения отчетов в формате TXT"""
@@ -338,6 +517,206 @@ class ArchiveMoverApp:
             "• Отключите для экономии места на диске\n\n"
             "⚠️ Важно: Отчеты в формате JSON всегда сохраняются, так как они содержат полные метаданные и используются для автоматической обработки.")
     
+    def show_scan_threads_help(self):
+        """Справка по параллельному обходу папок"""
+        messagebox.showinfo("Параллельный обход папок",
+            "Количество потоков, которые одновременно читают содержимое папок при поиске.\n\n"
+            "• 1 — последовательный обход (как раньше)\n"
+            "• 4–16 — рекомендуется для сетевых папок (NAS, SMB), где основное время уходит на ожидание ответа сервера\n\n"
+            "Все правила исключений и кнопка 'Отмена' работают в любом режиме.\n"
+            "💡 При параллельном обходе порядок файлов в отчете может отличаться от порядка папок на диске.")
+    
+    def get_scan_threads(self):
+        """Количество потоков обхода папок (1..64)"""
+        value = self.scan_threads_var.get().strip()
+        return max(1, min(64, int(value))) if value.isdigit() else 1
+    
+    def show_scan_processes_help(self):
+        """Справка по обходу в нескольких процессах"""
+        messagebox.showinfo("Обход в нескольких процессах",
+            f"На быстрых локальных дисках (SSD, NVMe) поиск упирается не в диск, а в процессор: проверка масок, "
+            f"исключенных путей и дат идет в одном ядре (потоки Python не выполняют код одновременно).\n\n"
+            f"Больше 1 — дерево папок делится на порции, которые обходят отдельные процессы с теми же правилами "
+            f"исключений; найденные файлы собираются в основной программе. Число процессов разумно ставить "
+            f"по числу ядер (на этом компьютере: {os.cpu_count() or '?'}).\n\n"
+            "⚠️ Особенности:\n"
+            "• Если задано больше 1, настройка потоков обхода не используется\n"
+            "• Индекс сканирования в этом режиме не используется\n"
+            "• Запуск процессов занимает доли секунды — для небольших папок режим не нужен\n"
+            "• Для сетевых папок обычно лучше потоки обхода: там время уходит на ожидание сервера")
+    
+    def get_scan_processes(self):
+        """Количество процессов обхода папок (1..64)"""
+        value = self.scan_processes_var.get().strip()
+        return max(1, min(64, int(value))) if value.isdigit() else 1
+    
+    def show_async_io_help(self):
+        """Справка по режиму сетевых дисков"""
+        messagebox.showinfo("Режим сетевых дисков (asyncio)",
+            "На сетевых дисках (SMB, NFS) каждое чтение папки, запрос атрибутов и копирование файла ждет ответа "
+            "сервера, а не процессора. В этом режиме поиск и перемещение держат одновременно много таких "
+            "операций, и задержки сети перекрываются.\n\n"
+            "Число рядом — сколько операций одновременно идет на один том (диск или сетевой ресурс): "
+            "отдельно для исходной папки и для архива.\n"
+            "• 32–128 — обычно для NAS и файловых серверов\n"
+            "• меньше — если сервер перегружается или другие пользователи жалуются на скорость\n\n"
+            "⚠️ Особенности:\n"
+            "• Заменяет настройки потоков обхода и копирования (кроме обхода в нескольких процессах)\n"
+            "• Zip-тома пишутся как обычно, потоками сжатия\n"
+            "• На локальных дисках выигрыша обычно нет")
+    
+    def get_async_per_mount(self):
+        """Одновременных операций на том в режиме asyncio (1..1024)"""
+        value = self.async_per_mount_var.get().strip()
+        return max(1, min(1024, int(value))) if value.isdigit() else 64
+    
+    def show_copy_workers_help(self):
+        """Справка по параллельному копированию"""
+        messagebox.showinfo("Параллельное копирование",
+            "Количество файлов, которые копируются в архив одновременно.\n\n"
+            "• Папки в архиве создаются отдельным этапом до копирования\n"
+            "• Каждый файл по-прежнему: копируется → проверяется размер → только потом удаляется из исходной папки\n"
+            "• Порядок записей в отчете совпадает с порядком найденных файлов\n\n"
+            "💡 Для большого количества мелких файлов на другой диск или в сеть рекомендуется 4–8 потоков. "
+            "Значение 1 — последовательное перемещение.")
+    
+    def show_scan_index_help(self):
+        """Справка по индексу сканирования"""
+        messagebox.showinfo("Индекс сканирования",
+            "При включенной опции содержимое папок, размеры и даты файлов сохраняются в файл "
+            f"{INDEX_FILE} рядом с настройками.\n\n"
+            "При следующем поиске папки, дата изменения которых не поменялась, берутся из индекса без чтения диска. "
+            "Заново читаются только изменившиеся папки, поэтому повторный поиск по почти неизменному дереву "
+            "занимает секунды.\n\n"
+            "⚠️ Ограничения:\n"
+            "• Дата изменения папки меняется при создании, удалении и переименовании файлов, но НЕ при изменении "
+            "содержимого существующего файла. Поэтому даты файлов, попавших в период, и всех файлов, если период "
+            "доходит до времени прошлого поиска, перечитываются с диска. Не будет замечен только перенос даты файла "
+            "назад, в период (например, восстановление поверх с сохранением дат) — в таком случае нажмите 'Сбросить индекс'\n"
+            "• Для даты последнего доступа индекс не используется\n\n"
+            "💡 Перед перемещением дата каждого файла проверяется заново: файлы, измененные после поиска "
+            "и вышедшие из периода, остаются на месте и попадают в отчет как ошибки.")
+    
+    def show_stream_results_help(self):
+        """Справка по хранению результатов поиска на диске"""
+        messagebox.showinfo("Результаты поиска на диске",
+            "Обычно список найденных файлов хранится в памяти программы. При поиске миллионов файлов "
+            "он может занять гигабайты.\n\n"
+            "При включенной опции найденные файлы сразу записываются во временный файл, а предпросмотр, "
+            "отчеты и перемещение читают его по частям — расход памяти не зависит от числа найденных файлов.\n\n"
+            "💡 Временный файл удаляется автоматически после перемещения или нового поиска.")
+    
+    def show_verify_help(self):
+        """Справка по проверке копий контрольной суммой"""
+        messagebox.showinfo("Проверка контрольной суммой",
+            "Без опции перед удалением исходного файла сравниваются только размеры файлов.\n\n"
+            "С опцией контрольная сумма (BLAKE2b или SHA-256) считается прямо при копировании — исходный файл "
+            "читается один раз. Затем копия перечитывается и сравнивается с этой суммой; исходный файл удаляется "
+            "только при совпадении. Суммы записываются в отчет о перемещении.\n\n"
+            "⚠️ Особенности:\n"
+            "• Копирование идет через буфер программы, без ускорения средствами системы\n"
+            "• При клонировании блоков (reflink на Btrfs/XFS) копия не перечитывается — данные общие с исходником\n"
+            "• При перемещении в пределах одного тома (переименование) данные не копируются и сумма не считается")
+    
+    def show_journal_help(self):
+        """Справка по журналу перемещения"""
+        messagebox.showinfo("Журнал перемещения",
+            f"Перед перемещением список файлов записывается в {JOURNAL_FILE} рядом с настройками, "
+            "затем по ходу работы в него дописывается состояние каждого файла "
+            "(скопирован, проверен, удален).\n\n"
+            "Если программа была закрыта или компьютер перезагрузился во время перемещения, кнопка "
+            "'Продолжить прерванное' завершит задание без повторного поиска. Недокопированные файлы "
+            "копируются заново, уже перемещенные — сверяются с архивом.\n\n"
+            "💡 С журналом каждая копия сбрасывается на диск до удаления исходного файла — это немного "
+            "медленнее, но исключает потерю файла при сбое питания. После успешного завершения журнал удаляется.")
+    
+    def show_archive_format_help(self):
+        """Справка по формату архива"""
+        messagebox.showinfo("Формат архива",
+            "Структура папок — каждый файл копируется в архив по тому же относительному пути.\n\n"
+            "Zip-тома — файлы сжимаются в zip-архивы archive_<время>_wNN_NNN.zip размером до указанного "
+            "числа мегабайт. Каждый поток копирования пишет свои тома, поэтому сжатие идет параллельно. "
+            "Рядом создается индекс archive_<время>_index.sqlite: по нему любой файл извлекается из нужного "
+            "тома без перебора (python archive_cli.py --archive <папка> --extract <путь>).\n\n"
+            "⚠️ Особенности:\n"
+            "• Исходные файлы удаляются только после закрытия и проверки тома, в который они записаны\n"
+            "• Уже сжатые форматы (zip, jpg, mp4, docx и т.п.) сохраняются без повторного сжатия\n"
+            "• Много мелких файлов в zip-томах занимают меньше места и быстрее копируются на сетевые диски")
+    
+    def show_report_db_help(self):
+        """Справка по базе отчетов"""
+        messagebox.showinfo("База отчетов SQLite",
+            f"Результаты каждого поиска и перемещения дописываются в {REPORTS_DB_FILE} рядом с настройками "
+            "(таблица runs — запуски, таблица files — файлы с папкой, именем, расширением, размером, датой поиска, "
+            "датами изменения, доступа и создания (mtime, atime, ctime), статусом и ошибкой). Отчет в формате SQLite можно также выбрать в диалоге сохранения (.sqlite).\n\n"
+            "Базу можно открыть любым просмотрщиком SQLite и получать ответы без загрузки отчетов, например:\n"
+            "SELECT folder, name, size FROM files WHERE run_id = (SELECT max(id) FROM runs WHERE kind = 'move') "
+            "AND size > 1073741824\n\n"
+            "💡 Прошлые запуски хранятся в той же базе — их можно сравнивать между собой запросами.")
+    
+    def show_profile_help(self):
+        """Справка по профилированию"""
+        messagebox.showinfo("Профилирование",
+            "Помогает понять, на что уходит время на конкретной шаре.\n\n"
+            "• off — выключено\n"
+            "• stages — счетчики вызовов и время этапов: листинг папок, проверка скрытых, маски, индекс, "
+            "копирование, контрольные суммы, журнал, вывод в окно программы. Накладные расходы небольшие, "
+            "можно оставлять включенным\n"
+            "• cprofile — дополнительно полный профиль cProfile всех потоков (заметно медленнее)\n\n"
+            f"Результаты сохраняются в папку {PROFILE_DIR} рядом с настройками (*_stages.json, для cprofile — "
+            "*.prof и *_top.txt) и попадают в раздел metrics JSON-отчета. Время этапов включает вложенные этапы "
+            "и суммируется по всем потокам.")
+    
+    def show_scan_and_move_help(self):
+        """Справка по поиску с одновременным перемещением"""
+        messagebox.showinfo("Поиск и перемещение одновременно",
+            "Обычно перемещение начинается только после того, как поиск обошел все дерево папок. "
+            "В этом режиме кнопка 'Найти файлы' сразу передает найденные файлы в перемещение: копирование "
+            "начинается через несколько секунд, а общее время близко к времени более долгой из двух операций.\n\n"
+            "Если перемещение не успевает за поиском, поиск приостанавливается, пока очередь "
+            "не освободится, поэтому память не растет.\n\n"
+            "⚠️ Особенности:\n"
+            "• Перемещение подтверждается до начала поиска — просмотреть список найденных файлов заранее нельзя\n"
+            "• Отчеты о поиске и о перемещении предлагаются после завершения обеих операций\n"
+            "• После сбоя 'Продолжить прерванное' завершает только файлы, найденные до сбоя; "
+            "остальные найдет повторный поиск")
+    
+    def show_dedup_help(self):
+        """Справка по дедупликации"""
+        messagebox.showinfo("Дедупликация",
+            "Файл, содержимое которого уже есть в архиве (или среди перемещаемых файлов), не копируется: "
+            "на его месте в архиве создается жесткая ссылка на хранящуюся копию, а исходный файл удаляется.\n\n"
+            "Одинаковые файлы ищутся поэтапно: по размеру, затем по сумме начала и конца файла и только потом "
+            "по полной контрольной сумме, поэтому файлы уникального размера не читаются вовсе. Суммы сохраняются "
+            "в archive_helper_dedup.sqlite в папке архива и при следующих запусках не пересчитываются.\n\n"
+            "⚠️ Особенности:\n"
+            "• Жесткие ссылки на один файл имеют общие даты и атрибуты — даты дубликата будут как у первой копии\n"
+            "• Если файловая система архива не поддерживает ссылки (FAT32, exFAT, часть сетевых дисков), "
+            "путь дубликата записывается в таблицу links индекса, а в отчете указывается хранящаяся копия\n"
+            "• Файлы меньше 4 КБ и zip-тома не дедуплицируются")
+    
+    def reset_scan_index(self):
+        """Удаление файла индекса сканирования"""
+        if self.is_running:
+            messagebox.showwarning("Внимание", "Дождитесь завершения текущей операции")
+            return
+        removed = False
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(INDEX_FILE + suffix)
+                removed = True
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.log(f"Не удалось удалить индекс сканирования: {str(e)}", error=True)
+                return
+        self.log("Индекс сканирования сброшен" if removed else "Индекс сканирования еще не создан", success=True)
+    
+    def get_copy_workers(self):
+        """Количество потоков копирования (1..32)"""
+        value = self.copy_workers_var.get().strip()
+        return max(1, min(32, int(value))) if value.isdigit() else 4
+    
     # Вспомогательные методы интерфейса (идентичны предыдущей версии)
     def update_time_type_tip(self):
         tip_text = {
@@ -477,18 +856,55 @@ class ArchiveMoverApp:
         self.save_config()
     
     def log(self, message, error=False, success=False):
-        self.log_text.config(state="normal")
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        prefix = "[ОШИБКА] " if error else ("[УСПЕХ] " if success else "")
-        color_tag = "error" if error else ("success" if success else "normal")
-        self.log_text.insert(tk.END, f"[{timestamp}] {prefix}{message}\n", color_tag)
-        self.log_text.tag_config("error", foreground="red")
-        self.log_text.tag_config("success", foreground="green")
-        self.log_text.see(tk.END)
-        self.log_text.config(state="disabled")
-        self.root.update_idletasks()
+        """Запись в журнал (можно вызывать из любого потока); в окне строка появится при следующем flush_log"""
+        self.log_sink.write(message, error=error, success=success)
+    
+    def flush_log(self):
+        """Таймер: вывод накопленных строк журнала одной вставкой и последнего статуса из рабочих потоков"""
+        try:
+            items, dropped = self.log_sink.drain()
+            if items or dropped:
+                chunks = []
+                if dropped:
+                    chunks += [f"... пропущено строк журнала: {dropped} (полный журнал: {LOG_FILE})\n", "error"]
+                for line, tag in items:
+                    chunks += [line, tag]
+                self.log_text.config(state="normal")
+                self.log_text.insert(tk.END, *chunks)
+                line_count = int(self.log_text.index("end-1c").split(".")[0])
+                if line_count > LOG_MAX_LINES:
+                    self.log_text.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
+                self.log_text.see(tk.END)
+                self.log_text.config(state="disabled")
+            
+            status = self.pending_status
+            if status is not None:
+                self.pending_status = None
+                self.update_status(*status)
+            
+            progress = self.pending_progress
+            if progress is not None:
+                self.pending_progress = None
+                done, total = progress
+                if total:
+                    self.progress_bar.config(mode="determinate", maximum=total, value=done)
+                else:
+                    # Общее число файлов при поиске заранее неизвестно — индикатор только показывает активность
+                    self.progress_bar.config(mode="indeterminate")
+                    self.progress_bar.step(5)
+        finally:
+            self.root.after(LOG_FLUSH_MS, self.flush_log)
+    
+    def post_progress(self, done, total):
+        """Прогресс из рабочего потока: применяется таймером flush_log"""
+        self.pending_progress = (done, total)
+    
+    def post_status(self, text, error=False):
+        """Статус из рабочего потока: применяется таймером flush_log (промежуточные значения отбрасываются)"""
+        self.pending_status = (text, error)
     
     def update_status(self, text, error=False):
+        self.pending_status = None
         self.status_label.config(text=text, foreground="red" if error else "green")
     
     def browse_source(self):
@@ -522,6 +938,7 @@ class ArchiveMoverApp:
         self.search_btn.config(state="normal" if (source_ok and dates_valid) else "disabled")
         archive_ok = bool(self.archive_folder.get() and os.path.isdir(self.archive_folder.get()))
         self.move_btn.config(state="normal" if (self.found_files and archive_ok) else "disabled")
+        self.resume_btn.config(state="normal" if (os.path.exists(JOURNAL_FILE) and not self.is_running) else "disabled")
         
         if not dates_valid:
             self.update_status("Ошибка: проверьте формат дат (ГГГГ-ММ-ДД) и чтобы 'Дата от' <= 'Дата до'", error=True)
@@ -569,8 +986,19 @@ class ArchiveMoverApp:
         if not confirm:
             return
         
+        scan_and_move = self.scan_and_move_var.get()
+        archive = self.archive_folder.get()
+        if scan_and_move:
+            if not archive or not os.path.isdir(archive):
+                messagebox.showerror("Ошибка", "Выберите корректную папку архива!\n"
+                                     "(включен режим 'Поиск и перемещение одновременно')")
+                return
+            if not self.confirm_move(f"Найденные файлы будут перемещаться по ходу поиска в:\n{archive}"):
+                return
+        
         self.source_root = source
-        self.found_files = []
+        self.release_found_files()
+        self.engine = self.make_engine()
         self.move_btn.config(state="disabled")
         self.cancel_flag = False
         self.is_running = True
@@ -583,150 +1011,29 @@ class ArchiveMoverApp:
                 f"маски папок={self.exclude_dirs_var.get()[:50]}..., "
                 f"пути={self.exclude_paths_var.get()[:50]}...", success=True)
         
-        thread = threading.Thread(
-            target=self.search_files, 
-            args=(source, start_search, end_search, time_type), 
-            daemon=True
-        )
+        if scan_and_move:
+            self.log(f"Найденные файлы перемещаются в архив по ходу поиска: {archive}")
+            thread = threading.Thread(
+                target=self.scan_and_move,
+                args=(source, start_search, end_search, time_type, archive),
+                daemon=True
+            )
+        else:
+            thread = threading.Thread(
+                target=self.search_files, 
+                args=(source, start_search, end_search, time_type), 
+                daemon=True
+            )
         thread.start()
     
     def search_files(self, folder, start_dt, end_dt, time_type):
-        results = []
-        error_count = 0
-        skipped_hidden = 0
-        skipped_pattern = 0
-        skipped_size = 0
-        skipped_by_path = 0
-        processed = 0
-        start_time = datetime.datetime.now()
-        
-        # Подготовка правил исключений
-        skip_hidden = self.skip_hidden_var.get()
-        exclude_file_patterns = [p.strip() for p in self.exclude_files_var.get().split(',') if p.strip()]
-        exclude_dir_patterns = [p.strip() for p in self.exclude_dirs_var.get().split(',') if p.strip()]
-        base_system_dirs = ['$RECYCLE.BIN', 'System Volume Information', 'Recovery']
-        all_exclude_dir_patterns = base_system_dirs + exclude_dir_patterns
-        
-        # Подготовка исключенных путей
-        exclude_path_list = [p.strip() for p in self.exclude_paths_var.get().split(',') if p.strip()]
-        exclude_paths_normalized = []
-        for path_str in exclude_path_list:
-            try:
-                if not os.path.isabs(path_str):
-                    abs_path = os.path.abspath(os.path.join(self.source_root, path_str))
-                else:
-                    abs_path = os.path.abspath(path_str)
-                norm_path = self.normalize_long_path(abs_path).lower()
-                if not norm_path.endswith(('\\', '/')):
-                    norm_path += '\\'
-                exclude_paths_normalized.append(norm_path)
-            except Exception as e:
-                self.log(f"Ошибка обработки пути исключения '{path_str}': {str(e)}", error=True)
-        
-        exclude_by_size = self.exclude_small_var.get()
-        min_size_kb = int(self.min_size_var.get()) if self.min_size_var.get().isdigit() else 10
-        min_size_bytes = min_size_kb * 1024 if exclude_by_size and min_size_kb > 0 else 0
-        
-        time_func = {
-            "modified": os.path.getmtime,
-            "accessed": os.path.getatime,
-            "created": os.path.getctime
-        }.get(time_type, os.path.getmtime)
-        
+        """Фоновый поток поиска: вызывает движок и передает итог в интерфейс"""
         try:
-            for root_dir, dirs, files in os.walk(folder, topdown=True):
-                if self.cancel_flag:
-                    break
-                
-                # Проверка по полному пути - ПОЛНОСТЬЮ пропускаем ветку
-                norm_root = self.normalize_long_path(root_dir).lower()
-                if not norm_root.endswith(('\\', '/')):
-                    norm_root_check = norm_root + '\\'
-                else:
-                    norm_root_check = norm_root
-                
-                skip_entire_branch = False
-                for excl_path in exclude_paths_normalized:
-                    if norm_root_check.startswith(excl_path):
-                        skip_entire_branch = True
-                        break
-                
-                if skip_entire_branch:
-                    dirs[:] = []
-                    skipped_by_path += 1
-                    continue
-                
-                # Фильтрация папок по шаблонам имен
-                dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pattern) for pattern in all_exclude_dir_patterns)]
-                
-                # Фильтрация скрытых папок
-                if skip_hidden:
-                    non_hidden_dirs = []
-                    for d in dirs:
-                        full_dir_path = self.normalize_long_path(os.path.join(root_dir, d))
-                        if not self._is_hidden_windows(full_dir_path):
-                            non_hidden_dirs.append(d)
-                        else:
-                            skipped_hidden += 1
-                    dirs[:] = non_hidden_dirs
-                
-                for file in files:
-                    if self.cancel_flag:
-                        break
-                    
-                    file_path = self.normalize_long_path(os.path.join(root_dir, file))
-                    
-                    # Пропуск по маске файла
-                    if any(fnmatch.fnmatch(file, pattern) for pattern in exclude_file_patterns):
-                        skipped_pattern += 1
-                        continue
-                    
-                    # Пропуск скрытых файлов
-                    if skip_hidden and self._is_hidden_windows(file_path):
-                        skipped_hidden += 1
-                        continue
-                    
-                    # Пропуск по размеру
-                    if exclude_by_size:
-                        try:
-                            size = os.path.getsize(file_path)
-                            if size < min_size_bytes:
-                                skipped_size += 1
-                                continue
-                        except:
-                            pass
-                    
-                    try:
-                        timestamp = time_func(file_path)
-                        file_time = datetime.datetime.fromtimestamp(timestamp)
-                        
-                        if start_dt <= file_time <= end_dt:
-                            clean_path = file_path.replace('\\\\?\\', '') if file_path.startswith('\\\\?\\') else file_path
-                            results.append((clean_path, file_time))
-                        
-                        processed += 1
-                        if processed % 200 == 0:
-                            self.root.after(0, lambda p=processed: self.log(f"Обработано файлов: {p}..."))
-                            
-                    except (PermissionError, FileNotFoundError, OSError) as e:
-                        error_count += 1
-                        if error_count <= 5:
-                            clean_path = (file_path.replace('\\\\?\\', '')[:80] + "...") if len(file_path) > 80 else file_path
-                            self.root.after(0, lambda ep=clean_path, ee=str(e): 
-                                self.log(f"Ошибка обработки {ep}: {ee[:60]}", error=True))
-                        continue
-            
-            if self.cancel_flag:
-                self.root.after(0, lambda: self.log("Поиск отменен пользователем"))
-                return
-            
-            duration = (datetime.datetime.now() - start_time).total_seconds()
-            self.found_files = results
-            self.root.after(0, lambda: self.on_search_complete(
-                results, duration, error_count, skipped_hidden, skipped_pattern, skipped_size, skipped_by_path,
-                time_type, start_dt, end_dt
-            ))
-            
+            outcome = self.engine.search_files(folder, start_dt, end_dt, time_type)
+            if outcome is not None:
+                self.found_files = outcome.results
+                self.found_period = (time_type, start_dt, end_dt)
+                self.root.after(0, lambda: self.on_search_complete(*outcome))
         except Exception as e:
             self.root.after(0, lambda err=str(e): [
                 self.log(f"Критическая ошибка поиска: {err}", error=True),
@@ -735,7 +1042,24 @@ class ArchiveMoverApp:
         finally:
             self.root.after(0, self.finalize_operation)
     
-    def on_search_complete(self, results, duration, errors, skipped_hidden, skipped_pattern, skipped_size, skipped_by_path, time_type, start_dt, end_dt):
+    def scan_and_move(self, folder, start_dt, end_dt, time_type, archive_base):
+        """Фоновый поток поиска с одновременным перемещением: вызывает движок и передает итог в интерфейс"""
+        try:
+            outcome = self.engine.scan_and_move(folder, start_dt, end_dt, time_type, archive_base,
+                                                self.streamed_move_reports())
+            if outcome.search is not None:
+                self.found_files = outcome.search.results
+                self.found_period = (time_type, start_dt, end_dt)
+            self.root.after(0, lambda: self.on_scan_move_complete(*outcome))
+        except Exception as e:
+            self.root.after(0, lambda err=str(e): [
+                self.log(f"Критическая ошибка поиска и перемещения: {err}", error=True),
+                self.update_status("Ошибка поиска и перемещения", error=True)
+            ])
+        finally:
+            self.root.after(0, self.finalize_operation)
+    
+    def log_search_summary(self, results, duration, errors, skipped_hidden, skipped_pattern, skipped_size, skipped_by_path, time_type):
         time_label = {
             "modified": "изменения",
             "accessed": "последнего доступа",
@@ -748,23 +1072,30 @@ class ArchiveMoverApp:
                   f"Пропущено: скрытые={skipped_hidden}, маски={skipped_pattern}, "
                   f"размер={skipped_size}, ПОЛНЫЕ ПУТИ={skipped_by_path}")
         self.log(summary, success=True)
+    
+    def on_search_complete(self, results, duration, errors, skipped_hidden, skipped_pattern, skipped_size, skipped_by_path, time_type, start_dt, end_dt, metrics):
+        self.log_search_summary(results, duration, errors, skipped_hidden, skipped_pattern, skipped_size, skipped_by_path,
+                                time_type)
         
         if results:
             sample = min(5, len(results))
             self.log(f"Примеры найденных файлов (первые {sample}):")
-            for i in range(sample):
-                path, dt = results[i]
+            for path, dt in itertools.islice(results, sample):
                 self.log(f"  • {os.path.basename(path)} | {dt.strftime('%d.%m.%Y %H:%M:%S')}")
             if len(results) > sample:
                 self.log(f"  ... и ещё {len(results) - sample} файлов")
             
+            if self.report_db_var.get():
+                self.store_in_report_db(self.engine.save_search_report_json, results, time_type, start_dt, end_dt,
+                                        skipped_by_path, metrics)
+            
             # Сохранение отчета о поиске (с учетом опции)
             if messagebox.askyesno("Результаты поиска", 
                 f"Найдено файлов: {len(results)}\n"
                 f"Пропущено по правилам: {skipped_hidden + skipped_pattern + skipped_size + skipped_by_path}\n"
                 f"В том числе по полным путям: {skipped_by_path} папок\n\n"
                 f"Сохранить отчет о найденных файлах (без перемещения)?"):
-                self.save_search_report(results, time_type, start_dt, end_dt, skipped_by_path)
+                self.save_search_report(results, time_type, start_dt, end_dt, skipped_by_path, metrics)
             
             if self.archive_folder.get():
                 self.move_btn.config(state="normal")
@@ -780,6 +1111,24 @@ class ArchiveMoverApp:
                 "• Правила исключений не блокируют все файлы\n"
                 "• Файлы существуют в указанной папке")
     
+    def on_scan_move_complete(self, search, move, scan_error=None):
+        """Итог поиска с одновременным перемещением: сводка и отчеты поиска (если он не отменен), затем итог перемещения"""
+        if search is not None:
+            self.log_search_summary(*search[:8])
+            if search.results:
+                if self.report_db_var.get():
+                    self.store_in_report_db(self.engine.save_search_report_json, search.results, search.time_type,
+                                            search.start_dt, search.end_dt, search.skipped_by_path, search.metrics)
+                if messagebox.askyesno("Результаты поиска",
+                    f"Найдено файлов: {len(search.results)}\n"
+                    f"Пропущено по правилам: {search.skipped_hidden + search.skipped_pattern + search.skipped_size + search.skipped_by_path}\n\n"
+                    f"Сохранить отчет о найденных файлах?"):
+                    self.save_search_report(search.results, search.time_type, search.start_dt, search.end_dt,
+                                            search.skipped_by_path, search.metrics)
+        self.on_move_complete(*move)
+        if scan_error is not None:
+            self.update_status("Поиск прерван ошибкой: перемещены файлы, найденные до нее", error=True)
+    
     # Методы перемещения и отчетов (обновлены для учета опции сохранения в формате .txt)
     def start_move(self):
         if not self.found_files:
@@ -791,81 +1140,107 @@ class ArchiveMoverApp:
             messagebox.showerror("Ошибка", "Выберите корректную папку архива!")
             return
         
+        if not self.confirm_move(f"Переместить {len(self.found_files)} файлов в:\n{archive}"):
+            return
+        
+        self.cancel_flag = False
+        self.is_running = True
+        self.engine = self.make_engine()
+        self.engine.source_root = self.source_root
+        self.move_btn.config(state="disabled")
+        self.search_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        self.update_status("Выполняется перемещение файлов в архив...")
+        self.log(f"Начало перемещения {len(self.found_files)} файлов в архив: {archive}")
+        
+        thread = threading.Thread(target=self.move_files, args=(archive,), daemon=True)
+        thread.start()
+    
+    def confirm_move(self, what):
+        """Подтверждения перед перемещением (удаление исходных файлов, замена журнала)"""
         warning = (
             "⚠️ ВНИМАНИЕ! Эта операция:\n"
             "1. Скопирует найденные файлы в папку архива с сохранением структуры папок\n"
             "2. УДАЛИТ файлы из исходной папки после успешного копирования\n"
             "3. Операция НЕОБРАТИМА!\n\n"
-            f"Переместить {len(self.found_files)} файлов в:\n{archive}\n\n"
+            f"{what}\n\n"
             "Подтверждаете выполнение?"
         )
         if not messagebox.askyesno("Подтверждение перемещения", warning, icon=messagebox.WARNING):
-            return
+            return False
         
         if not messagebox.askyesno("ФИНАЛЬНОЕ ПОДТВЕРЖДЕНИЕ", 
             "Вы уверены? После удаления файлы нельзя восстановить стандартными средствами!",
             icon=messagebox.ERROR):
+            return False
+        
+        if self.use_journal_var.get() and os.path.exists(JOURNAL_FILE):
+            if not messagebox.askyesno("Незавершенное перемещение",
+                "Есть журнал прерванного перемещения. Новое перемещение заменит его, и продолжить "
+                "прерванное будет нельзя.\n\nНачать новое перемещение?", icon=messagebox.WARNING):
+                return False
+        return True
+    
+    def start_resume(self):
+        """Продолжение перемещения, прерванного сбоем или закрытием программы"""
+        if self.is_running:
+            return
+        try:
+            job, entries = MoveJournal.read(JOURNAL_FILE)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось прочитать журнал перемещения:\n{str(e)}")
+            return
+        if job is None:
+            messagebox.showerror("Ошибка", f"Журнал перемещения {JOURNAL_FILE} поврежден и не может быть продолжен.")
+            return
+        remaining = sum(1 for entry in entries.values() if entry["s"] not in ("deleted", "error"))
+        if not messagebox.askyesno("Продолжение перемещения",
+            f"Прерванное перемещение от {job.get('started', '?')[:19].replace('T', ' ')}\n"
+            f"Из: {job['source_root']}\nВ архив: {job['archive']}\n\n"
+            f"Всего файлов: {len(entries)}, не завершено: {remaining}\n\n"
+            "Незавершенные файлы будут скопированы и УДАЛЕНЫ из исходной папки. Продолжить?",
+            icon=messagebox.WARNING):
             return
         
         self.cancel_flag = False
         self.is_running = True
+        self.engine = self.make_engine()
         self.move_btn.config(state="disabled")
+        self.resume_btn.config(state="disabled")
         self.search_btn.config(state="disabled")
         self.cancel_btn.config(state="normal")
-        self.update_status("Выполняется перемещение файлов в архив...")
-        self.log(f"Начало перемещения {len(self.found_files)} файлов в архив: {archive}")
+        self.update_status("Продолжение перемещения по журналу...")
         
-        thread = threading.Thread(target=self.move_files, args=(archive,), daemon=True)
+        thread = threading.Thread(target=self.move_files, args=(None,), daemon=True)
         thread.start()
     
     def move_files(self, archive_base):
-        results = []
-        success_count = 0
-        error_count = 0
-        start_time = datetime.datetime.now()
-        
-        for idx, (src_path, file_time) in enumerate(self.found_files, 1):
-            if self.cancel_flag:
-                break
-            
-            try:
-                clean_src = src_path.replace('\\\\?\\', '') if src_path.startswith('\\\\?\\') else src_path
-                rel_path = os.path.relpath(clean_src, self.source_root)
-                dest_path = os.path.join(archive_base, rel_path)
-                dest_path = self.normalize_long_path(dest_path)
-                dest_dir = os.path.dirname(dest_path)
-                src_norm = self.normalize_long_path(clean_src)
-                
-                os.makedirs(dest_dir, exist_ok=True)
-                shutil.copy2(src_norm, dest_path)
-                
-                if os.path.getsize(src_norm) != os.path.getsize(dest_path):
-                    raise Exception("Ошибка целостности: размеры не совпадают")
-                
-                os.remove(src_norm)
-                results.append((clean_src, dest_path.replace('\\\\?\\', ''), "УСПЕХ", ""))
-                success_count += 1
-                self.root.after(0, lambda i=idx, t=len(self.found_files), p=os.path.basename(clean_src): 
-                    self.log(f"[{i}/{t}] Перемещен: {p}"))
-                
-            except Exception as e:
-                error_msg = str(e)[:100]
-                results.append((clean_src, "", "ОШИБКА", error_msg))
-                error_count += 1
-                self.root.after(0, lambda p=os.path.basename(clean_src), err=error_msg:
-                    self.log(f"Ошибка перемещения {p}: {err}", error=True))
-            
-            if idx % 10 == 0:
-                self.root.after(0, lambda i=idx, t=len(self.found_files): 
-                    self.update_status(f"Перемещение: {i}/{t} файлов"))
-        
-        duration = (datetime.datetime.now() - start_time).total_seconds()
-        self.root.after(0, lambda: self.on_move_complete(results, success_count, error_count, duration, archive_base))
+        """Фоновый поток перемещения: вызывает движок и передает итог в интерфейс (archive_base=None — продолжение по журналу)"""
+        try:
+            if archive_base is None:
+                outcome = self.engine.resume_move(self.streamed_move_reports())
+                self.source_root = self.engine.source_root
+            else:
+                outcome = self.engine.move_files(self.found_files, archive_base, self.found_period,
+                                                 self.streamed_move_reports())
+            self.root.after(0, lambda: self.on_move_complete(*outcome))
+        except Exception as e:
+            self.root.after(0, lambda err=str(e): [
+                self.log(f"Критическая ошибка перемещения: {err}", error=True),
+                self.update_status("Ошибка перемещения", error=True)
+            ])
+        finally:
+            self.root.after(0, self.finalize_operation)
     
-    def on_move_complete(self, results, success, errors, duration, archive_path):
+    def on_move_complete(self, results, success, errors, duration, archive_path, metrics):
         status_text = f"Перемещение завершено: {success} успешно, {errors} ошибок"
         self.update_status(status_text, error=(errors > 0))
         self.log(status_text, success=(errors == 0), error=(errors > 0))
+        methods = self.engine.count_copy_methods(results)
+        if methods:
+            self.log("Способы копирования: " + ", ".join(f"{m}={c}" for m, c in methods.items()))
+        if self.engine.config.get("report_db", False):
+            self.log(f"Результаты перемещения добавлены в базу отчетов {REPORTS_DB_FILE}", success=True)
         
         # Сохранение отчета с учетом опции
         report_path = filedialog.asksaveasfilename(
@@ -874,6 +1249,9 @@ class ArchiveMoverApp:
             filetypes=[
                 ("Text files", "*.txt") if self.save_txt_report_var.get() else ("JSON files", "*.json"),
                 ("JSON files", "*.json"),
+                ("NDJSON files", "*.ndjson"),
+                ("CSV files", "*.csv"),
+                ("SQLite", "*.sqlite"),
                 ("All files", "*.*")
             ],
             initialfile=f"archive_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -881,185 +1259,75 @@ class ArchiveMoverApp:
         
         if report_path:
             # Определяем формат файла по расширению
-            if report_path.endswith('.json'):
-                self.save_move_report_json(report_path, results, archive_base)
-                self.log(f"Отчет сохранен в формате JSON: {report_path}", success=True)
-            elif report_path.endswith('.txt'):
-                self.save_move_report_txt(report_path, results, archive_path, success, errors, duration)
+            report_format = os.path.splitext(report_path)[1].lower()
+            if report_format == '.txt':
+                self.engine.save_move_report_txt(report_path, results, archive_path, success, errors, duration)
                 self.log(f"Отчет сохранен в формате TXT: {report_path}", success=True)
+            elif report_format in REPORT_WRITERS:
+                self.engine.save_move_report_json(report_path, results, archive_path, metrics)
+                self.log(f"Отчет сохранен в формате {report_format[1:].upper()}: {report_path}", success=True)
             
             messagebox.showinfo("Готово", 
                 f"Перемещение завершено!\nУспешно: {success}\nОшибок: {errors}\nОтчет: {report_path}")
         else:
             self.log("Сохранение отчета отменено", error=True)
         
-        self.found_files = []
+        self.release_found_files()
         self.move_btn.config(state="disabled")
     
-    def save_search_report(self, results, time_type, start_dt, end_dt, skipped_by_path):
-        # Сохранение отчета в формате JSON всегда
+    def streamed_move_reports(self):
+        """Отчеты, которые движок пишет по ходу перемещения: база отчетов (файл отчета выбирается после перемещения)"""
+        return [REPORTS_DB_FILE] if self.engine.config.get("report_db", False) else []
+    
+    def store_in_report_db(self, save_report, *args):
+        """Добавление результатов операции в базу отчетов REPORTS_DB_FILE"""
+        try:
+            save_report(REPORTS_DB_FILE, *args)
+            self.log(f"Результаты добавлены в базу отчетов {REPORTS_DB_FILE}", success=True)
+        except Exception as e:
+            self.log(f"Ошибка записи в базу отчетов: {str(e)}", error=True)
+    
+    def release_found_files(self):
+        """Сброс результатов поиска (временный файл результатов удаляется)"""
+        if hasattr(self.found_files, "close"):
+            self.found_files.close()
+        self.found_files = []
+        self.found_period = None
+    
+    def save_search_report(self, results, time_type, start_dt, end_dt, skipped_by_path, metrics=None):
+        # Сохранение машиночитаемого отчета всегда (JSON, NDJSON или CSV)
         json_path = filedialog.asksaveasfilename(
             title="Сохранить отчет о найденных файлах",
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=[("JSON files", "*.json"), ("NDJSON files", "*.ndjson"), ("CSV files", "*.csv"),
+                       ("SQLite", "*.sqlite"), ("All files", "*.*")],
             initialfile=f"search_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         )
         
         if not json_path:
             return
         
-        # Сохраняем в формате JSON
-        self.save_search_report_json(json_path, results, time_type, start_dt, end_dt, skipped_by_path)
-        self.log(f"Отчет о поиске сохранен в формате JSON: {json_path}", success=True)
+        # Сохраняем в формате по расширению (неизвестное — JSON)
+        self.engine.save_search_report_json(json_path, results, time_type, start_dt, end_dt, skipped_by_path, metrics)
+        self.log(f"Отчет о поиске сохранен: {json_path}", success=True)
         
         # Сохраняем в формате TXT только если опция включена
         if self.save_txt_report_var.get():
-            txt_path = json_path.replace('.json', '.txt')
-            self.save_search_report_txt(txt_path, results, time_type, start_dt, end_dt, skipped_by_path)
+            txt_path = os.path.splitext(json_path)[0] + '.txt'
+            self.engine.save_search_report_txt(txt_path, results, time_type, start_dt, end_dt, skipped_by_path)
             self.log(f"Отчет о поиске сохранен в формате TXT: {txt_path}", success=True)
     
-    def save_search_report_txt(self, path, results, time_type, start_dt, end_dt, skipped_by_path):
-        """Сохранение отчета о поиске в формате TXT"""
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write("="*80 + "\n")
-            f.write("ОТЧЕТ О НАЙДЕННЫХ ФАЙЛАХ (Поиск)\n")
-            f.write("="*80 + "\n")
-            f.write(f"Дата формирования: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n")
-            f.write(f"Исходная папка: {self.source_root}\n")
-            f.write(f"Тип даты: {time_type}\n")
-            f.write(f"Период поиска: с {start_dt.strftime('%d.%m.%Y %H:%M')} по {end_dt.strftime('%d.%m.%Y %H:%M')}\n")
-            f.write(f"Найдено файлов: {len(results)}\n")
-            f.write("\nПАРАМЕТРЫ ИСКЛЮЧЕНИЙ:\n")
-            f.write(f"  Пропускать скрытые: {'Да' if self.skip_hidden_var.get() else 'Нет'}\n")
-            f.write(f"  Маски файлов: {self.exclude_files_var.get()}\n")
-            f.write(f"  Маски папок: {self.exclude_dirs_var.get()}\n")
-            f.write(f"  Исключенные ПОЛНЫЕ ПУТИ к папкам:\n")
-            if self.exclude_paths_var.get().strip():
-                for path in self.exclude_paths_var.get().split(','):
-                    f.write(f"    • {path.strip()}\n")
-            else:
-                f.write("    (нет)\n")
-            f.write(f"  Исключать файлы меньше: {self.min_size_var.get() if self.exclude_small_var.get() else 'НЕТ'} КБ\n")
-            f.write(f"  Системные папки ($RECYCLE.BIN и др.) всегда исключаются\n")
-            f.write(f"\nСТАТИСТИКА ПРОПУСКОВ:\n")
-            f.write(f"  По полным путям: {skipped_by_path} папок (полностью)\n")
-            f.write("="*80 + "\n\n")
-            f.write("ВАЖНО: Это отчет ТОЛЬКО о найденных файлах. Файлы НЕ были перемещены!\n")
-            f.write("Для перемещения вернитесь в программу и нажмите 'Переместить в архив'\n\n")
-            f.write("-"*80 + "\n")
-            
-            for src, dt in results:
-                f.write(f"Путь: {src}\n")
-                f.write(f"Дата: {dt.strftime('%d.%m.%Y %H:%M:%S')}\n")
-                f.write("-"*80 + "\n")
-    
-    def save_search_report_json(self, path, results, time_type, start_dt, end_dt, skipped_by_path):
-        """Сохранение отчета о поиске в формате JSON"""
-        report_data = {
-            "metadata": {
-                "generated": datetime.datetime.now().isoformat(),
-                "source_folder": self.source_root,
-                "time_type": time_type,
-                "period_start": start_dt.isoformat(),
-                "period_end": end_dt.isoformat(),
-                "total_found": len(results),
-                "search_params": {
-                    "skip_hidden": self.skip_hidden_var.get(),
-                    "exclude_files": self.exclude_files_var.get(),
-                    "exclude_dirs": self.exclude_dirs_var.get(),
-                    "exclude_paths": self.exclude_paths_var.get(),
-                    "exclude_small": self.exclude_small_var.get(),
-                    "min_size_kb": int(self.min_size_var.get()) if self.min_size_var.get().isdigit() else 0
-                },
-                "statistics": {
-                    "skipped_by_path": skipped_by_path
-                }
-            },
-            "files": [
-                {
-                    "path": src,
-                    "date": dt.isoformat()
-                }
-                for src, dt in results
-            ]
-        }
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, ensure_ascii=False, indent=2)
-    
-    def save_move_report_txt(self, path, results, archive_path, success, errors, duration):
-        """Сохранение отчета о перемещении в формате TXT"""
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write("="*80 + "\n")
-            f.write("ОТЧЕТ О ПЕРЕМЕЩЕНИИ ФАЙЛОВ В АРХИВ\n")
-            f.write("="*80 + "\n")
-            f.write(f"Дата: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n")
-            f.write(f"Исходная папка: {self.source_root}\n")
-            f.write(f"Папка архива: {archive_path}\n")
-            f.write(f"Время операции: {duration:.1f} секунд\n")
-            f.write(f"Успешно перемещено: {success}\n")
-            f.write(f"Ошибок: {errors}\n")
-            f.write("\nПАРАМЕТРЫ ИСКЛЮЧЕНИЙ ПРИ ПОИСКЕ:\n")
-            f.write(f"  Пропускать скрытые: {'Да' if self.skip_hidden_var.get() else 'Нет'}\n")
-            f.write(f"  Маски файлов: {self.exclude_files_var.get()}\n")
-            f.write(f"  Маски папок: {self.exclude_dirs_var.get()}\n")
-            f.write(f"  Исключенные ПОЛНЫЕ ПУТИ к папкам:\n")
-            if self.exclude_paths_var.get().strip():
-                for path in self.exclude_paths_var.get().split(','):
-                    f.write(f"    • {path.strip()}\n")
-            else:
-                f.write("    (нет)\n")
-            f.write(f"  Исключать файлы меньше: {self.min_size_var.get() if self.exclude_small_var.get() else 'НЕТ'} КБ\n")
-            f.write("="*80 + "\n\n")
-            f.write("ДЕТАЛИ ПО КАЖДОМУ ФАЙЛУ:\n")
-            f.write("-"*80 + "\n")
-            for src, dest, status, msg in results:
-                f.write(f"Статус: {status}\n")
-                f.write(f"Исходный путь: {src}\n")
-                if status == "УСПЕХ":
-                    f.write(f"Путь в архиве: {dest}\n")
-                if msg:
-                    f.write(f"Ошибка: {msg}\n")
-                f.write("-"*80 + "\n")
-    
-    def save_move_report_json(self, path, results, archive_path):
-        """Сохранение отчета о перемещении в формате JSON"""
-        report_data = {
-            "metadata": {
-                "generated": datetime.datetime.now().isoformat(),
-                "source_folder": self.source_root,
-                "archive_folder": archive_path,
-                "total_files": len(results),
-                "success_count": sum(1 for r in results if r[2] == "УСПЕХ"),
-                "error_count": sum(1 for r in results if r[2] == "ОШИБКА"),
-                "search_params": {
-                    "skip_hidden": self.skip_hidden_var.get(),
-                    "exclude_files": self.exclude_files_var.get(),
-                    "exclude_dirs": self.exclude_dirs_var.get(),
-                    "exclude_paths": self.exclude_paths_var.get(),
-                    "exclude_small": self.exclude_small_var.get(),
-                    "min_size_kb": int(self.min_size_var.get()) if self.min_size_var.get().isdigit() else 0
-                }
-            },
-            "files": [
-                {
-                    "source_path": src,
-                    "archive_path": dest,
-                    "status": status,
-                    "error_message": msg if msg else None
-                }
-                for src, dest, status, msg in results
-            ]
-        }
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, ensure_ascii=False, indent=2)
-    
     def cancel_operation(self):
         self.cancel_flag = True
+        if self.engine is not None:
+            self.engine.cancel()
         self.log("Запрошена отмена операции...", error=True)
         self.update_status("Отмена операции...")
     
     def finalize_operation(self):
         self.is_running = False
+        self.pending_progress = None
+        self.progress_bar.config(mode="determinate", value=0)
         self.cancel_btn.config(state="disabled")
         self.search_btn.config(state="normal")
         self.validate_inputs()
@@ -1104,6 +1372,7 @@ class ArchiveMoverApp:
         messagebox.showinfo("Справка", help_text)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # процессы обхода в собранном exe
     if sys.platform == 'win32':
         try:
             ctypes.windll.shcore.SetProcessDpiAwareness(1)
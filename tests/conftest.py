@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_engine import ArchiveEngine, DEFAULT_CONFIG  # noqa: E402
+
+
+def write_file(path, data=b"x", mtime=None):
+    """Файл с содержимым data (и датой изменения mtime, если задана)"""
+    os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Рабочая папка теста: журнал, индексы и профили движок пишет относительно текущей папки"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_engine(workdir):
+    """Движок с настройками по умолчанию; журнал и сообщения собираются в engine.messages"""
+    def factory(**config):
+        messages = []
+        settings = dict(DEFAULT_CONFIG)
+        settings.update(config)
+        engine = ArchiveEngine(settings, log_callback=lambda message, error=False, success=False: messages.append(message))
+        engine.messages = messages
+        return engine
+    return factory
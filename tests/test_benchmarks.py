@@ -0,0 +1,39 @@
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_benchmarks  # noqa: E402
+from generate_tree import generate_tree  # noqa: E402
+
+PARAMS = {"depth": 2, "fanout": 2, "files_per_dir": 5, "max_size_kb": 64, "hidden_ratio": 0.3}
+
+
+def listing(root):
+    files = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            st = os.stat(os.path.join(folder, name))
+            files[os.path.relpath(os.path.join(folder, name), root)] = (st.st_size, int(st.st_mtime))
+    return files
+
+
+def test_same_seed_gives_the_same_tree(workdir):
+    reference = datetime.datetime(2024, 1, 1)
+    first = generate_tree(str(workdir / "a"), reference=reference, **PARAMS)
+    second = generate_tree(str(workdir / "b"), reference=reference, **PARAMS)
+    
+    assert first == second
+    assert listing(workdir / "a") == listing(workdir / "b")
+    assert first["files"] == len(listing(workdir / "a"))
+    assert first["hidden"] == sum(os.path.basename(p).startswith(".") for p in listing(workdir / "a"))
+
+
+def test_move_benchmarks_refuse_an_archive_on_the_same_volume(workdir, capsys):
+    code = run_benchmarks.main(["--only", "move_tree", "--workdir", str(workdir / "bench"),
+                                "--output", str(workdir / "results.json")])
+    
+    assert code == 2
+    assert "--same-device" in capsys.readouterr().err
+    assert not os.path.exists(workdir / "results.json")
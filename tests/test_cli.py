@@ -0,0 +1,58 @@
+import datetime
+import os
+
+import pytest
+
+import archive_cli
+from archive_engine import JOURNAL_FILE
+from conftest import read_file, write_file
+
+OLD = datetime.datetime(2020, 1, 1).timestamp()
+
+
+@pytest.fixture
+def cli_args(workdir, monkeypatch):
+    # Обработчик Ctrl+C командной строки не должен оставаться в процессе тестов
+    monkeypatch.setattr(archive_cli.signal, "signal", lambda signum, handler: None)
+    write_file(workdir / "src" / "a.txt", mtime=OLD)
+    (workdir / "arc").mkdir()
+    return ["--source", "src", "--archive", "arc", "--from", "2019-01-01", "--to", "2021-01-01", "--yes", "--quiet",
+            "--report", "report.json"]
+
+
+def test_cli_moves_and_writes_report(cli_args, workdir):
+    assert archive_cli.main(cli_args) == 0
+    
+    assert os.path.exists(workdir / "arc" / "a.txt")
+    assert os.path.exists(workdir / "report.json")
+    assert not os.path.exists(JOURNAL_FILE)
+
+
+def test_cli_search_only_keeps_files(cli_args, workdir):
+    args = [a for a in cli_args if a != "--yes"] + ["--search-only", "--search-report", "found.csv"]
+    
+    assert archive_cli.main(args) == 0
+    
+    assert os.path.exists(workdir / "src" / "a.txt")
+    assert b"a.txt" in read_file(workdir / "found.csv")
+    assert os.path.exists(workdir / "found.txt")
+
+
+def test_cli_move_requires_confirmation(cli_args, workdir):
+    with pytest.raises(SystemExit) as exc:
+        archive_cli.main([a for a in cli_args if a != "--yes"])
+    
+    assert exc.value.code == 2
+    assert os.path.exists(workdir / "src" / "a.txt")
+
+
+def test_cli_refuses_to_overwrite_unfinished_journal(cli_args, workdir):
+    unfinished = write_file(workdir / JOURNAL_FILE, b'{"job": {}}\n')
+    
+    with pytest.raises(SystemExit) as exc:
+        archive_cli.main(cli_args)
+    
+    assert exc.value.code == 2
+    assert read_file(unfinished) == b'{"job": {}}\n'
+    assert os.path.exists(workdir / "src" / "a.txt")
+    assert archive_cli.main(cli_args + ["--discard-journal"]) == 0
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from archive_engine import DedupIndex, FileCopier, RunMetrics
+from conftest import read_file, write_file
+
+CONTENT = os.urandom(3 * DedupIndex.MIN_SIZE)
+
+
+def test_duplicate_is_hardlinked_and_counted(make_engine, workdir):
+    src = workdir / "src"
+    write_file(src / "X" / "a.dat", CONTENT)
+    write_file(src / "Y" / "b.dat", CONTENT)
+    archive = workdir / "arc"
+    archive.mkdir()
+    engine = make_engine(dedup=True, copy_workers=1)
+    engine.source_root = str(src)
+    
+    moved = engine.move_files([(str(src / "X" / "a.dat"), None), (str(src / "Y" / "b.dat"), None)], str(archive))
+    
+    assert moved.errors == 0
+    methods = [r.method for r in moved.results]
+    assert methods[1] in ("dedup-hardlink", "dedup-manifest")
+    if methods[1] == "dedup-hardlink":
+        assert os.stat(archive / "X" / "a.dat").st_ino == os.stat(archive / "Y" / "b.dat").st_ino
+    assert not os.path.exists(src / "Y" / "b.dat")
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="нет жестких ссылок")
+def test_copy_does_not_write_through_hardlink(make_engine, workdir):
+    archive = workdir / "arc"
+    stored = write_file(archive / "X" / "a.dat", CONTENT)
+    linked = str(archive / "Y" / "b.dat")
+    os.makedirs(os.path.dirname(linked))
+    os.link(stored, linked)
+    other = os.urandom(len(CONTENT))
+    source = write_file(workdir / "src" / "Y" / "b.dat", other)
+    engine = make_engine()
+    engine.source_root = str(workdir / "src")
+    
+    result = engine._move_one(source, linked, FileCopier(), False, RunMetrics("move"))
+    
+    assert result.status == "УСПЕХ", result.message
+    assert read_file(stored) == CONTENT
+    assert read_file(linked) == other
+    assert os.stat(stored).st_nlink == 1
@@ -0,0 +1,58 @@
+import os
+
+from archive_engine import DedupIndex, JOURNAL_FILE, MoveJournal
+from conftest import read_file, write_file
+
+
+def test_journal_read_keeps_last_state_and_skips_torn_line(workdir):
+    journal = MoveJournal.create(JOURNAL_FILE, "/src", "/arc", ["/src/a", "/src/b"])
+    journal.record(1, "copied", size=3)
+    journal.record(1, "verified", dst="/arc/a")
+    journal.flush()
+    journal.close(False)
+    with open(JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"i": 2, "s": "del')
+    
+    job, entries = MoveJournal.read(JOURNAL_FILE)
+    
+    assert (job["source_root"], job["archive"], job["format"]) == ("/src", "/arc", "tree")
+    assert entries[1] == {"src": "/src/a", "s": "verified", "i": 1, "size": 3, "dst": "/arc/a"}
+    assert entries[2]["s"] == "pending"
+
+
+def test_resume_reconciles_journal_with_disk(make_engine, workdir):
+    src, archive = workdir / "src", workdir / "arc"
+    done = str(src / "done.txt")
+    write_file(archive / "done.txt", b"done")
+    pending = write_file(src / "pending.txt", b"pending")
+    copied = str(src / "copied.txt")
+    write_file(archive / "copied.txt", b"copied")
+    lost = str(src / "lost.txt")
+    journal = MoveJournal.create(JOURNAL_FILE, str(src), str(archive), [done, pending, copied, lost])
+    journal.record(1, "deleted", dst=str(archive / "done.txt"), method="rename")
+    journal.record(3, "copied", size=len(b"copied"))
+    journal.close(False)
+    
+    resumed = make_engine().resume_move()
+    
+    statuses = {os.path.basename(r.source): r.status for r in resumed.results}
+    assert statuses == {"done.txt": "УСПЕХ", "pending.txt": "УСПЕХ", "copied.txt": "УСПЕХ", "lost.txt": "ОШИБКА"}
+    assert read_file(archive / "pending.txt") == b"pending"
+    assert not os.path.exists(pending)
+    assert not os.path.exists(JOURNAL_FILE)
+
+
+def test_resume_finds_duplicate_stored_only_in_manifest(make_engine, workdir):
+    src, archive = workdir / "src", workdir / "arc"
+    stored = write_file(archive / "X" / "a.dat", b"same")
+    dedup = DedupIndex(str(archive))
+    dedup.add_link(str(archive / "Y" / "b.dat"), stored, 4)
+    dedup.close()
+    # Сбой после удаления исходного файла, но до сброса пачки журнала: в журнале файл еще pending
+    MoveJournal.create(JOURNAL_FILE, str(src), str(archive), [str(src / "Y" / "b.dat")]).close(False)
+    
+    resumed = make_engine().resume_move()
+    
+    assert resumed.errors == 0
+    assert resumed.results[0].method == "dedup-manifest"
+    assert resumed.results[0].dest == stored
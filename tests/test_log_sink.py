@@ -0,0 +1,21 @@
+from archive_engine import LogSink
+
+
+def test_drain_returns_tagged_lines_and_counts_dropped(workdir):
+    log_path = workdir / "run.log"
+    sink = LogSink(capacity=3, log_path=str(log_path))
+    sink.write("обычная")
+    sink.write("ошибка", error=True)
+    for i in range(3):
+        sink.write(f"успех {i}", success=True)
+    
+    items, dropped = sink.drain()
+    sink.close()
+    
+    assert dropped == 2
+    assert [tag for _, tag in items] == ["success"] * 3
+    assert items[-1][0].endswith("[УСПЕХ] успех 2\n")
+    assert sink.drain() == ([], 0)
+    # В файл попадают все строки, в том числе вытесненные из буфера окна
+    text = log_path.read_text(encoding="utf-8")
+    assert "[ОШИБКА] ошибка" in text and "обычная" in text and text.count("успех") == 3
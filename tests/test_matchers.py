@@ -0,0 +1,35 @@
+import fnmatch
+
+import pytest
+
+from archive_engine import MaskMatcher, PathTrie
+
+PATTERNS = ["Thumbs.db", "*.tmp", "*.tar.gz", "~*.*", "build", "data?.csv", "[ab]*.log"]
+NAMES = ["Thumbs.db", "thumbs.db", "x.tmp", "x.tmp.txt", "a.tar.gz", "~lock.docx", "~nodot", "build", "builds",
+         "data1.csv", "data10.csv", "a.log", "c.log", ".tmp", "tmp", "report.TMP"]
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_mask_matcher_agrees_with_fnmatch(name):
+    matcher = MaskMatcher(PATTERNS)
+    
+    assert matcher.match(name) == any(fnmatch.fnmatch(name, pattern) for pattern in PATTERNS)
+
+
+def test_empty_mask_matcher_matches_nothing():
+    assert not MaskMatcher([]).match("anything.tmp")
+
+
+def test_path_trie_matches_folder_and_everything_inside():
+    trie = PathTrie()
+    trie.add("/data/Share/Old")
+    trie.add("C:\\Users\\me\\Temp")
+    
+    assert trie.count == 2
+    assert trie.contains("/data/share/old")
+    assert trie.contains("/data/Share/Old/2019/a")
+    assert trie.contains("\\\\?\\C:\\users\\ME\\temp\\x")
+    assert trie.contains("C:/Users/me/Temp/")
+    assert not trie.contains("/data/Share/Older")
+    assert not trie.contains("/data/Share")
+    assert not trie.contains("C:\\Users\\me")
@@ -0,0 +1,37 @@
+import datetime
+
+from archive_engine import RunMetrics
+from conftest import write_file
+
+
+def test_metrics_snapshot_and_eta():
+    metrics = RunMetrics("move", total=10)
+    metrics.add(files=4, byte_count=4096, errors=1, copy=0.5)
+    metrics.add(files=1, copy=0.25, verify=0.1)
+    
+    assert metrics.eta() is not None
+    metrics.finish()
+    snapshot = metrics.snapshot()
+    
+    assert (snapshot["files"], snapshot["bytes"], snapshot["errors"], snapshot["total"]) == (5, 4096, 1, 10)
+    assert snapshot["error_rate"] == 0.2
+    assert snapshot["phase_seconds"] == {"copy": 0.75, "verify": 0.1}
+    assert "5/10" in metrics.status_text()
+    assert RunMetrics("move").eta() is None
+
+
+def test_search_reports_progress_and_metrics(make_engine, workdir):
+    stamp = datetime.datetime(2020, 1, 1).timestamp()
+    for i in range(5):
+        write_file(workdir / "src" / f"d{i}" / "f.txt", b"abc", stamp)
+    engine = make_engine()
+    progress = []
+    engine.progress_callback = lambda done, total: progress.append((done, total))
+    engine.PROGRESS_INTERVAL = 0
+    
+    outcome = engine.search_files(str(workdir / "src"), datetime.datetime(2019, 1, 1), datetime.datetime(2021, 1, 1),
+                                  "modified")
+    
+    assert (outcome.metrics.files, outcome.metrics.bytes) == (5, 15)
+    assert outcome.metrics.dirs == 6
+    assert progress and progress[-1][1] is None
@@ -0,0 +1,23 @@
+import datetime
+import os
+
+from conftest import write_file
+
+START = datetime.datetime(2019, 1, 1)
+END = datetime.datetime(2021, 1, 1)
+
+
+def test_profiles_of_quick_runs_are_kept_apart(make_engine, workdir):
+    write_file(workdir / "src" / "a.txt", mtime=datetime.datetime(2020, 1, 1).timestamp())
+    profile_dir = workdir / "settings" / "profiles"
+    engine = make_engine(profile_mode="stages")
+    engine.profile_dir = str(profile_dir)
+    
+    for _ in range(3):
+        outcome = engine.search_files(str(workdir / "src"), START, END, "modified")
+        assert outcome.metrics.profile["stages"]
+    
+    stage_files = sorted(os.listdir(profile_dir))
+    assert len(stage_files) == 3
+    assert all(name.startswith("search_") and name.endswith("_stages.json") for name in stage_files)
+    assert outcome.metrics.profile["stages_file"] == os.path.join(str(profile_dir), stage_files[-1])
@@ -0,0 +1,124 @@
+import csv
+import datetime
+import json
+import os
+import sqlite3
+
+import pytest
+
+from archive_engine import REPORTS_DB_FILE, open_report_writer
+from conftest import write_file
+
+FIELDS = ["path", "date", "size"]
+ROWS = [["/data/a.txt", "2020-01-01T00:00:00", 10], ["/data/имя \"в кавычках\".csv", None, 0]]
+METADATA = {"generated": "2020-01-02T00:00:00", "source_folder": "/data"}
+
+
+def write_report(path, rows=ROWS):
+    with open_report_writer(str(path), FIELDS, METADATA, {"metrics": {"files": len(rows)}}) as writer:
+        for row in rows:
+            writer.write(row)
+
+
+@pytest.mark.parametrize("rows", [ROWS, []])
+def test_json_report_matches_json_dump(workdir, rows):
+    write_report(workdir / "r.json", rows)
+    
+    report = json.loads((workdir / "r.json").read_text(encoding="utf-8"))
+    
+    assert report["metadata"] == METADATA
+    assert report["metrics"] == {"files": len(rows)}
+    assert report["files"] == [dict(zip(FIELDS, row)) for row in rows]
+    assert report["summary"]["records"] == len(rows)
+
+
+def test_ndjson_report_has_header_records_and_summary(workdir):
+    write_report(workdir / "r.ndjson")
+    
+    lines = [json.loads(line) for line in (workdir / "r.ndjson").read_text(encoding="utf-8").splitlines()]
+    
+    assert lines[0] == {"metadata": METADATA, "metrics": {"files": 2}}
+    assert lines[1:-1] == [dict(zip(FIELDS, row)) for row in ROWS]
+    assert lines[-1]["summary"]["records"] == 2
+
+
+def test_csv_report_keeps_metadata_in_comments(workdir):
+    write_report(workdir / "r.csv")
+    
+    lines = (workdir / "r.csv").read_text(encoding="utf-8").splitlines()
+    table = list(csv.reader(line for line in lines if not line.startswith("# ")))
+    
+    assert json.loads(lines[0][len("# metadata: "):]) == METADATA
+    assert table[0] == FIELDS
+    assert table[2] == [ROWS[1][0], "", "0"]
+    assert lines[-1].startswith("# summary: ")
+
+
+def test_sqlite_store_appends_runs(make_engine, workdir):
+    stamp = datetime.datetime(2020, 1, 1).timestamp()
+    write_file(workdir / "src" / "d" / "a.TXT", b"abc", stamp)
+    write_file(workdir / "src" / "b", b"de", stamp)
+    (workdir / "arc").mkdir()
+    engine = make_engine()
+    period = (datetime.datetime(2019, 1, 1), datetime.datetime(2021, 1, 1))
+    found = engine.search_files(str(workdir / "src"), *period, "modified")
+    engine.save_search_report_json(REPORTS_DB_FILE, found.results, "modified", *period, 0, found.metrics)
+    engine.move_files(found.results, str(workdir / "arc"), report_paths=[REPORTS_DB_FILE])
+    
+    conn = sqlite3.connect(REPORTS_DB_FILE)
+    try:
+        runs = conn.execute("SELECT id, kind, file_count FROM runs ORDER BY id").fetchall()
+        files = conn.execute("SELECT run_id, name, ext, size, mtime, status FROM files ORDER BY run_id, name").fetchall()
+        large_found = conn.execute("SELECT name FROM files JOIN runs ON runs.id = run_id "
+                                   "WHERE kind = 'search' AND size >= 3").fetchall()
+    finally:
+        conn.close()
+    
+    assert [(kind, count) for _, kind, count in runs] == [("search", 2), ("move", 2)]
+    search_id, move_id = runs[0][0], runs[1][0]
+    date = datetime.datetime.fromtimestamp(stamp).isoformat()
+    assert files == [(search_id, "a.TXT", ".txt", 3, date, None), (search_id, "b", "", 2, date, None),
+                     (move_id, "a.TXT", ".txt", 3, date, "УСПЕХ"), (move_id, "b", "", 2, date, "УСПЕХ")]
+    assert large_found == [("a.TXT",)]
+
+
+def test_sqlite_store_adds_new_columns_to_old_database(make_engine, workdir):
+    conn = sqlite3.connect(REPORTS_DB_FILE)
+    conn.execute("CREATE TABLE files (run_id INTEGER NOT NULL, folder TEXT NOT NULL, name TEXT NOT NULL, ext TEXT, "
+                 "size INTEGER, file_date TEXT, status TEXT, error_message TEXT, archive_path TEXT, "
+                 "copy_method TEXT, digest TEXT)")
+    conn.commit()
+    conn.close()
+    write_file(workdir / "src" / "a", b"abc", datetime.datetime(2020, 1, 1).timestamp())
+    engine = make_engine()
+    period = (datetime.datetime(2019, 1, 1), datetime.datetime(2021, 1, 1))
+    found = engine.search_files(str(workdir / "src"), *period, "modified")
+    
+    engine.save_search_report_json(REPORTS_DB_FILE, found.results, "modified", *period, 0)
+    
+    conn = sqlite3.connect(REPORTS_DB_FILE)
+    try:
+        assert conn.execute("SELECT name, size, atime IS NOT NULL FROM files").fetchall() == [("a", 3, 1)]
+    finally:
+        conn.close()
+
+
+def test_move_report_is_written_during_move_with_counts_in_summary(make_engine, workdir):
+    stamp = datetime.datetime(2020, 1, 1).timestamp()
+    write_file(workdir / "src" / "a", b"abc", stamp)
+    edited = write_file(workdir / "src" / "b", b"de", stamp)
+    (workdir / "arc").mkdir()
+    engine = make_engine()
+    period = ("modified", datetime.datetime(2019, 1, 1), datetime.datetime(2021, 1, 1))
+    found = engine.search_files(str(workdir / "src"), *period[1:], period[0])
+    os.utime(edited)
+    
+    moved = engine.move_files(found.results, str(workdir / "arc"), period, [str(workdir / "moved.ndjson")])
+    
+    lines = [json.loads(line) for line in (workdir / "moved.ndjson").read_text(encoding="utf-8").splitlines()]
+    assert lines[0]["metadata"]["total_files"] == 2
+    assert [(row["source_path"], row["status"]) for row in lines[1:-1]] == [(r.source, r.status) for r in moved.results]
+    summary = lines[-1]["summary"]
+    assert (summary["records"], summary["success_count"], summary["error_count"]) == (2, 1, 1)
+    assert summary["copy_methods"] == {r.method: 1 for r in moved.results if r.status == "УСПЕХ"}
+    assert summary["metrics"]["files"] == 2
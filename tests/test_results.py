@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from archive_engine import FoundFiles, ResultSpool
+from conftest import write_file
+
+STAT = (10, 1577836700.0, 1577836900.0, 1577836600.0)  # размер, mtime, atime, ctime
+MATCHES = [
+    [("/data/a/", "one.txt", 1577836800.5) + STAT, ("/data/a/", "имя файла.docx", 1577836801.0) + STAT],
+    [("/data/b/", "bad\udcff.bin", 1577836802.25) + STAT],
+    [],
+    [("/data/a/", "again.txt", 1577836803.0, 2 ** 40, 1.5, 2.5, 3.5)],
+]
+EXPECTED = [("/data/a/one.txt", 1577836800.5), ("/data/a/имя файла.docx", 1577836801.0),
+            ("/data/b/bad\udcff.bin", 1577836802.25), ("/data/a/again.txt", 1577836803.0)]
+DETAILS = [EXPECTED[0] + STAT, EXPECTED[1] + STAT, EXPECTED[2] + STAT, EXPECTED[3] + (2 ** 40, 1.5, 2.5, 3.5)]
+
+
+def test_spool_reads_back_records_across_chunk_boundaries(workdir):
+    spool = ResultSpool(str(workdir))
+    spool._READ_CHUNK = 7
+    for batch in MATCHES:
+        spool.add_batch(batch)
+    
+    assert len(spool) == len(EXPECTED)
+    assert list(spool.iter_raw()) == EXPECTED
+    assert list(spool.iter_details()) == DETAILS
+    # Несколько проходов: предпросмотр, отчет, перемещение
+    assert list(spool) == [(path, datetime.datetime.fromtimestamp(ts)) for path, ts in EXPECTED]
+    spool.close()
+    assert len(spool) == 0
+
+
+def test_found_files_indexing_and_iteration():
+    found = FoundFiles()
+    for batch in MATCHES:
+        found.add_batch(batch)
+    
+    assert len(found) == len(EXPECTED)
+    assert list(found.iter_raw()) == EXPECTED
+    assert list(found.iter_details()) == DETAILS
+    assert found[1] == (EXPECTED[1][0], datetime.datetime.fromtimestamp(EXPECTED[1][1]))
+    assert found[-1][0] == "/data/a/again.txt"
+    with pytest.raises(IndexError):
+        found[len(EXPECTED)]
+    # Префикс папки хранится один раз на папку
+    assert len(found._prefixes) == 2
+    found.close()
+    assert len(found) == 0
+
+
+def test_streamed_search_matches_in_memory_search(make_engine, workdir):
+    stamp = datetime.datetime(2020, 1, 1).timestamp()
+    for i in range(50):
+        write_file(workdir / "src" / f"d{i % 5}" / f"f{i}.txt", mtime=stamp)
+    period = (datetime.datetime(2019, 1, 1), datetime.datetime(2021, 1, 1), "modified")
+    
+    in_memory = make_engine().search_files(str(workdir / "src"), *period).results
+    streamed = make_engine(stream_results=True).search_files(str(workdir / "src"), *period).results
+    
+    assert isinstance(streamed, ResultSpool)
+    assert list(streamed) == list(in_memory)
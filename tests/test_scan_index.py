@@ -0,0 +1,81 @@
+import datetime
+import os
+
+from conftest import write_file
+
+OLD = datetime.datetime(2020, 1, 1).timestamp()
+START = datetime.datetime(2019, 1, 1)
+END = datetime.datetime(2021, 1, 1)
+
+
+def search(engine, folder):
+    outcome = engine.search_files(str(folder), START, END, "modified")
+    return sorted(os.path.basename(path) for path, _ in outcome.results), outcome
+
+
+def freeze_dir(folder, stamp):
+    os.utime(folder, (stamp, stamp))
+
+
+def test_index_rereads_changed_directory(make_engine, workdir):
+    src = workdir / "src"
+    write_file(src / "a.txt", mtime=OLD)
+    freeze_dir(src, OLD)
+    assert search(make_engine(use_scan_index=True), src)[0] == ["a.txt"]
+    
+    write_file(src / "b.txt", mtime=OLD)
+    
+    names, _ = search(make_engine(use_scan_index=True), src)
+    assert names == ["a.txt", "b.txt"]
+
+
+def test_index_match_edited_in_place_is_rechecked(make_engine, workdir):
+    src = workdir / "src"
+    write_file(src / "a.txt", mtime=OLD)
+    write_file(src / "b.txt", mtime=OLD)
+    freeze_dir(src, OLD)
+    search(make_engine(use_scan_index=True), src)
+    # Правка содержимого на месте не меняет дату папки
+    write_file(src / "a.txt", b"edited")
+    freeze_dir(src, OLD)
+    
+    names, _ = search(make_engine(use_scan_index=True), src)
+    
+    assert names == ["b.txt"]
+
+
+def test_edit_after_index_listing_brings_file_into_period(make_engine, workdir):
+    src = workdir / "src"
+    write_file(src / "a.txt", mtime=OLD)
+    freeze_dir(src, OLD)
+    engine = make_engine(use_scan_index=True)
+    start = datetime.datetime.now() - datetime.timedelta(hours=1)
+    end = start + datetime.timedelta(days=1)
+    assert list(engine.search_files(str(src), start, end, "modified").results) == []
+    edited = write_file(src / "a.txt", b"edited")
+    freeze_dir(src, OLD)
+    
+    outcome = make_engine(use_scan_index=True).search_files(str(src), start, end, "modified")
+    
+    (path, found_dt), = outcome.results
+    assert path == str(edited)
+    assert abs(found_dt.timestamp() - os.stat(edited).st_mtime) < 0.001
+
+
+def test_match_edited_after_search_is_rechecked_before_move(make_engine, workdir):
+    src = workdir / "src"
+    edited = write_file(src / "a.txt", mtime=OLD)
+    write_file(src / "b.txt", mtime=OLD)
+    engine = make_engine()
+    names, outcome = search(engine, src)
+    assert names == ["a.txt", "b.txt"]
+    write_file(src / "a.txt", b"edited")
+    archive = workdir / "arc"
+    archive.mkdir()
+    
+    moved = engine.move_files(outcome.results, str(archive), ("modified", START, END))
+    
+    assert (moved.success, moved.errors) == (1, 1)
+    assert os.path.exists(edited)
+    assert not os.path.exists(archive / "a.txt")
+    assert os.path.exists(archive / "b.txt")
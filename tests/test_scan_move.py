@@ -0,0 +1,81 @@
+import datetime
+import os
+import time
+
+import pytest
+
+from conftest import write_file
+
+OLD = datetime.datetime(2020, 1, 1).timestamp()
+START = datetime.datetime(2019, 1, 1)
+END = datetime.datetime(2021, 1, 1)
+
+
+@pytest.fixture
+def tree(workdir):
+    src = workdir / "src"
+    for i in range(30):
+        write_file(src / f"d{i % 3}" / f"f{i}.txt", mtime=OLD)
+    write_file(src / "new.txt")
+    archive = workdir / "arc"
+    archive.mkdir()
+    return src, archive
+
+
+def test_scan_and_move_moves_every_match(make_engine, tree):
+    src, archive = tree
+    
+    combined = make_engine().scan_and_move(str(src), START, END, "modified", str(archive))
+    
+    assert combined.scan_error is None
+    assert len(combined.search.results) == 30
+    assert (combined.move.success, combined.move.errors) == (30, 0)
+    assert sorted(os.listdir(src)) == ["d0", "d1", "d2", "new.txt"]
+    assert len(os.listdir(archive / "d1")) == 10
+
+
+def test_scan_error_keeps_move_outcome(make_engine, tree):
+    src, archive = tree
+    engine = make_engine()
+    scan = engine._scan_sequential
+    
+    def failing_scan(*args):
+        scan(*args)
+        raise OSError("диск отключен")
+    
+    engine._scan_sequential = failing_scan
+    combined = engine.scan_and_move(str(src), START, END, "modified", str(archive))
+    
+    assert combined.search is None
+    assert "диск отключен" in combined.scan_error
+    assert combined.move.success == 30
+    assert len(combined.move.results) == 30
+
+
+@pytest.mark.parametrize("config", [{}, {"scan_threads": 4}])
+def test_move_failure_stops_the_scan(make_engine, tree, config):
+    src, archive = tree
+    engine = make_engine(**config)
+    directory = engine._process_directory
+    visited = []
+    
+    def slow_directory(root_dir, rules, stats):
+        visited.append(root_dir)
+        time.sleep(0.02)
+        return directory(root_dir, rules, stats)
+    
+    def failing_move(jobs, *args, **kwargs):
+        next(iter(jobs))
+        raise OSError("в архиве нет места")
+    
+    for i in range(200):
+        os.makedirs(src / "wide" / f"w{i}")
+    engine._process_directory = slow_directory
+    engine._run_move = failing_move
+    started = time.perf_counter()
+    
+    with pytest.raises(OSError, match="нет места"):
+        engine.scan_and_move(str(src), START, END, "modified", str(archive))
+    
+    assert time.perf_counter() - started < 2
+    assert len(visited) < 100
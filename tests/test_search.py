@@ -0,0 +1,105 @@
+import datetime
+import os
+
+import pytest
+
+from conftest import write_file
+
+OLD = datetime.datetime(2020, 6, 1).timestamp()
+START = datetime.datetime(2020, 1, 1)
+END = datetime.datetime(2020, 12, 31, 23, 59, 59)
+EXPECTED = ["big.bin", "sub/a.txt", "sub/deep/c.txt"]
+
+
+@pytest.fixture
+def tree(workdir):
+    src = workdir / "src"
+    write_file(src / "big.bin", b"x" * 4096, OLD)
+    write_file(src / "small.bin", b"x", OLD)
+    write_file(src / "sub" / "a.txt", b"x" * 2048, OLD)
+    write_file(src / "sub" / "old.txt", b"x" * 2048, datetime.datetime(2018, 1, 1).timestamp())
+    write_file(src / "sub" / "skip.tmp", b"x" * 2048, OLD)
+    write_file(src / "sub" / "deep" / "c.txt", b"x" * 2048, OLD)
+    write_file(src / "node_modules" / "m.txt", b"x" * 2048, OLD)
+    write_file(src / "excl" / "d.txt", b"x" * 2048, OLD)
+    return src
+
+
+def search(make_engine, src, **config):
+    settings = dict(exclude_files="*.tmp", exclude_dirs="node_modules", exclude_paths="excl", exclude_small=True,
+                    min_size_kb=1)
+    settings.update(config)
+    outcome = make_engine(**settings).search_files(str(src), START, END, "modified")
+    names = sorted(os.path.relpath(path, str(src)).replace(os.sep, '/') for path, _ in outcome.results)
+    return names, outcome
+
+
+def test_search_applies_period_and_exclusions(make_engine, tree):
+    names, outcome = search(make_engine, tree)
+    
+    assert names == EXPECTED
+    assert (outcome.skipped_pattern, outcome.skipped_size, outcome.skipped_by_path) == (1, 1, 1)
+    assert outcome.errors == 0
+    assert all(dt == datetime.datetime.fromtimestamp(OLD) for _, dt in outcome.results)
+
+
+def test_parallel_scan_finds_the_same_files(make_engine, tree):
+    for i in range(40):
+        write_file(tree / "wide" / f"d{i}" / f"f{i}.txt", b"x" * 2048, OLD)
+    sequential, _ = search(make_engine, tree)
+    
+    parallel, outcome = search(make_engine, tree, scan_threads=4)
+    
+    assert parallel == sequential
+    assert len(parallel) == len(EXPECTED) + 40
+    assert outcome.skipped_by_path == 1
+
+
+def test_period_bounds_are_inclusive(make_engine, workdir):
+    src = workdir / "src"
+    start = datetime.datetime(2020, 1, 1)
+    end = datetime.datetime(2020, 1, 31, 23, 59, 59)
+    write_file(src / "first.txt", mtime=start.timestamp())
+    write_file(src / "last.txt", mtime=end.timestamp())
+    write_file(src / "before.txt", mtime=start.timestamp() - 1)
+    write_file(src / "after.txt", mtime=end.timestamp() + 1)
+    
+    outcome = make_engine().search_files(str(src), start, end, "modified")
+    
+    assert sorted(os.path.basename(path) for path, _ in outcome.results) == ["first.txt", "last.txt"]
+
+
+def test_process_scan_finds_the_same_files(make_engine, tree):
+    for i in range(20):
+        write_file(tree / "wide" / f"d{i}" / f"f{i}.txt", b"x" * 2048, OLD)
+    sequential, _ = search(make_engine, tree)
+    
+    sharded, outcome = search(make_engine, tree, scan_processes=2)
+    
+    assert sharded == sequential
+    assert (outcome.skipped_pattern, outcome.skipped_size, outcome.skipped_by_path) == (1, 1, 1)
+
+
+def test_async_scan_finds_the_same_files(make_engine, tree):
+    sequential, _ = search(make_engine, tree)
+    
+    concurrent, outcome = search(make_engine, tree, async_io=True, async_per_mount=4)
+    
+    assert concurrent == sequential
+    assert outcome.skipped_by_path == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="нет символических ссылок")
+def test_process_scan_logs_error_limit_once_per_search(make_engine, workdir):
+    src = workdir / "src"
+    for i in range(20):
+        os.makedirs(src / f"d{i}")
+        # Ссылка в никуда: stat файла завершается ошибкой
+        os.symlink(str(workdir / "missing"), str(src / f"d{i}" / "broken.txt"))
+    engine = make_engine(scan_processes=2)
+    engine.SCAN_UNIT_DIRS = 16
+    
+    outcome = engine.search_files(str(src), START, END, "modified")
+    
+    assert outcome.errors == 20
+    assert sum(m.startswith("Ошибка обработки") for m in engine.messages) == engine.ERROR_LOG_LIMIT
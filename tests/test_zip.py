@@ -0,0 +1,73 @@
+import os
+
+import archive_engine
+from archive_engine import ContainerIndex, JOURNAL_FILE, MoveJournal
+from conftest import read_file, write_file
+
+
+def make_tree(root):
+    files = {}
+    for name in ("A/one.txt", "A/B/two.bin", "three.log"):
+        data = os.urandom(2048)
+        files[write_file(root / name, data)] = data
+    return files
+
+
+def test_zip_volume_index_and_extract(make_engine, workdir):
+    src = workdir / "src"
+    files = make_tree(src)
+    archive = workdir / "arc"
+    archive.mkdir()
+    engine = make_engine(archive_format="zip", use_journal=False)
+    engine.source_root = str(src)
+    
+    moved = engine.move_files([(path, None) for path in files], str(archive))
+    
+    assert moved.errors == 0
+    assert all("::" in r.dest for r in moved.results)
+    assert ContainerIndex.lookup(str(archive), "A/B/two.bin") is not None
+    extracted = engine.extract_from_containers(str(archive), os.path.join("A", "B", "two.bin"), str(workdir / "out"))
+    assert read_file(extracted) == files[str(src / "A" / "B" / "two.bin")]
+    assert not any(os.path.exists(path) for path in files)
+
+
+def test_verified_is_flushed_before_source_is_removed(make_engine, workdir, monkeypatch):
+    src = workdir / "src"
+    files = make_tree(src)
+    archive = workdir / "arc"
+    archive.mkdir()
+    engine = make_engine(archive_format="zip")
+    engine.source_root = str(src)
+    real_remove = os.remove
+    states_at_remove = []
+    
+    def remove(path):
+        if path in files:
+            _, entries = MoveJournal.read(JOURNAL_FILE)
+            states_at_remove.append(next(e["s"] for e in entries.values() if e["src"] == path))
+        real_remove(path)
+    
+    monkeypatch.setattr(archive_engine.os, "remove", remove)
+    moved = engine.move_files([(path, None) for path in files], str(archive))
+    
+    assert moved.errors == 0
+    assert states_at_remove == ["verified"] * len(files)
+
+
+def test_resume_finds_zipped_files_in_volume_index(make_engine, workdir):
+    src = workdir / "src"
+    files = make_tree(src)
+    archive = workdir / "arc"
+    archive.mkdir()
+    engine = make_engine(archive_format="zip", use_journal=False)
+    engine.source_root = str(src)
+    engine.move_files([(path, None) for path in files], str(archive))
+    # Сбой после записи индекса тома и удаления исходных файлов: в журнале ни одной смены состояния
+    MoveJournal.create(JOURNAL_FILE, str(src), str(archive), list(files), "zip").close(False)
+    
+    resumed = make_engine().resume_move()
+    
+    assert resumed.errors == 0
+    assert len(resumed.results) == len(files)
+    assert all(r.status == "УСПЕХ" and "::" in r.dest for r in resumed.results)
+    assert not os.path.exists(JOURNAL_FILE)